@@ -1,16 +1,16 @@
 """Agent Card factories and handlers for each pipeline role."""
 from __future__ import annotations
 
-import asyncio
-from typing import Dict, Tuple
+from typing import Any, Dict, Tuple
 
 from scripts.run_architect import run_architect_job
 from scripts.run_ba import generate_requirements
 from scripts.run_dev import implement_story
 from scripts.run_product_owner import evaluate_alignment
-from scripts.run_qa import run_quality_checks
+from scripts.run_qa import run_quality_checks_async
 
 from .client import A2AClient
+from .config import get_agent_url
 
 from .server import AgentCard, AgentSkill, JsonCallable
 
@@ -35,11 +35,11 @@ def business_analyst_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         output_modes=["application/json"],
     )
 
-    def handler(payload: Dict[str, str]):
+    async def handler(payload: Dict[str, str]):
         concept = payload.get("concept")
         if not concept:
             return {"status": "error", "detail": "'concept' is required"}
-        result = asyncio.run(generate_requirements(concept))
+        result = await generate_requirements(concept)
         return {"status": "ok", **result}
 
     card = AgentCard(
@@ -49,7 +49,7 @@ def business_analyst_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["text/plain"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
@@ -75,7 +75,7 @@ def product_owner_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
@@ -90,16 +90,14 @@ def architect_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         output_modes=["application/json"],
     )
 
-    def handler(payload: Dict[str, str]):
-        result = asyncio.run(
-            run_architect_job(
-                concept=payload.get("concept"),
-                architect_mode=payload.get("mode", "normal"),
-                story_id=payload.get("story_id", ""),
-                detail_level=payload.get("detail_level", "medium"),
-                iteration_count=int(payload.get("iteration_count", 1)),
-                force_tier=payload.get("force_tier"),
-            )
+    async def handler(payload: Dict[str, str]):
+        result = await run_architect_job(
+            concept=payload.get("concept"),
+            architect_mode=payload.get("mode", "normal"),
+            story_id=payload.get("story_id", ""),
+            detail_level=payload.get("detail_level", "medium"),
+            iteration_count=int(payload.get("iteration_count", 1)),
+            force_tier=payload.get("force_tier"),
         )
         return {"status": "ok", **result}
 
@@ -110,7 +108,7 @@ def architect_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
@@ -120,18 +118,24 @@ def developer_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
     skill = AgentSkill(
         id="implement_story",
         name="Implement Story",
-        description="Generates code and tests for an assigned story.",
+        description=(
+            "Generates code and tests for an assigned story. Send the story as `story` "
+            "with its `story_version` to skip reading planning/stories.yaml."
+        ),
         input_modes=["application/json"],
         output_modes=["application/json"],
     )
 
-    def handler(payload: Dict[str, str]):
-        result = asyncio.run(
-            implement_story(
-                story_id=payload.get("story_id"),
-                retries=int(payload.get("retries", 3)),
-            )
+    async def handler(payload: Dict[str, Any]):
+        story = payload.get("story")
+        result = await implement_story(
+            story_id=payload.get("story_id"),
+            retries=int(payload.get("retries", 3)),
+            story=story if isinstance(story, dict) else None,
+            story_version=payload.get("story_version"),
         )
+        if result.get("status") == "error":
+            return result
         return {"status": "ok", **result}
 
     card = AgentCard(
@@ -141,7 +145,7 @@ def developer_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
@@ -156,15 +160,24 @@ def qa_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         output_modes=["application/json"],
     )
 
-    def handler(payload: Dict[str, str]):
+    async def handler(payload: Dict[str, str]):
         allow_flag = payload.get("allow_no_tests")
         if allow_flag is None:
             allow_no_tests = True
         else:
             allow_no_tests = str(allow_flag).lower() not in {"0", "false"}
-        result = run_quality_checks(
+        def flag(key: str, default: bool) -> bool:
+            return str(payload.get(key, default)).lower() not in {"0", "false", "no"}
+
+        result = await run_quality_checks_async(
             allow_no_tests=allow_no_tests,
             story=payload.get("story_id", ""),
+            project_root=payload.get("project_root", "") or "",
+            impacted_only=flag("impacted_tests", True),
+            full_suite_gate=flag("full_suite_gate", True),
+            xdist_workers=payload.get("xdist_workers"),
+            warm_pytest=flag("warm_pytest", False),
+            use_cache=flag("use_cache", True),
         )
         return {"status": result.get("status", "unknown"), **result}
 
@@ -175,7 +188,7 @@ def qa_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
@@ -190,22 +203,20 @@ def orchestrator_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         output_modes=["application/json"],
     )
 
-    def handler(payload: Dict[str, str]):
+    async def handler(payload: Dict[str, str]):
         concept = payload.get("concept")
-        client = A2AClient()
         results = {}
         if concept:
-            results["business_analyst"] = client.send_task(
-                "business_analyst",
+            results["business_analyst"] = await A2AClient(get_agent_url("business_analyst")).send_task(
                 "extract_requirements",
                 {"concept": concept},
             )
         else:
             results["business_analyst"] = {"status": "skipped", "detail": "concept not provided"}
 
-        results["product_owner"] = client.send_task("product_owner", "evaluate_alignment", {})
+        results["product_owner"] = await A2AClient(get_agent_url("product_owner")).send_task("evaluate_alignment", {})
         arch_payload = {"concept": concept} if concept else {}
-        results["architect"] = client.send_task("architect", "generate_plan", arch_payload)
+        results["architect"] = await A2AClient(get_agent_url("architect")).send_task("generate_plan", arch_payload)
 
         return {"status": "ok", "results": results}
 
@@ -216,7 +227,7 @@ def orchestrator_card() -> Tuple[AgentCard, Dict[str, JsonCallable]]:
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities={"streaming": False},
+        capabilities={"streaming": True},
         skills=[skill],
     )
     return card, {skill.id: handler}
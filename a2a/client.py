@@ -1,30 +1,145 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
+
 import httpx
-from typing import Any, Dict, Mapping, Optional
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 from uuid import uuid4
 
 from logger import logger
 
+from .tasks import CANCELED, COMPLETED, TERMINAL_STATES
+
+DEFAULT_HEALTH_TTL = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_BATCH_SIZE = 50  # the server accepts up to a2a.server.MAX_BATCH_SIZE
+# Errors that say the agent is down, as opposed to slow or misbehaving.
+_UNREACHABLE = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class A2ATransportError(RuntimeError):
+    """The agent could not be reached or answered with a server error (HTTP 5xx without a JSON-RPC error).
+
+    Other RuntimeErrors from the client mean the agent answered: the skill
+    failed, the request was rejected or the task was canceled.
+    """
+
 
 class A2AClient:
-    """HTTP client helpers for interacting with A2A agents."""
+    """HTTP client helpers for interacting with A2A agents.
+
+    ``send_task`` submits the skill as a task (``message/send`` with
+    ``blocking: false``) and long-polls ``tasks/get`` until it finishes, so
+    no single HTTP request has to stay open for a whole Dev or QA run; a
+    task that finishes within ``poll_wait`` comes back in the first
+    response. ``timeout`` bounds each HTTP request; ``poll_wait`` is how
+    long one call may wait on the server and stays below ``timeout``.
+
+    ``stream_task`` uses ``message/stream`` instead and yields the agent's
+    progress events as they happen. ``send_tasks`` runs many small tasks
+    through JSON-RPC batches, with one request per round instead of one
+    per task.
 
-    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+    Requests share one pooled ``httpx.AsyncClient`` per event loop (rebuilt
+    when a later ``asyncio.run`` uses the client), so keep-alive connections
+    survive across calls; ``aclose`` releases it. Health is cached for
+    ``health_ttl`` seconds: every request refreshes it (a connection error
+    marks the agent down, any answer marks it up) and ``start_health_probe``
+    keeps it fresh in the background.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        *,
+        poll_wait: float = 20.0,
+        health_ttl: float = DEFAULT_HEALTH_TTL,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.poll_wait = max(0.0, min(poll_wait, timeout * 0.8))
+        self.health_ttl = health_ttl
+        self.limits = limits or httpx.Limits(
+            max_connections=DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+        )
+        self.transport = transport
+        self._pool: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+        self._health: Optional[Tuple[bool, float]] = None  # (healthy, monotonic time observed)
+        self._prober: Optional[asyncio.Task] = None
+        self.stats = {"requests": 0, "clients_created": 0, "health_probes": 0, "health_cache_hits": 0}
+
+    # --- connection pool ---------------------------------------------------------------
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._pool is not None:
+            owner_loop, client = self._pool
+            if owner_loop is loop and not client.is_closed:
+                return client
+            logger.debug(f"[A2AClient] Discarding pooled HTTP client for {self.base_url} (event loop changed or client closed)")
+        client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+        self._pool = (loop, client)
+        self.stats["clients_created"] += 1
+        return client
+
+    async def aclose(self) -> None:
+        """Stop the health prober and close pooled connections owned by the running loop."""
+        await self.stop_health_probe()
+        pool, self._pool = self._pool, None
+        if pool is not None and pool[0] is asyncio.get_running_loop() and not pool[1].is_closed:
+            await pool[1].aclose()
+
+    async def __aenter__(self) -> "A2AClient":
+        return self
 
-    async def is_healthy(self) -> bool:
-        """Check whether the remote agent reports a healthy status."""
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    # --- health --------------------------------------------------------------------------
+
+    def _set_health(self, healthy: bool) -> None:
+        previous = self._health[0] if self._health else None
+        self._health = (healthy, time.monotonic())
+        if previous is not None and previous != healthy:
+            logger.info(f"[A2AClient] Agent at {self.base_url} is now {'healthy' if healthy else 'unhealthy'}")
+
+    def cached_health(self) -> Optional[bool]:
+        """Last observed health if younger than ``health_ttl``; None when unknown or stale."""
+        if self._health is None or time.monotonic() - self._health[1] > self.health_ttl:
+            return None
+        return self._health[0]
+
+    async def is_healthy(self, *, use_cache: bool = True) -> bool:
+        """Check whether the remote agent reports a healthy status (cached for ``health_ttl``)."""
         if not self.base_url:
             return False
+        if use_cache:
+            cached = self.cached_health()
+            if cached is not None:
+                self.stats["health_cache_hits"] += 1
+                return cached
+        healthy = await self._probe()
+        self._set_health(healthy)
+        return healthy
+
+    async def _probe(self) -> bool:
         url = f"{self.base_url}/health"
+        self.stats["health_probes"] += 1
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                return isinstance(data, dict) and data.get("status") == "ok"
+            response = await self._http().get(url)
+            response.raise_for_status()
+            data = response.json()
+            return isinstance(data, dict) and data.get("status") == "ok"
         except httpx.RequestError as exc:
             logger.warning(f"[A2AClient] Health check request error for {url}: {exc}")
             return False
@@ -34,48 +149,378 @@ class A2AClient:
             )
             return False
 
-    async def send_task(
-        self,
-        skill_id: str,
-        payload: Mapping[str, Any],
-        *,
-        request_id: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Send a JSON-RPC message to the remote agent."""
+    def start_health_probe(self, interval: float) -> None:
+        """Re-check health every ``interval`` seconds on the running loop until ``aclose``."""
+        loop = asyncio.get_running_loop()
+        if self._prober is not None and not self._prober.done() and self._prober.get_loop() is loop:
+            return
+
+        async def probe_forever() -> None:
+            while True:
+                self._set_health(await self._probe())
+                await asyncio.sleep(interval)
+
+        self._prober = loop.create_task(probe_forever())
+
+    async def stop_health_probe(self) -> None:
+        prober, self._prober = self._prober, None
+        if prober is None or prober.done():
+            return
+        if prober.get_loop() is asyncio.get_running_loop():
+            prober.cancel()
+            try:
+                await prober
+            except asyncio.CancelledError:
+                pass
+
+    # --- JSON-RPC ------------------------------------------------------------------------
+
+    async def _rpc(self, method: str, params: Mapping[str, Any], *, request_id: Optional[str] = None) -> Dict[str, Any]:
+        """Call one JSON-RPC method and return its ``result`` object."""
         if not self.base_url:
             raise RuntimeError("Remote agent URL is not configured.")
 
         endpoint = f"{self.base_url}/jsonrpc"
-        rpc_id = request_id or str(uuid4())
         json_payload = {
             "jsonrpc": "2.0",
-            "id": rpc_id,
-            "method": "message/send",
-            "params": {
-                "skill_id": skill_id,
-                "payload": dict(payload),
-            },
+            "id": request_id or str(uuid4()),
+            "method": method,
+            "params": dict(params),
         }
 
+        self.stats["requests"] += 1
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(endpoint, json=json_payload)
-                response.raise_for_status()
-                data = response.json()
+            response = await self._http().post(endpoint, json=json_payload)
         except httpx.RequestError as exc:
-            raise RuntimeError(f"Request error contacting agent at {endpoint}: {exc}") from exc
+            if isinstance(exc, _UNREACHABLE):
+                self._set_health(False)
+            raise A2ATransportError(f"Request error contacting agent at {endpoint}: {exc}") from exc
+        self._set_health(True)
+        data = response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+        if isinstance(data, dict) and "error" in data:
+            raise RuntimeError(f"Agent returned error: {data['error']}")
+        try:
+            response.raise_for_status()
         except httpx.HTTPStatusError as exc:
-            raise RuntimeError(
+            error = A2ATransportError if exc.response.status_code >= 500 else RuntimeError
+            raise error(
                 f"Agent at {endpoint} returned HTTP {exc.response.status_code}"
             ) from exc
 
         if not isinstance(data, dict):
             raise RuntimeError(f"Agent response malformed (expected object): {data!r}")
 
-        if "error" in data:
-            raise RuntimeError(f"Agent returned error: {data['error']}")
-
         result = data.get("result", {})
         if not isinstance(result, dict):
             raise RuntimeError(f"Agent result malformed (expected object): {result!r}")
         return result
+
+    async def _rpc_batch(
+        self, calls: Sequence[Tuple[str, Mapping[str, Any]]]
+    ) -> List[Union[Dict[str, Any], RuntimeError]]:
+        """Call several JSON-RPC methods in one batch request.
+
+        Returns each call's ``result`` object, or the RuntimeError for that
+        call, in the order of ``calls``. Raises RuntimeError when the batch
+        as a whole fails.
+        """
+        if not self.base_url:
+            raise RuntimeError("Remote agent URL is not configured.")
+
+        endpoint = f"{self.base_url}/jsonrpc"
+        ids = [str(uuid4()) for _ in calls]
+        json_payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": dict(params)}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+
+        self.stats["requests"] += 1
+        try:
+            response = await self._http().post(endpoint, json=json_payload)
+        except httpx.RequestError as exc:
+            if isinstance(exc, _UNREACHABLE):
+                self._set_health(False)
+            raise A2ATransportError(f"Request error contacting agent at {endpoint}: {exc}") from exc
+        self._set_health(True)
+        data = response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+        if isinstance(data, dict) and "error" in data:
+            raise RuntimeError(f"Agent rejected batch: {data['error']}")
+        if not isinstance(data, list):
+            error = A2ATransportError if response.status_code >= 500 else RuntimeError
+            raise error(f"Agent at {endpoint} returned HTTP {response.status_code} without a batch response")
+
+        replies = {item.get("id"): item for item in data if isinstance(item, dict)}
+        results: List[Union[Dict[str, Any], RuntimeError]] = []
+        for request_id in ids:
+            reply = replies.get(request_id)
+            if reply is None:
+                results.append(RuntimeError(f"Agent returned no response for batch entry {request_id}"))
+            elif "error" in reply:
+                results.append(RuntimeError(f"Agent returned error: {reply['error']}"))
+            elif not isinstance(reply.get("result"), dict):
+                results.append(RuntimeError(f"Agent result malformed (expected object): {reply.get('result')!r}"))
+            else:
+                results.append(reply["result"])
+        return results
+
+    async def submit_task(
+        self,
+        skill_id: str,
+        payload: Mapping[str, Any],
+        *,
+        request_id: Optional[str] = None,
+        wait_seconds: float = 0.0,
+    ) -> Dict[str, Any]:
+        """Start ``skill_id`` on the agent and return the task (``id``, ``status.state``).
+
+        With ``wait_seconds`` the agent holds the response that long for the
+        task to finish, so quick skills need a single round trip.
+        """
+        params: Dict[str, Any] = {"skill_id": skill_id, "payload": dict(payload), "blocking": False}
+        if wait_seconds > 0:
+            params["wait_seconds"] = wait_seconds
+        task = await self._rpc("message/send", params, request_id=request_id)
+        if not isinstance(task.get("id"), str):
+            raise RuntimeError(f"Agent did not return a task id: {task!r}")
+        return task
+
+    async def get_task(self, task_id: str, *, wait_seconds: float = 0.0) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"id": task_id}
+        if wait_seconds > 0:
+            params["wait_seconds"] = wait_seconds
+        return await self._rpc("tasks/get", params)
+
+    async def cancel_task(self, task_id: str) -> Dict[str, Any]:
+        return await self._rpc("tasks/cancel", {"id": task_id})
+
+    async def wait_for_task(
+        self, task_id: str, *, timeout: Optional[float] = None, task: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Long-poll ``tasks/get`` until the task finishes; returns its result.
+
+        ``task`` is the latest known state (e.g. from ``submit_task``); no
+        request is made if it already finished.
+
+        Raises RuntimeError if the task failed or was canceled and
+        TimeoutError once ``timeout`` expires; the task is then canceled on
+        the agent, as it is when the caller itself is cancelled.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        state = ((task or {}).get("status") or {}).get("state")
+        try:
+            while state not in TERMINAL_STATES:
+                wait = self.poll_wait
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Agent task {task_id} did not finish within {timeout}s")
+                    wait = min(wait, remaining)
+                task = await self.get_task(task_id, wait_seconds=wait)
+                state = (task.get("status") or {}).get("state")
+                if state not in TERMINAL_STATES and wait <= 0:
+                    await asyncio.sleep(0.5)
+        except (asyncio.CancelledError, TimeoutError):
+            await self._cancel_quietly(task_id)
+            raise
+
+        assert task is not None
+        return _task_result(task)
+
+    async def _cancel_quietly(self, task_id: str) -> None:
+        try:
+            await asyncio.shield(self.cancel_task(task_id))
+        except (Exception, asyncio.CancelledError) as exc:
+            logger.debug(f"[A2AClient] Could not cancel task {task_id}: {exc}")
+
+    async def send_task(
+        self,
+        skill_id: str,
+        payload: Mapping[str, Any],
+        *,
+        request_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run a skill on the remote agent and return its result."""
+        wait = self.poll_wait if timeout is None else min(self.poll_wait, timeout)
+        task = await self.submit_task(skill_id, payload, request_id=request_id, wait_seconds=wait)
+        logger.debug(f"[A2AClient] {skill_id} submitted to {self.base_url} as task {task['id']}")
+        return await self.wait_for_task(task["id"], timeout=timeout, task=task)
+
+    async def send_tasks(
+        self,
+        skill_id: str,
+        payloads: Sequence[Mapping[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[Any]:
+        """Run ``skill_id`` once per payload using JSON-RPC batches; results come back in order.
+
+        All tasks are submitted in one batch per ``batch_size`` payloads,
+        then the unfinished ones are polled together with ``tasks/get``
+        batches. Each round long-polls only its last entry, so a round
+        returns as soon as the oldest pending task finishes (or after
+        ``poll_wait``). A failed task raises its RuntimeError, or with
+        ``return_exceptions`` is returned in its slot. After ``timeout``,
+        TimeoutError is raised and unfinished tasks are canceled, as they
+        are when the caller is cancelled.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        results: List[Any] = [None] * len(payloads)
+        pending: Dict[int, str] = {}
+
+        def settle(index: int, reply: Union[Dict[str, Any], RuntimeError]) -> None:
+            if isinstance(reply, Exception):
+                results[index] = reply
+                pending.pop(index, None)
+                return
+            if (reply.get("status") or {}).get("state") not in TERMINAL_STATES:
+                if not isinstance(reply.get("id"), str):
+                    results[index] = RuntimeError(f"Agent did not return a task id: {reply!r}")
+                    return
+                pending[index] = reply["id"]
+                return
+            pending.pop(index, None)
+            try:
+                results[index] = _task_result(reply)
+            except RuntimeError as exc:
+                results[index] = exc
+
+        def wait_seconds() -> float:
+            if deadline is None:
+                return self.poll_wait
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{len(pending)} agent tasks did not finish within {timeout}s")
+            return min(self.poll_wait, remaining)
+
+        async def run_batch(method: str, entries: List[Tuple[int, Dict[str, Any]]]) -> None:
+            for start in range(0, len(entries), max(1, batch_size)):
+                chunk = entries[start:start + max(1, batch_size)]
+                chunk[-1][1]["wait_seconds"] = wait_seconds()  # sent last, so every task has started
+                replies = await self._rpc_batch([(method, params) for _, params in chunk])
+                for (index, _), reply in zip(chunk, replies):
+                    settle(index, reply)
+
+        try:
+            await run_batch(
+                "message/send",
+                [(i, {"skill_id": skill_id, "payload": dict(payload), "blocking": False}) for i, payload in enumerate(payloads)],
+            )
+            while pending:
+                await run_batch("tasks/get", [(i, {"id": task_id}) for i, task_id in sorted(pending.items())])
+                if pending and self.poll_wait <= 0:
+                    await asyncio.sleep(0.5)
+        except (asyncio.CancelledError, TimeoutError):
+            await self._cancel_batch_quietly(list(pending.values()))
+            raise
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    async def _cancel_batch_quietly(self, task_ids: List[str]) -> None:
+        if not task_ids:
+            return
+        try:
+            await asyncio.shield(self._rpc_batch([("tasks/cancel", {"id": task_id}) for task_id in task_ids]))
+        except (Exception, asyncio.CancelledError) as exc:
+            logger.debug(f"[A2AClient] Could not cancel tasks {task_ids}: {exc}")
+
+    async def stream_task(
+        self,
+        skill_id: str,
+        payload: Mapping[str, Any],
+        *,
+        request_id: Optional[str] = None,
+        resume: Optional[tuple[str, int]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a skill with ``message/stream`` and yield its events as they arrive.
+
+        Yields the task (``kind: task``), then ``kind: progress`` events, then
+        a final ``kind: status-update`` whose ``task`` holds the state and
+        result. ``resume=(task_id, last_seq)`` re-attaches to a running task
+        with ``tasks/resubscribe`` instead of starting a new one. Each read
+        may wait ``timeout`` seconds; the server sends a heartbeat every 15.
+        """
+        if not self.base_url:
+            raise RuntimeError("Remote agent URL is not configured.")
+
+        endpoint = f"{self.base_url}/jsonrpc"
+        if resume is not None:
+            method, params = "tasks/resubscribe", {"id": resume[0], "after": resume[1]}
+        else:
+            method, params = "message/stream", {"skill_id": skill_id, "payload": dict(payload)}
+        json_payload = {"jsonrpc": "2.0", "id": request_id or str(uuid4()), "method": method, "params": params}
+
+        self.stats["requests"] += 1
+        try:
+            async with self._http().stream("POST", endpoint, json=json_payload, headers={"Accept": "text/event-stream"}) as response:
+                self._set_health(True)
+                if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    error = A2ATransportError if response.status_code >= 500 else RuntimeError
+                    raise error(f"Agent at {endpoint} did not stream (HTTP {response.status_code}): {body[:500]}")
+                data_lines: list[str] = []
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        data_lines.append(line[5:].lstrip())
+                    elif not line and data_lines:
+                        message = json.loads("\n".join(data_lines))
+                        data_lines = []
+                        if "error" in message:
+                            raise RuntimeError(f"Agent returned error: {message['error']}")
+                        result = message.get("result")
+                        if isinstance(result, dict):
+                            yield result
+                    # ``:`` heartbeats and ``event:``/``id:`` fields need no handling
+        except _UNREACHABLE as exc:
+            self._set_health(False)
+            raise A2ATransportError(f"Request error contacting agent at {endpoint}: {exc}") from exc
+        except httpx.RequestError as exc:
+            raise A2ATransportError(f"Request error contacting agent at {endpoint}: {exc}") from exc
+
+
+def _task_result(task: Mapping[str, Any]) -> Dict[str, Any]:
+    """The result of a finished task; RuntimeError if it failed or was canceled."""
+    state = (task.get("status") or {}).get("state")
+    if state == COMPLETED:
+        result = task.get("result", {})
+        if not isinstance(result, dict):
+            raise RuntimeError(f"Agent result malformed (expected object): {result!r}")
+        return result
+    if state == CANCELED:
+        raise RuntimeError(f"Agent task {task.get('id')} was canceled")
+    raise RuntimeError(f"Agent task {task.get('id')} failed: {task.get('error')}")
+
+
+_CLIENTS: Dict[Tuple[str, float], A2AClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_a2a_client(base_url: str, *, timeout: float = 30.0, health_ttl: float = DEFAULT_HEALTH_TTL) -> A2AClient:
+    """Shared client for ``base_url``, so executors for the same agent share connections and health."""
+    key = (base_url.rstrip("/"), timeout)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = A2AClient(base_url, timeout, health_ttl=health_ttl)
+        return client
+
+
+def a2a_client_stats() -> Dict[str, Dict[str, Any]]:
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+    return {client.base_url: {**client.stats, "healthy": client.cached_health()} for client in clients}
+
+
+async def close_a2a_clients() -> None:
+    """Stop health probers and close pooled connections (call once before the event loop exits)."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
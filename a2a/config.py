@@ -2,17 +2,28 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Mapping, Any
+from typing import Any, Dict, Mapping, Tuple
 
 from scripts.common import load_a2a_config
 
 
+def agent_urls(info: Mapping[str, Any]) -> Tuple[str, ...]:
+    """Replica URLs for an agent: ``replicas`` (a list), else ``url`` (a string or a list)."""
+    raw = info.get("replicas") or info.get("url") or ()
+    if isinstance(raw, str):
+        raw = [raw]
+    if not isinstance(raw, (list, tuple)):
+        return ()
+    return tuple(dict.fromkeys(str(url).strip().rstrip("/") for url in raw if str(url).strip()))
+
+
 @dataclass(frozen=True)
 class AgentDefinition:
     name: str
     url: str
     capabilities: Mapping[str, bool]
     skills: Mapping[str, Mapping[str, str]]
+    replicas: Tuple[str, ...] = ()
 
 
 class A2AConfig:
@@ -22,16 +33,17 @@ class A2AConfig:
         for role, info in raw.get("agents", {}).items():
             if not isinstance(info, dict):
                 continue
-            url = str(info.get("url", "")).strip()
-            if not url:
+            replicas = agent_urls(info)
+            if not replicas:
                 continue
             capabilities = info.get("capabilities") if isinstance(info.get("capabilities"), dict) else {}
             skills = info.get("skills") if isinstance(info.get("skills"), dict) else {}
             self._agents[role] = AgentDefinition(
                 name=role,
-                url=url,
+                url=replicas[0],
                 capabilities=capabilities,
                 skills=skills,
+                replicas=replicas,
             )
         auth = raw.get("authentication", {})
         self.authentication_mode = str(auth.get("mode", "none")).lower()
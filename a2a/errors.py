@@ -19,6 +19,8 @@ class A2AErrorCode(Enum):
     UPSTREAM_FAILURE = -32000
     TIMEOUT = -32001
     UNAVAILABLE = -32002
+    TASK_NOT_FOUND = -32003
+    TASK_NOT_CANCELABLE = -32004
 
 
 @dataclass(frozen=True)
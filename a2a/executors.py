@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import inspect
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
-from .client import A2AClient
-from .config import load_a2a_config
+from .client import DEFAULT_HEALTH_TTL, A2AClient, A2ATransportError
+from .config import agent_urls, load_a2a_config
+from .routing import Replica, ReplicaPool
 from logger import logger
+from scripts.progress import emit_progress
 
 
 class RoleExecutor(ABC):
@@ -33,8 +38,74 @@ class LocalExecutor(RoleExecutor):
         return result
 
 
+class DeadlineExceeded(RuntimeError):
+    """A streamed remote task ran past one of its ``PhaseDeadlines``."""
+
+
+@dataclass(frozen=True)
+class PhaseDeadlines:
+    """Time limits for a streamed remote task, in seconds (None: unlimited).
+
+    ``connect``: until the agent accepts the task; ``idle``: between two
+    progress events; ``phases``: how long the agent may stay in a phase it
+    announced (a ``phase`` progress event); ``total``: the whole task.
+    Configured per agent under ``a2a.agents.<role>.deadlines``.
+    """
+
+    connect: Optional[float] = 15.0
+    idle: Optional[float] = 300.0
+    total: Optional[float] = None
+    phases: Mapping[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, raw: Any) -> "PhaseDeadlines":
+        if not isinstance(raw, dict):
+            return cls()
+        defaults = cls()
+
+        def seconds(key: str, default: Optional[float]) -> Optional[float]:
+            value = raw.get(key, default)
+            return float(value) if value not in (None, "", 0) else None
+
+        phases = raw.get("phases") if isinstance(raw.get("phases"), dict) else {}
+        return cls(
+            connect=seconds("connect", defaults.connect),
+            idle=seconds("idle", defaults.idle),
+            total=seconds("total", defaults.total),
+            phases={str(name): float(limit) for name, limit in phases.items() if limit},
+        )
+
+
+@dataclass
+class _Attempt:
+    """One call to one replica; ``task_id`` is set once the replica accepted the task."""
+
+    task_id: Optional[str] = None
+
+
 class RemoteExecutor(RoleExecutor):
-    """Executes a role's logic remotely by calling its A2A service."""
+    """Executes a role's logic remotely by calling its A2A service.
+
+    Agents whose config advertises ``capabilities.streaming`` are called
+    with ``message/stream``: their progress events are logged and re-emitted
+    (``scripts.progress``) and ``PhaseDeadlines`` apply. Others are called
+    with ``send_task`` and only the ``total`` deadline applies.
+
+    Executors share one pooled ``A2AClient`` per agent URL. The health check
+    before each task is answered from the client's cache (``health.ttl``,
+    kept fresh by a background probe every ``health.probe_interval``
+    seconds), so a call to a healthy agent costs no extra round trip and a
+    down agent fails over to local execution immediately.
+
+    A role may list several ``replicas``; ``a2a.routing.ReplicaPool`` picks
+    one per call and each replica has its own circuit breaker, which counts
+    only transport errors and HTTP 5xx answers (``A2ATransportError``), not
+    tasks that fail on their own. A replica that turns out to be
+    unreachable before it accepted the task hands the call to the next one.
+    Once a replica has accepted a task (returned its id or the first stream
+    event), a failure cancels the task there and falls back to local
+    execution, rather than repeating the work on another replica.
+    """
 
     def __init__(
         self,
@@ -43,37 +114,166 @@ class RemoteExecutor(RoleExecutor):
         agent_config: Dict[str, Any],
         fallback_executor: RoleExecutor,
     ):
+        agent_config = agent_config or {}
         self.role = role
         self.skill_id = skill_id
         self.fallback_executor = fallback_executor
-        self.agent_url = str((agent_config or {}).get("url", "")).rstrip("/")
-        self.client = A2AClient(self.agent_url) if self.agent_url else None
+        urls = agent_urls(agent_config)
+        self.agent_url = urls[0] if urls else ""
+        health = agent_config.get("health") if isinstance(agent_config.get("health"), dict) else {}
+        self.probe_interval = float(health.get("probe_interval", DEFAULT_HEALTH_TTL / 2) or 0)
+        self.pool = ReplicaPool.from_config(role, urls, agent_config) if urls else None
+        capabilities = agent_config.get("capabilities") if isinstance(agent_config.get("capabilities"), dict) else {}
+        self.streaming = bool(capabilities.get("streaming", False))
+        self.deadlines = PhaseDeadlines.from_config(agent_config.get("deadlines"))
 
     async def execute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         logger.info(f"[Executor] Executing role '{self.role}' remotely.")
 
-        if not self.client:
+        if self.pool is None:
             logger.warning(
                 f"[Executor] Remote agent URL missing for role '{self.role}'. "
                 "Falling back to local execution."
             )
             return await self.fallback_executor.execute(payload)
 
-        try:
-            if not await self.client.is_healthy():
-                logger.warning(
-                    f"[Executor] Remote agent for role '{self.role}' is not healthy. "
+        for replica in self.pool.candidates(payload):
+            if not replica.breaker.allow():
+                continue
+            try:
+                healthy = await replica.client.is_healthy()
+            except asyncio.CancelledError:
+                replica.breaker.abandon()
+                raise
+            if self.probe_interval > 0:
+                replica.client.start_health_probe(self.probe_interval)
+            if not healthy:
+                replica.breaker.abandon()
+                logger.warning(f"[Executor] Remote agent for role '{self.role}' at {replica.url} is not healthy.")
+                continue
+
+            attempt = _Attempt()
+            try:
+                with self.pool.lease(replica):
+                    result = await self._execute_on(replica, payload, attempt)
+            except asyncio.CancelledError:
+                replica.breaker.abandon()
+                raise
+            except Exception as exc:
+                replica.failures += 1
+                if isinstance(exc, A2ATransportError):
+                    replica.breaker.record_failure()
+                else:
+                    replica.breaker.record_success()  # the replica answered; the task itself failed
+                if attempt.task_id is None and replica.client.cached_health() is False:
+                    logger.warning(
+                        f"[Executor] Remote agent for role '{self.role}' at {replica.url} is unreachable: {exc}"
+                    )
+                    continue
+                logger.error(
+                    f"[Executor] Remote execution for role '{self.role}' failed: {exc}. "
                     "Falling back to local execution."
                 )
                 return await self.fallback_executor.execute(payload)
+            replica.breaker.record_success()
+            return result
 
-            return await self.client.send_task(self.skill_id, payload)
-        except Exception as exc:  # pragma: no cover - defensive
-            logger.error(
-                f"[Executor] Remote execution for role '{self.role}' failed: {exc}. "
-                "Falling back to local execution."
-            )
-            return await self.fallback_executor.execute(payload)
+        logger.warning(
+            f"[Executor] No healthy remote agent for role '{self.role}'. "
+            "Falling back to local execution."
+        )
+        return await self.fallback_executor.execute(payload)
+
+    async def _execute_on(self, replica: Replica, payload: Dict[str, Any], attempt: "_Attempt") -> Dict[str, Any]:
+        """Run the skill on ``replica``; ``attempt.task_id`` is set once the replica has accepted the task.
+
+        An accepted task is canceled on the replica when the call fails, so
+        the fallback never runs alongside it.
+        """
+        if self.streaming:
+            return await self._execute_streaming(replica.client, payload, attempt)
+        client = replica.client
+        total = self.deadlines.total
+        wait = client.poll_wait if total is None else min(client.poll_wait, total)
+        task = await client.submit_task(self.skill_id, payload, wait_seconds=wait)
+        attempt.task_id = task["id"]
+        try:
+            return await client.wait_for_task(task["id"], timeout=total, task=task)
+        except Exception:
+            await self._cancel_remote(client, task["id"])
+            raise
+
+    def _next_deadline(
+        self, now: float, started: float, last_event: float, accepted: bool, phase: Optional[Tuple[str, float]]
+    ) -> Tuple[Optional[float], str]:
+        """Seconds left before the nearest deadline, and which one it is."""
+        d = self.deadlines
+        limits = [(started + d.total, "total") if d.total else None]
+        if not accepted:
+            limits.append((started + d.connect, "connect") if d.connect else None)
+        else:
+            limits.append((last_event + d.idle, "idle") if d.idle else None)
+        if phase is not None and phase[0] in d.phases:
+            limits.append((phase[1] + d.phases[phase[0]], f"phase '{phase[0]}'"))
+        active = [limit for limit in limits if limit is not None]
+        if not active:
+            return None, ""
+        at, name = min(active)
+        return max(0.0, at - now), name
+
+    async def _execute_streaming(self, client: A2AClient, payload: Dict[str, Any], attempt: "_Attempt") -> Dict[str, Any]:
+        started = last_event = time.monotonic()
+        task_id: Optional[str] = None
+        phase: Optional[Tuple[str, float]] = None
+        events = client.stream_task(self.skill_id, payload)
+        try:
+            while True:
+                remaining, deadline = self._next_deadline(time.monotonic(), started, last_event, task_id is not None, phase)
+                try:
+                    item = await asyncio.wait_for(events.__anext__(), remaining)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded(
+                        f"remote {self.role} exceeded its {deadline} deadline after {time.monotonic() - started:.1f}s"
+                    ) from None
+                except StopAsyncIteration:
+                    raise A2ATransportError(f"remote {self.role} stream ended before the task finished") from None
+                last_event = time.monotonic()
+                kind = item.get("kind")
+                if kind == "task":
+                    task_id = attempt.task_id = item.get("id")
+                elif kind == "progress":
+                    if item.get("event") == "phase":
+                        phase = (str(item.get("name", "")), last_event)
+                    self._forward(item)
+                elif kind == "status-update" and item.get("final"):
+                    return self._final_result(item.get("task") or {})
+        except BaseException:
+            if task_id is not None:
+                await self._cancel_remote(client, task_id)
+            raise
+        finally:
+            await events.aclose()
+
+    def _forward(self, item: Dict[str, Any]) -> None:
+        event = item.get("event", "")
+        data = {k: v for k, v in item.items() if k not in {"kind", "event", "task_id", "seq", "timestamp"}}
+        if event == "phase":
+            logger.info(f"[Executor] Remote {self.role}: phase {data.get('name')}")
+        elif event != "llm_token":
+            logger.info(f"[Executor] Remote {self.role}: {event} {data}")
+        emit_progress(event, role=self.role, **data)
+
+    def _final_result(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        state = (task.get("status") or {}).get("state")
+        if state == "completed" and isinstance(task.get("result"), dict):
+            return task["result"]
+        raise RuntimeError(f"remote {self.role} task {task.get('id')} ended {state}: {task.get('error')}")
+
+    async def _cancel_remote(self, client: A2AClient, task_id: str) -> None:
+        try:
+            await asyncio.shield(client.cancel_task(task_id))
+        except (Exception, asyncio.CancelledError) as exc:
+            logger.debug(f"[Executor] Could not cancel remote {self.role} task {task_id}: {exc}")
 
 
 def get_executor(role: str, handler: Callable[..., Any], *, skill_id: str) -> RoleExecutor:
@@ -100,7 +300,7 @@ def get_executor(role: str, handler: Callable[..., Any], *, skill_id: str) -> Ro
     if execution_strategy == "local":
         return local_executor
 
-    if not role_config.get("url"):
+    if not agent_urls(role_config):
         if execution_strategy == "remote":
             logger.warning(
                 f"[Executor] Remote strategy requested for role '{role}' but no URL configured. "
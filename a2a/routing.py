@@ -0,0 +1,207 @@
+"""Routing one role's calls across several agent replicas.
+
+A role configured with more than one URL (``a2a.agents.<role>.replicas``)
+is served by a ``ReplicaPool``. For each call the pool orders the replicas
+by its policy (``routing.policy``):
+
+* ``least_outstanding`` (default): fewest calls in flight from this process
+  first, ties broken round robin;
+* ``round_robin``: the next replica in turn;
+* ``consistent_hash``: the replica owning ``payload[routing.hash_key]``
+  (``story_id`` by default) on a hash ring, so retries of a story land
+  where its workspace and caches are warm. Payloads without the key are
+  routed least-outstanding.
+
+Replicas whose cached health is down or whose ``CircuitBreaker`` is open
+are skipped, and the rest of the order is the failover sequence: with
+consistent hashing a story moves to the next replica on the ring and
+comes back once its owner recovers.
+"""
+from __future__ import annotations
+
+import bisect
+import contextlib
+import hashlib
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+from logger import logger
+
+from .client import DEFAULT_HEALTH_TTL, A2AClient, get_a2a_client
+
+LEAST_OUTSTANDING = "least_outstanding"
+ROUND_ROBIN = "round_robin"
+CONSISTENT_HASH = "consistent_hash"
+POLICIES = (LEAST_OUTSTANDING, ROUND_ROBIN, CONSISTENT_HASH)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+VIRTUAL_NODES = 64
+
+
+class CircuitBreaker:
+    """Stops sending calls to a replica after ``failure_threshold`` consecutive failures.
+
+    After ``reset_seconds`` the breaker lets a single trial call through
+    (half-open); its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int = 3, reset_seconds: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+    def available(self) -> bool:
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and not self._trial)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state this claims the trial call."""
+        if not self.available():
+            return False
+        if self._state == HALF_OPEN:
+            self._trial = True
+        return True
+
+    def abandon(self) -> None:
+        """Release a claimed trial without a verdict (the call never reached the replica)."""
+        self._trial = False
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            logger.info(f"[Routing] Circuit for {self.name} closed")
+        self._state = CLOSED
+        self.failures = 0
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self._state == HALF_OPEN or (self._state == CLOSED and self.failures >= self.failure_threshold):
+            logger.warning(
+                f"[Routing] Circuit for {self.name} opened after {self.failures} consecutive failures; "
+                f"retrying in {self.reset_seconds:g}s"
+            )
+            self._state = OPEN
+            self.opened_at = time.monotonic()
+
+
+@dataclass(eq=False)
+class Replica:
+    url: str
+    client: A2AClient
+    breaker: CircuitBreaker
+    outstanding: int = 0
+    calls: int = 0
+    failures: int = 0
+
+    @property
+    def routable(self) -> bool:
+        return self.client.cached_health() is not False and self.breaker.available()
+
+
+@dataclass
+class ReplicaPool:
+    """The replicas of one role and the policy that orders them for each call."""
+
+    role: str
+    replicas: List[Replica]
+    policy: str = LEAST_OUTSTANDING
+    hash_key: str = "story_id"
+    _turn: Iterator[int] = field(default_factory=itertools.count, init=False, repr=False)
+    _ring: List[Tuple[int, int]] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown routing policy '{self.policy}' for role '{self.role}' (expected one of {POLICIES})")
+        self._ring = sorted(
+            (_hash(f"{replica.url}#{node}"), index)
+            for index, replica in enumerate(self.replicas)
+            for node in range(VIRTUAL_NODES)
+        )
+
+    @classmethod
+    def from_config(cls, role: str, urls: Sequence[str], agent_config: Mapping[str, Any]) -> "ReplicaPool":
+        """Build the pool from ``a2a.agents.<role>`` (``routing``, ``circuit_breaker`` and ``health``)."""
+        routing = agent_config.get("routing") if isinstance(agent_config.get("routing"), dict) else {}
+        breaker = agent_config.get("circuit_breaker") if isinstance(agent_config.get("circuit_breaker"), dict) else {}
+        health = agent_config.get("health") if isinstance(agent_config.get("health"), dict) else {}
+        health_ttl = float(health.get("ttl", DEFAULT_HEALTH_TTL))
+        replicas = [
+            Replica(
+                url=url,
+                client=get_a2a_client(url, health_ttl=health_ttl),
+                breaker=CircuitBreaker(
+                    f"{role} replica {url}",
+                    failure_threshold=int(breaker.get("failure_threshold", 3)),
+                    reset_seconds=float(breaker.get("reset_seconds", 30.0)),
+                ),
+            )
+            for url in urls
+        ]
+        return cls(
+            role=role,
+            replicas=replicas,
+            policy=str(routing.get("policy", LEAST_OUTSTANDING)).lower(),
+            hash_key=str(routing.get("hash_key", "story_id")),
+        )
+
+    def candidates(self, payload: Mapping[str, Any]) -> List[Replica]:
+        """Replicas to try for this call, in order, skipping those known to be down or behind an open circuit."""
+        key = payload.get(self.hash_key) if self.policy == CONSISTENT_HASH else None
+        if key not in (None, ""):
+            owners: Dict[int, None] = {}
+            start = bisect.bisect_left(self._ring, (_hash(str(key)), -1))
+            for _, index in itertools.chain(self._ring[start:], self._ring[:start]):
+                owners.setdefault(index)
+                if len(owners) == len(self.replicas):
+                    break
+            return [self.replicas[index] for index in owners if self.replicas[index].routable]
+        routable = [replica for replica in self.replicas if replica.routable]
+        if not routable:
+            return []
+        turn = next(self._turn) % len(routable)
+        rotated = routable[turn:] + routable[:turn]
+        if self.policy == ROUND_ROBIN:
+            return rotated
+        return sorted(rotated, key=lambda replica: replica.outstanding)
+
+    @contextlib.contextmanager
+    def lease(self, replica: Replica) -> Iterator[Replica]:
+        """Count a call as outstanding on ``replica`` while it runs."""
+        replica.outstanding += 1
+        replica.calls += 1
+        try:
+            yield replica
+        finally:
+            replica.outstanding -= 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            replica.url: {
+                "calls": replica.calls,
+                "failures": replica.failures,
+                "outstanding": replica.outstanding,
+                "circuit": replica.breaker.state,
+                "healthy": replica.client.cached_health(),
+            }
+            for replica in self.replicas
+        }
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
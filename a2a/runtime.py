@@ -1,22 +1,54 @@
 """Runtime helpers for launching A2A agents."""
 from __future__ import annotations
 
-from typing import Mapping, Callable, Any
+import contextlib
+import os
+import threading
+import time
+from typing import Mapping, Callable, Any, Iterator
 from urllib.parse import urlparse
 
 import uvicorn
+from fastapi import FastAPI
 
 from .config import A2AConfig
 from .server import AgentCard, JsonCallable, create_agent_app
 
 
 def run_agent(role: str, card: AgentCard, handlers: Mapping[str, JsonCallable], *, reload: bool = False) -> None:
+    """Serve the role's agent on its configured URL.
+
+    For a role with several ``replicas``, set ``A2A_AGENT_URL`` to the
+    replica this process serves; the first one is used otherwise.
+    """
     agent_def = A2AConfig().agent(role)
-    parsed = urlparse(agent_def.url)
+    url = os.environ.get("A2A_AGENT_URL") or agent_def.url
+    parsed = urlparse(url)
     host = parsed.hostname or "0.0.0.0"
     port = parsed.port or 0
     if not port:
-        raise ValueError(f"Agent URL must include an explicit port (role={role}, url={agent_def.url})")
+        raise ValueError(f"Agent URL must include an explicit port (role={role}, url={url})")
 
     app = create_agent_app(card, handlers)
     uvicorn.run(app, host=host, port=port, reload=reload)
+
+
+@contextlib.contextmanager
+def running_agent(app: FastAPI, *, host: str = "127.0.0.1") -> Iterator[str]:
+    """Serve ``app`` with uvicorn on a free port in a background thread; yields its base URL.
+
+    For benchmarks and tests that need a real HTTP agent (keep-alive, SSE).
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="a2a-agent", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("agent server exited during startup")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(5)
@@ -1,13 +1,16 @@
 """Utility to expose pipeline roles as A2A-compatible HTTP services."""
 from __future__ import annotations
 
+import asyncio
+import json
 from dataclasses import dataclass, asdict
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from .errors import A2AErrorCode, error_response
+from .tasks import CANCELED, FAILED, Task, TaskManager
 
 
 @dataclass(frozen=True)
@@ -61,111 +64,251 @@ class AgentCard:
 
 
 JsonCallable = Callable[[Dict[str, Any]], Any]
+"""A skill handler: ``def`` or ``async def``, taking the payload and returning a JSON-able result."""
 
 
-def create_agent_app(card: AgentCard, handlers: Mapping[str, JsonCallable]) -> FastAPI:
+def _rpc_error(request_id: Any, status_code: int, code: A2AErrorCode, message: str, *, data: Optional[Dict[str, Any]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"jsonrpc": "2.0", "id": request_id, "error": error_response(code, message, data=data)},
+    )
+
+
+def _rpc_result(request_id: Any, result: Any) -> JSONResponse:
+    return JSONResponse(status_code=200, content={"jsonrpc": "2.0", "id": request_id, "result": result})
+
+
+SSE_HEARTBEAT_SECONDS = 15.0
+BATCH_CONCURRENCY = 8
+MAX_BATCH_SIZE = 100
+STREAMING_METHODS = frozenset({"message/stream", "tasks/resubscribe"})
+
+
+def _sse(request_id: Any, result: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """One server-sent event whose data is a JSON-RPC response."""
+    data = json.dumps({"jsonrpc": "2.0", "id": request_id, "result": result}, ensure_ascii=False)
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {result['kind']}\ndata: {data}\n\n"
+
+
+async def _task_events(tasks: TaskManager, task: Task, request_id: Any, after: int, heartbeat: float) -> AsyncIterator[str]:
+    yield _sse(request_id, task.to_json())
+    while True:
+        events = await tasks.next_events(task, after, heartbeat)
+        if not events:
+            if task.done:
+                break
+            yield ": keepalive\n\n"  # lets clients tell a quiet agent from a dead connection
+            continue
+        for event in events:
+            after = event["seq"]
+            yield _sse(request_id, {"kind": "progress", "task_id": task.id, **event}, event_id=after)
+    yield _sse(request_id, {"kind": "status-update", "final": True, "task_id": task.id, "task": task.to_json()})
+
+
+def create_agent_app(
+    card: AgentCard,
+    handlers: Mapping[str, JsonCallable],
+    *,
+    tasks: Optional[TaskManager] = None,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS,
+    batch_concurrency: int = BATCH_CONCURRENCY,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> FastAPI:
     """Instantiate a FastAPI app that exposes the given card and skills.
 
     - `/.well-known/agent-card.json` returns the Agent Card for discovery.
-    - `POST /jsonrpc` implements a minimal JSON-RPC 2.0 endpoint supporting
-      the `message/send` method. Parameters must include a `skill_id` and
-      a `payload` dictionary passed to the registered handler.
+    - `POST /jsonrpc` implements a minimal JSON-RPC 2.0 endpoint:
+      - `message/send` takes a `skill_id` and a `payload` dictionary passed to
+        the registered handler. Each call runs as a task on the event loop;
+        with `"blocking": false` the response is the task (its `id` and
+        `status.state`) as soon as it is submitted, or once it finishes if
+        that takes less than `wait_seconds`; otherwise the handler's result
+        once it finishes.
+      - `tasks/get` returns a task by `id`; `wait_seconds` long-polls until
+        it finishes or the wait runs out.
+      - `tasks/cancel` cancels a task by `id`.
+      - `message/stream` starts a skill like `message/send` and answers with
+        a `text/event-stream`: the task, then one `progress` event per
+        `scripts.progress.emit_progress` call (LLM tokens, files written,
+        tests started/finished...), then a final `status-update` carrying
+        the finished task. `tasks/resubscribe` re-attaches to a task's stream
+        by `id`, replaying events after `after` (the last SSE `id` seen).
+      - A JSON array of requests is a JSON-RPC batch (up to
+        `max_batch_size`): its entries run concurrently, at most
+        `batch_concurrency` at a time, and the array of responses comes back
+        in request order, without entries for notifications (no `id`).
+        Streaming methods cannot be batched.
     - `/health` provides a simple readiness probe.
+
+    The endpoint is async, so a long-running skill never holds a worker
+    thread and one agent process serves many stories at once.
     """
 
     app = FastAPI(title=card.name, version=card.version)
+    app.state.tasks = tasks = tasks or TaskManager()
 
     @app.get("/.well-known/agent-card.json")
     def read_agent_card() -> Dict[str, Any]:
         return card.to_json()
 
     @app.get("/health")
-    def health() -> Dict[str, str]:
-        return {"status": "ok"}
-
-    @app.post("/jsonrpc")
-    def jsonrpc_endpoint(payload: Dict[str, Any]) -> JSONResponse:
-        jsonrpc_version = payload.get("jsonrpc")
-        method = payload.get("method")
-        request_id = payload.get("id")
-        params = payload.get("params", {})
-
-        if jsonrpc_version != "2.0":
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(A2AErrorCode.INVALID_REQUEST, "JSON-RPC 2.0 required"),
-                },
-            )
-
-        if method != "message/send":
-            return JSONResponse(
-                status_code=404,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(A2AErrorCode.METHOD_NOT_FOUND, "Unsupported method"),
-                },
-            )
+    def health() -> Dict[str, Any]:
+        return {"status": "ok", "tasks": tasks.stats()}
 
+    def submit(request_id: Any, params: Dict[str, Any]) -> Task | JSONResponse:
         skill_id = params.get("skill_id")
         if not isinstance(skill_id, str):
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(A2AErrorCode.INVALID_PARAMS, "skill_id must be a string"),
-                },
-            )
+            return _rpc_error(request_id, 400, A2AErrorCode.INVALID_PARAMS, "skill_id must be a string")
 
         handler = handlers.get(skill_id)
         if handler is None:
-            return JSONResponse(
-                status_code=404,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(A2AErrorCode.METHOD_NOT_FOUND, f"Skill '{skill_id}' not found"),
-                },
-            )
+            return _rpc_error(request_id, 404, A2AErrorCode.METHOD_NOT_FOUND, f"Skill '{skill_id}' not found")
 
         payload_data = params.get("payload")
         if not isinstance(payload_data, dict):
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(A2AErrorCode.INVALID_PARAMS, "payload must be an object"),
-                },
+            return _rpc_error(request_id, 400, A2AErrorCode.INVALID_PARAMS, "payload must be an object")
+
+        return tasks.submit(skill_id, handler, payload_data)
+
+    async def message_send(request_id: Any, params: Dict[str, Any]) -> JSONResponse:
+        task = submit(request_id, params)
+        if isinstance(task, JSONResponse):
+            return task
+        if params.get("blocking", True) is False:
+            wait_seconds = params.get("wait_seconds")
+            if isinstance(wait_seconds, (int, float)) and wait_seconds > 0:
+                await tasks.wait(task, float(wait_seconds))
+            return _rpc_result(request_id, task.to_json())
+
+        await tasks.wait(task, None)
+        if task.state == FAILED:
+            return _rpc_error(
+                request_id,
+                500,
+                A2AErrorCode.INTERNAL_ERROR,
+                "Skill execution failed",
+                data={"detail": task.error, "task_id": task.id},
             )
+        if task.state == CANCELED:
+            return _rpc_error(request_id, 500, A2AErrorCode.INTERNAL_ERROR, "Task was canceled", data={"task_id": task.id})
+        return _rpc_result(request_id, task.result)
 
-        try:
-            result = handler(payload_data)
-        except Exception as exc:  # pragma: no cover - defensive
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": error_response(
-                        A2AErrorCode.INTERNAL_ERROR,
-                        "Skill execution failed",
-                        data={"detail": str(exc)},
-                    ),
-                },
+    def lookup(request_id: Any, params: Dict[str, Any]) -> Task | JSONResponse:
+        task_id = params.get("id")
+        if not isinstance(task_id, str):
+            return _rpc_error(request_id, 400, A2AErrorCode.INVALID_PARAMS, "id must be a string")
+        task = tasks.get(task_id)
+        if task is None:
+            return _rpc_error(request_id, 404, A2AErrorCode.TASK_NOT_FOUND, f"Task '{task_id}' not found")
+        return task
+
+    async def tasks_get(request_id: Any, params: Dict[str, Any]) -> JSONResponse:
+        task = lookup(request_id, params)
+        if isinstance(task, JSONResponse):
+            return task
+        wait_seconds = params.get("wait_seconds")
+        if isinstance(wait_seconds, (int, float)) and wait_seconds > 0:
+            await tasks.wait(task, float(wait_seconds))
+        return _rpc_result(request_id, task.to_json())
+
+    async def tasks_cancel(request_id: Any, params: Dict[str, Any]) -> JSONResponse:
+        task = lookup(request_id, params)
+        if isinstance(task, JSONResponse):
+            return task
+        if not tasks.cancel(task):
+            return _rpc_error(
+                request_id,
+                409,
+                A2AErrorCode.TASK_NOT_CANCELABLE,
+                f"Task '{task.id}' already {task.state}",
+                data={"task": task.to_json()},
             )
+        return _rpc_result(request_id, task.to_json())
 
-        return JSONResponse(
-            status_code=200,
-            content={
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": result,
-            },
+    def stream(request_id: Any, task: Task, after: int) -> StreamingResponse:
+        return StreamingResponse(
+            _task_events(tasks, task, request_id, after, heartbeat_seconds),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
+    async def message_stream(request_id: Any, params: Dict[str, Any]) -> StreamingResponse | JSONResponse:
+        task = submit(request_id, params)
+        if isinstance(task, JSONResponse):
+            return task
+        return stream(request_id, task, 0)
+
+    async def tasks_resubscribe(request_id: Any, params: Dict[str, Any]) -> StreamingResponse | JSONResponse:
+        task = lookup(request_id, params)
+        if isinstance(task, JSONResponse):
+            return task
+        after = params.get("after", 0)
+        return stream(request_id, task, after if isinstance(after, int) else 0)
+
+    methods = {
+        "message/send": message_send,
+        "message/stream": message_stream,
+        "tasks/get": tasks_get,
+        "tasks/cancel": tasks_cancel,
+        "tasks/resubscribe": tasks_resubscribe,
+    }
+
+    async def call(payload: Any) -> Response:
+        if not isinstance(payload, dict):
+            return _rpc_error(None, 400, A2AErrorCode.INVALID_REQUEST, "Request must be an object")
+        jsonrpc_version = payload.get("jsonrpc")
+        method = payload.get("method")
+        request_id = payload.get("id")
+        params = payload.get("params", {})
+
+        if jsonrpc_version != "2.0":
+            return _rpc_error(request_id, 400, A2AErrorCode.INVALID_REQUEST, "JSON-RPC 2.0 required")
+
+        dispatch = methods.get(method)
+        if dispatch is None:
+            return _rpc_error(request_id, 404, A2AErrorCode.METHOD_NOT_FOUND, "Unsupported method")
+
+        if not isinstance(params, dict):
+            return _rpc_error(request_id, 400, A2AErrorCode.INVALID_PARAMS, "params must be an object")
+
+        return await dispatch(request_id, params)
+
+    async def call_batch(batch: List[Any]) -> Response:
+        if not batch:
+            return _rpc_error(None, 400, A2AErrorCode.INVALID_REQUEST, "Batch must not be empty")
+        if len(batch) > max_batch_size:
+            return _rpc_error(
+                None, 413, A2AErrorCode.INVALID_REQUEST, f"Batch exceeds {max_batch_size} requests"
+            )
+        limit = asyncio.Semaphore(max(1, batch_concurrency))
+
+        async def entry(payload: Any) -> Response:
+            if isinstance(payload, dict) and payload.get("method") in STREAMING_METHODS:
+                return _rpc_error(
+                    payload.get("id"), 400, A2AErrorCode.INVALID_REQUEST, f"{payload['method']} cannot be batched"
+                )
+            async with limit:
+                return await call(payload)
+
+        responses = await asyncio.gather(*(entry(payload) for payload in batch))
+        replies = [
+            json.loads(response.body)
+            for payload, response in zip(batch, responses)
+            if not isinstance(payload, dict) or "id" in payload
+        ]
+        if not replies:
+            return Response(status_code=204)
+        return JSONResponse(status_code=200, content=replies)
+
+    @app.post("/jsonrpc")
+    async def jsonrpc_endpoint(request: Request) -> Response:
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            return _rpc_error(None, 400, A2AErrorCode.PARSE_ERROR, "Invalid JSON")
+        if isinstance(payload, list):
+            return await call_batch(payload)
+        return await call(payload)
+
     return app
@@ -0,0 +1,191 @@
+"""In-process task registry backing ``message/send``, ``tasks/get`` and ``tasks/cancel``.
+
+Every skill invocation becomes a ``Task`` that runs on the agent's event loop
+independently of the HTTP request that started it. A client can therefore
+get the task id back immediately, poll (or long-poll) for the result, cancel
+it, or simply drop the connection without losing the work.
+
+Async handlers run on the event loop; synchronous handlers run in a worker
+thread. Cancelling a task stops an async handler at its next ``await``; a
+synchronous handler cannot be interrupted, so its result is discarded.
+
+While a handler runs, ``scripts.progress.emit_progress`` events are recorded
+on its task (the most recent ``MAX_EVENTS``, numbered by ``seq``) for
+``message/stream`` subscribers.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime
+import inspect
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from scripts.progress import progress_sink
+
+SUBMITTED = "submitted"
+WORKING = "working"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELED = "canceled"
+TERMINAL_STATES = frozenset({COMPLETED, FAILED, CANCELED})
+MAX_EVENTS = 2000
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+@dataclass
+class Task:
+    id: str
+    skill_id: str
+    state: str = SUBMITTED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+    finished: float = 0.0  # monotonic time the task reached a terminal state
+    runner: Optional[asyncio.Task] = field(default=None, repr=False)
+    loop: Optional[asyncio.AbstractEventLoop] = field(default=None, repr=False)
+    events: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=MAX_EVENTS), repr=False)
+    seq: int = 0
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def set_state(self, state: str) -> None:
+        self.state = state
+        self.updated_at = _now()
+        if state in TERMINAL_STATES:
+            self.finished = time.monotonic()
+        self._notify()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Record a progress event; callable from the handler's worker thread too."""
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop or self.loop is None:
+            self._append(event)
+        else:
+            self.loop.call_soon_threadsafe(self._append, event)
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        self.seq += 1
+        self.events.append({**event, "seq": self.seq, "timestamp": _now()})
+        self._notify()
+
+    def _notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def events_after(self, seq: int) -> List[Dict[str, Any]]:
+        return [event for event in self.events if event["seq"] > seq]
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "kind": "task",
+            "id": self.id,
+            "skill_id": self.skill_id,
+            "status": {"state": self.state, "timestamp": self.updated_at},
+            "created_at": self.created_at,
+        }
+        if self.state == COMPLETED:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class TaskManager:
+    """Runs skill handlers as tasks and keeps finished ones around for a while."""
+
+    def __init__(self, *, retention_seconds: float = 3600.0, max_finished: int = 512) -> None:
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._tasks: "OrderedDict[str, Task]" = OrderedDict()
+
+    def submit(self, skill_id: str, handler: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]) -> Task:
+        self._evict()
+        loop = asyncio.get_running_loop()
+        task = Task(id=str(uuid.uuid4()), skill_id=skill_id, loop=loop)
+        self._tasks[task.id] = task
+        task.runner = loop.create_task(self._run(task, handler, payload))
+        return task
+
+    async def _run(self, task: Task, handler: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]) -> None:
+        task.set_state(WORKING)
+        try:
+            with progress_sink(task.publish):
+                if inspect.iscoroutinefunction(handler):
+                    result = await handler(payload)
+                else:
+                    result = await asyncio.to_thread(handler, payload)
+                    if inspect.isawaitable(result):
+                        result = await result
+        except asyncio.CancelledError:
+            task.set_state(CANCELED)
+            raise
+        except Exception as exc:
+            task.error = str(exc) or type(exc).__name__
+            task.set_state(FAILED)
+            return
+        if task.state == CANCELED:  # a thread-bound handler finished after tasks/cancel
+            return
+        task.result = result
+        task.set_state(COMPLETED)
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    async def wait(self, task: Task, timeout: Optional[float]) -> Task:
+        """Wait up to ``timeout`` seconds for ``task`` to finish (it keeps running either way)."""
+        if not task.done and task.runner is not None:
+            await asyncio.wait({task.runner}, timeout=timeout)
+        return task
+
+    async def next_events(self, task: Task, after: int, timeout: float) -> List[Dict[str, Any]]:
+        """Events newer than ``after``, waiting up to ``timeout`` seconds for some.
+
+        Returns an empty list when nothing happened in time, or when the task
+        has finished and every event was already delivered.
+        """
+        changed = task.changed
+        fresh = task.events_after(after)
+        if fresh or task.done:
+            return fresh
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(changed.wait(), timeout)
+        return task.events_after(after)
+
+    def cancel(self, task: Task) -> bool:
+        """Cancel ``task``; False when it had already finished."""
+        if task.done:
+            return False
+        task.set_state(CANCELED)
+        if task.runner is not None:
+            task.runner.cancel()
+        return True
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.retention_seconds
+        finished = [t for t in self._tasks.values() if t.done]
+        excess = len(finished) - self.max_finished
+        for task in finished:
+            if task.finished < cutoff or excess > 0:
+                del self._tasks[task.id]
+                excess -= 1
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for task in self._tasks.values():
+            counts[task.state] = counts.get(task.state, 0) + 1
+        return counts
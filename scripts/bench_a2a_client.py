@@ -0,0 +1,141 @@
+"""
+Benchmark per-call HTTP clients vs. the pooled A2AClient against a local stand-in agent,
+and one request per task vs. JSON-RPC batches (``send_tasks``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from statistics import mean, median
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import httpx
+import typer
+
+import sys
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from a2a.client import A2AClient
+from a2a.runtime import running_agent
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+
+app = typer.Typer(help="Compare per-call and pooled A2A client latency against a local agent.")
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "calls": len(samples),
+        "mean_s": round(mean(samples), 4),
+        "median_s": round(median(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def _stand_in_agent(latency: float):
+    async def echo(payload: Dict[str, Any]) -> Dict[str, Any]:
+        if latency:
+            await asyncio.sleep(latency)
+        return {"status": "ok", "echo": payload}
+
+    card = AgentCard(
+        name="Stand-in Agent",
+        description="Echoes its payload after a fixed delay.",
+        url="http://127.0.0.1/",
+        version="0",
+        default_input_modes=["application/json"],
+        default_output_modes=["application/json"],
+        capabilities={"streaming": False},
+        skills=[AgentSkill(id="echo", name="echo", description="Echo the payload", input_modes=[], output_modes=[])],
+    )
+    return create_agent_app(card, {"echo": echo})
+
+
+async def _per_call(url: str, payload: Dict[str, Any]) -> None:
+    """What RemoteExecutor used to do: a health check and a blocking send, each on a new client."""
+    async with httpx.AsyncClient(timeout=30) as client:
+        (await client.get(f"{url}/health")).raise_for_status()
+    body = {"jsonrpc": "2.0", "id": str(uuid4()), "method": "message/send", "params": {"skill_id": "echo", "payload": payload}}
+    async with httpx.AsyncClient(timeout=30) as client:
+        (await client.post(f"{url}/jsonrpc", json=body)).raise_for_status()
+
+
+async def _pooled(client: A2AClient, payload: Dict[str, Any]) -> None:
+    if not await client.is_healthy():
+        raise RuntimeError("stand-in agent reported unhealthy")
+    await client.send_task("echo", payload)
+
+
+async def _timed(call, calls: int) -> List[float]:
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        await call({"story_id": f"S{i}"})
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _burst(call, concurrency: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(call({"story_id": f"B{i}"}) for i in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def _run(url: str, calls: int, concurrency: int) -> Dict[str, Any]:
+    per_call = lambda payload: _per_call(url, payload)  # noqa: E731
+    client = A2AClient(url)
+    pooled = lambda payload: _pooled(client, payload)  # noqa: E731
+    await per_call({"story_id": "warmup"})
+    await pooled({"story_id": "warmup"})  # opens the pool and fills the health cache
+
+    results = {
+        "per_call_client": _summary(await _timed(per_call, calls)),
+        "pooled_client": _summary(await _timed(pooled, calls)),
+        "per_call_burst": {"calls": concurrency, "wall_s": round(await _burst(per_call, concurrency), 4)},
+        "pooled_burst": {"calls": concurrency, "wall_s": round(await _burst(pooled, concurrency), 4)},
+    }
+
+    payloads = [{"story_id": f"T{i}"} for i in range(calls)]
+    requests = client.stats["requests"]
+    started = time.perf_counter()
+    await asyncio.gather(*(client.send_task("echo", payload) for payload in payloads))
+    individual = time.perf_counter() - started, client.stats["requests"] - requests
+    requests = client.stats["requests"]
+    started = time.perf_counter()
+    await client.send_tasks("echo", payloads)
+    batched = time.perf_counter() - started, client.stats["requests"] - requests
+    results["send_task_each"] = {"tasks": calls, "wall_s": round(individual[0], 4), "requests": individual[1]}
+    results["send_tasks_batched"] = {"tasks": calls, "wall_s": round(batched[0], 4), "requests": batched[1]}
+    results["pooled_stats"] = dict(client.stats)
+    await client.aclose()
+    return results
+
+
+@app.command()
+def bench(
+    latency: float = typer.Option(0.0, help="Simulated skill time in seconds."),
+    calls: int = typer.Option(50, min=1),
+    concurrency: int = typer.Option(10, min=1, help="Simultaneous calls in the burst round."),
+    report_path: Path = typer.Option(Path("artifacts/benchmarks/a2a_client.json")),
+) -> None:
+    with running_agent(_stand_in_agent(latency)) as url:
+        results = asyncio.run(_run(url, calls, concurrency))
+    results["config"] = {"latency": latency, "calls": calls, "concurrency": concurrency}
+    typer.echo(
+        f"per-call client mean {results['per_call_client']['mean_s']}s | "
+        f"pooled client mean {results['pooled_client']['mean_s']}s | "
+        f"{calls} tasks: {results['send_task_each']['wall_s']}s individually, "
+        f"{results['send_tasks_batched']['wall_s']}s batched"
+    )
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    typer.echo(f"[ok] Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    app()
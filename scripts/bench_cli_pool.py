@@ -0,0 +1,113 @@
+"""
+Benchmark spawn-per-call vs. warm CLI worker pool using an offline fake CLI.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from statistics import mean, median
+from typing import Dict, List
+
+import typer
+
+import sys
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import llm
+from scripts.cli_pool import close_cli_pools
+
+app = typer.Typer(help="Compare spawn-per-call and warm-pool latency for CLI providers.")
+
+FAKE_CLI = ROOT / "scripts" / "fake_llm_cli.py"
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "calls": len(samples),
+        "mean_s": round(mean(samples), 3),
+        "median_s": round(median(samples), 3),
+        "max_s": round(max(samples), 3),
+    }
+
+
+def _client(startup: float, latency: float, *, persistent: bool, workers: int) -> llm.Client:
+    client = llm.Client(role="dev", provider="claude_cli", model="fake")
+    timing = ["--startup", str(startup), "--latency", str(latency)]
+    options = {
+        "type": "claude_cli",
+        "command": [sys.executable, str(FAKE_CLI), "--output-format", "text", *timing],
+        "input_format": "stdin_text",
+        "parse_json": False,
+        "append_system_prompt": False,
+        "extra_args": [],
+        "debug": False,
+        "timeout": 60,
+    }
+    if persistent:
+        options["persistent"] = {
+            "enabled": True,
+            "protocol": "stream_json",
+            "workers": workers,
+            "max_requests_per_worker": 1,
+            "command": [sys.executable, str(FAKE_CLI), "--input-format", "stream-json", *timing],
+        }
+    client._apply_provider_config("claude_cli", options)
+    client.cli_append_model_flag = False
+    return client
+
+
+async def _sequential(client: llm.Client, calls: int, pause: float) -> List[float]:
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        await client._cli_chat_async("system", f"prompt {i}")
+        samples.append(time.perf_counter() - started)
+        # Real callers do other work (parsing, writing files, QA) between prompts.
+        await asyncio.sleep(pause)
+    return samples
+
+
+async def _run(startup: float, latency: float, calls: int, workers: int, pause: float) -> Dict[str, Dict[str, float]]:
+    cold = await _sequential(_client(startup, latency, persistent=False, workers=workers), calls, pause)
+    warm_client = _client(startup, latency, persistent=True, workers=workers)
+    await _sequential(warm_client, 1, pause)  # creates the pool; excluded from the warm numbers
+    warm = await _sequential(warm_client, calls, pause)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(warm_client._cli_chat_async("system", f"burst {i}") for i in range(workers)))
+    burst = time.perf_counter() - started
+    await close_cli_pools()
+    return {
+        "spawn_per_call": _summary(cold),
+        "warm_pool": _summary(warm),
+        "warm_burst": {"calls": workers, "wall_s": round(burst, 3)},
+    }
+
+
+@app.command()
+def bench(
+    startup: float = typer.Option(1.0, help="Simulated CLI boot time in seconds."),
+    latency: float = typer.Option(0.2, help="Simulated model time per prompt."),
+    calls: int = typer.Option(5, min=1),
+    workers: int = typer.Option(2, min=1),
+    pause: float = typer.Option(1.5, help="Idle time between prompts (lets replacements warm up)."),
+    report_path: Path = typer.Option(Path("artifacts/benchmarks/cli_pool.json")),
+) -> None:
+    results = asyncio.run(_run(startup, latency, calls, workers, pause))
+    results["config"] = {"startup": startup, "latency": latency, "calls": calls, "workers": workers, "pause": pause}
+    typer.echo(
+        f"spawn-per-call mean {results['spawn_per_call']['mean_s']}s | "
+        f"warm pool mean {results['warm_pool']['mean_s']}s"
+    )
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    typer.echo(f"[ok] Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    app()
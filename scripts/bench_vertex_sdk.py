@@ -0,0 +1,92 @@
+"""
+Benchmark vertex_sdk call latency with a cold genai.Client per call vs. the shared cached client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from statistics import mean, median
+from typing import Dict, List
+
+import typer
+
+import sys
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.providers import vertex_sdk
+
+app = typer.Typer(help="Compare cold vs. warm vertex_sdk call latency.")
+
+PROMPT = [{"role": "user", "content": [{"type": "text", "text": "Reply with the single word: pong"}]}]
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "calls": len(samples),
+        "mean_s": round(mean(samples), 3),
+        "median_s": round(median(samples), 3),
+        "min_s": round(min(samples), 3),
+        "max_s": round(max(samples), 3),
+    }
+
+
+async def _timed(kwargs: Dict, *, cold: bool) -> float:
+    if cold:
+        vertex_sdk.clear_clients()
+    started = time.perf_counter()
+    await vertex_sdk.achat(PROMPT, **kwargs)
+    return time.perf_counter() - started
+
+
+async def _run(kwargs: Dict, calls: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    cold = [await _timed(kwargs, cold=True) for _ in range(calls)]
+    vertex_sdk.clear_clients()
+    await _timed(kwargs, cold=False)  # prime the shared client
+    warm = [await _timed(kwargs, cold=False) for _ in range(calls)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(vertex_sdk.achat(PROMPT, **kwargs) for _ in range(concurrency)))
+    concurrent_wall = time.perf_counter() - started
+    return {
+        "cold": _summary(cold),
+        "warm": _summary(warm),
+        "warm_concurrent": {"calls": concurrency, "wall_s": round(concurrent_wall, 3)},
+    }
+
+
+@app.command()
+def bench(
+    project_id: str = typer.Option(None, envvar="GCP_PROJECT"),
+    location: str = typer.Option("us-central1", envvar="VERTEX_LOCATION"),
+    model: str = typer.Option("gemini-2.5-flash", envvar="VERTEX_MODEL"),
+    auth: str = typer.Option("adc", help="adc or gcloud (shared token cache)."),
+    calls: int = typer.Option(5, min=1, help="Sequential calls per mode."),
+    concurrency: int = typer.Option(8, min=1, help="Parallel warm calls on the shared client."),
+    report_path: Path = typer.Option(Path("artifacts/benchmarks/vertex_sdk_client_reuse.json")),
+) -> None:
+    kwargs = {
+        "model": model,
+        "project_id": project_id,
+        "location": location,
+        "auth": auth,
+        "temperature": 0.0,
+        "max_output_tokens": 8,
+    }
+    results = asyncio.run(_run(kwargs, calls, concurrency))
+    results["config"] = kwargs
+    saved = results["cold"]["mean_s"] - results["warm"]["mean_s"]
+    typer.echo(f"cold mean {results['cold']['mean_s']}s | warm mean {results['warm']['mean_s']}s | saved {saved:.3f}s/call")
+    typer.echo(f"{concurrency} concurrent warm calls: {results['warm_concurrent']['wall_s']}s wall")
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    typer.echo(f"[ok] Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,294 @@
+"""Warm worker pool for the codex_cli / claude_cli providers.
+
+Spawning ``codex exec`` or ``claude -p`` per prompt pays Node startup, auth
+and config loading every time. A pool keeps long-running CLI sessions that
+speak a line-delimited JSON protocol and hands prompts to idle workers:
+
+* ``stream_json`` — ``claude -p --input-format stream-json --output-format stream-json``:
+  one ``{"type": "user", ...}`` line in, events out until ``{"type": "result"}``.
+* ``codex_proto`` — ``codex proto``: ``{"id", "op": {"type": "user_input"}}`` in,
+  events out until ``task_complete`` for that id.
+
+Both CLIs keep conversation state inside a session, so a worker is retired
+after ``max_requests_per_worker`` prompts (1 by default: every prompt gets a
+fresh session, but it was started ahead of time). Replacements are spawned in
+the background so startup stays off the request path.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+
+from logger import logger
+
+STREAM_LIMIT = 16 * 1024 * 1024  # result events can carry whole files
+PROTOCOLS = ("stream_json", "codex_proto")
+
+
+class CLIWorkerError(RuntimeError):
+    """The worker died or broke protocol; callers may fall back to spawn-per-call."""
+
+
+class CLITimeoutError(CLIWorkerError):
+    pass
+
+
+class CLIWorker:
+    _ids = itertools.count(1)
+
+    def __init__(self, argv: List[str], protocol: str, cwd: str, env: Mapping[str, str]) -> None:
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown CLI pool protocol: {protocol}")
+        self.argv = argv
+        self.protocol = protocol
+        self.cwd = cwd
+        self.env = dict(env)
+        self.served = 0
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_tail: Deque[str] = deque(maxlen=20)
+        self._stderr_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *self.argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            limit=STREAM_LIMIT,
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+    async def _drain_stderr(self) -> None:
+        assert self.process is not None and self.process.stderr is not None
+        while True:
+            line = await self.process.stderr.readline()
+            if not line:
+                return
+            self._stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
+
+    async def ask(self, prompt: str, timeout: float) -> str:
+        if not self.alive:
+            raise CLIWorkerError("worker is not running")
+        request_id = str(next(self._ids))
+        if self.protocol == "stream_json":
+            message = {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": prompt}]}}
+        else:
+            message = {"id": request_id, "op": {"type": "user_input", "items": [{"type": "text", "text": prompt}]}}
+        assert self.process is not None and self.process.stdin is not None
+        try:
+            self.process.stdin.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as exc:
+            raise CLIWorkerError(f"worker stdin closed: {exc}") from exc
+        try:
+            result = await asyncio.wait_for(self._read_result(request_id), timeout=timeout)
+        except asyncio.TimeoutError as exc:
+            raise CLITimeoutError(f"no result within {timeout}s") from exc
+        self.served += 1
+        return result
+
+    async def _read_result(self, request_id: str) -> str:
+        assert self.process is not None and self.process.stdout is not None
+        last_message = ""
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                stderr = " | ".join(self._stderr_tail)
+                raise CLIWorkerError(f"worker exited (code {self.process.returncode}); stderr: {stderr[-500:]}")
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # banners / log lines
+            if not isinstance(event, dict):
+                continue
+            if self.protocol == "stream_json":
+                if event.get("type") == "result":
+                    if event.get("is_error"):
+                        raise CLIWorkerError(str(event.get("result") or event.get("error") or "CLI reported an error"))
+                    return str(event.get("result") or "")
+                continue
+            if event.get("id") != request_id:
+                continue
+            msg = event.get("msg") or {}
+            kind = msg.get("type")
+            if kind == "agent_message":
+                last_message = msg.get("message") or last_message
+            elif kind == "error":
+                raise CLIWorkerError(str(msg.get("message") or "codex reported an error"))
+            elif kind == "task_complete":
+                return str(msg.get("last_agent_message") or last_message)
+
+    async def close(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            if self.process.stdin is not None:
+                self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+
+
+class CLIWorkerPool:
+    """Up to ``size`` warm workers for one (argv, cwd, protocol) combination."""
+
+    def __init__(
+        self,
+        argv: List[str],
+        *,
+        protocol: str = "stream_json",
+        size: int = 2,
+        max_requests_per_worker: int = 1,
+        cwd: str = ".",
+        env: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.argv = list(argv)
+        self.protocol = protocol
+        self.size = max(1, int(size))
+        self.max_requests_per_worker = max(1, int(max_requests_per_worker))
+        self.cwd = cwd
+        self.env = dict(env if env is not None else os.environ)
+        # ``None`` in the queue signals a failed spawn so a waiting caller can fall back.
+        self._idle: asyncio.Queue[Optional[CLIWorker]] = asyncio.Queue()
+        self._workers: set[CLIWorker] = set()
+        self._spawning: set[asyncio.Task] = set()
+        self._retiring: set[asyncio.Task] = set()
+        self._closed = False
+        self.stats: Dict[str, Any] = {"requests": 0, "spawned": 0, "retired": 0, "failures": 0, "wait_seconds": 0.0}
+
+    def _spawn_in_background(self) -> None:
+        if self._closed or len(self._workers) + len(self._spawning) >= self.size:
+            return
+        task = asyncio.create_task(self._spawn())
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    async def _spawn(self) -> None:
+        worker = CLIWorker(self.argv, self.protocol, self.cwd, self.env)
+        try:
+            await worker.start()
+        except Exception as exc:
+            self.stats["failures"] += 1
+            logger.warning(f"[CLI_POOL] Failed to start {self.argv[0]}: {exc}")
+            await self._idle.put(None)
+            return
+        self.stats["spawned"] += 1
+        if self._closed:
+            await worker.close()
+            return
+        self._workers.add(worker)
+        await self._idle.put(worker)
+
+    def warm(self) -> None:
+        """Start workers up to ``size`` without waiting for them."""
+        for _ in range(self.size):
+            self._spawn_in_background()
+
+    async def _checkout(self) -> CLIWorker:
+        while True:
+            if self._idle.empty():
+                self._spawn_in_background()
+                if not self._spawning and not self._workers:
+                    raise CLIWorkerError(f"no {self.argv[0]} workers could be started")
+            worker = await self._idle.get()
+            if worker is None:
+                raise CLIWorkerError(f"{self.argv[0]} worker failed to start")
+            if worker.alive:
+                return worker
+            await self._retire(worker)
+
+    async def _retire(self, worker: CLIWorker) -> None:
+        self._workers.discard(worker)
+        self.stats["retired"] += 1
+        self._spawn_in_background()
+        await worker.close()
+
+    async def request(self, prompt: str, timeout: float) -> str:
+        if self._closed:
+            raise CLIWorkerError("pool is closed")
+        started = time.perf_counter()
+        worker = await self._checkout()
+        self.stats["wait_seconds"] += time.perf_counter() - started
+        self.stats["requests"] += 1
+        healthy = False
+        try:
+            result = await worker.ask(prompt, timeout)
+            healthy = True
+            return result
+        except CLIWorkerError:
+            self.stats["failures"] += 1
+            raise
+        finally:
+            if healthy and worker.alive and worker.served < self.max_requests_per_worker:
+                self._idle.put_nowait(worker)
+            else:
+                # Retire off the request path; the replacement warms up in the background.
+                task = asyncio.create_task(self._retire(worker))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+
+    async def close(self) -> None:
+        self._closed = True
+        # Let in-progress spawns/retirements finish so no process is orphaned mid-start.
+        pending = list(self._spawning) + list(self._retiring)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        workers = list(self._workers)
+        self._workers.clear()
+        await asyncio.gather(*(worker.close() for worker in workers), return_exceptions=True)
+
+
+_POOLS: Dict[Tuple[Any, ...], Tuple[asyncio.AbstractEventLoop, CLIWorkerPool]] = {}
+
+
+def get_cli_pool(
+    argv: List[str],
+    *,
+    protocol: str,
+    size: int,
+    max_requests_per_worker: int,
+    cwd: str,
+    env: Mapping[str, str],
+) -> CLIWorkerPool:
+    """Shared pool for this event loop (subprocess pipes cannot cross loops)."""
+    loop = asyncio.get_running_loop()
+    key = (tuple(argv), protocol, cwd)
+    entry = _POOLS.get(key)
+    if entry is None or entry[0] is not loop or entry[0].is_closed() or entry[1]._closed:
+        pool = CLIWorkerPool(
+            argv,
+            protocol=protocol,
+            size=size,
+            max_requests_per_worker=max_requests_per_worker,
+            cwd=cwd,
+            env=env,
+        )
+        pool.warm()
+        _POOLS[key] = (loop, pool)
+        return pool
+    return entry[1]
+
+
+async def close_cli_pools() -> None:
+    loop = asyncio.get_running_loop()
+    for key, (owner, pool) in list(_POOLS.items()):
+        if owner is loop:
+            await pool.close()
+        _POOLS.pop(key, None)
+
+
+def cli_pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {" ".join(key[0]): dict(pool.stats) for key, (_, pool) in _POOLS.items()}
@@ -1,15 +1,47 @@
 from __future__ import annotations
-import os, yaml, time, pathlib, shutil
-from typing import Dict, Any
+import copy, os, yaml, time, pathlib, shutil, threading
+from typing import Dict, Any, Optional, Tuple
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 ART = ROOT / "artifacts"
 PLANNING = ROOT / "planning"
 PROJECT = ROOT / "project"
 DEFAULTS = ROOT / "project-defaults"
+CONFIG_PATH = ROOT / "config.yaml"
 
-def load_config() -> Dict[str, Any]:
-    return yaml.safe_load((ROOT / "config.yaml").read_text(encoding="utf-8"))
+# path -> (stamp, parsed data). An orchestrator run asks for the config hundreds
+# of times; it is re-parsed only when the file's mtime/size changes.
+_CONFIG_CACHE: Dict[pathlib.Path, Tuple[Tuple[int, int], Any]] = {}
+_CONFIG_LOCK = threading.Lock()
+
+def config_stamp(path: Optional[pathlib.Path] = None) -> Optional[Tuple[int, int]]:
+    """``(mtime_ns, size)`` of the config file, or None when it does not exist."""
+    try:
+        st = (path or CONFIG_PATH).stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def load_config(path: Optional[pathlib.Path] = None) -> Dict[str, Any]:
+    """Parsed config.yaml, cached until the file changes on disk.
+
+    Returns a deep copy so callers can mutate the result without affecting
+    each other. Raises FileNotFoundError when the file is missing.
+    """
+    path = path or CONFIG_PATH
+    stamp = config_stamp(path)
+    if stamp is None:
+        raise FileNotFoundError(str(path))
+    with _CONFIG_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, yaml.safe_load(path.read_text(encoding="utf-8")))
+            _CONFIG_CACHE[path] = cached
+    return copy.deepcopy(cached[1])
+
+def clear_config_cache() -> None:
+    with _CONFIG_LOCK:
+        _CONFIG_CACHE.clear()
 
 def load_a2a_config() -> Dict[str, Any]:
     """Return sanitized A2A configuration with defaults."""
@@ -6,27 +6,21 @@ import os
 from pathlib import Path
 from typing import Any, Dict
 
-import yaml
 import dspy
 
+from scripts.common import load_config
+
 
 ROOT = Path(__file__).resolve().parents[1]
-_CONFIG_CACHE: Dict[str, Any] | None = None
 
 
 def _load_config() -> Dict[str, Any]:
-    global _CONFIG_CACHE
-    if _CONFIG_CACHE is not None:
-        return _CONFIG_CACHE
-    config_path = ROOT / "config.yaml"
+    # Shared mtime-aware cache: edits to config.yaml are picked up mid-run.
     try:
-        data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
-        if not isinstance(data, dict):
-            data = {}
+        data = load_config(ROOT / "config.yaml") or {}
     except FileNotFoundError:
-        data = {}
-    _CONFIG_CACHE = data
-    return data
+        return {}
+    return data if isinstance(data, dict) else {}
 
 
 def _coerce_float(value: str) -> float | None:
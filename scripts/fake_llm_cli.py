@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the codex / claude CLIs (used by bench_cli_pool.py and tests).
+
+Modes:
+  fake_llm_cli.py [--startup S] [--latency S] [--output-format text] one prompt on stdin, result on stdout
+  fake_llm_cli.py --input-format stream-json [--startup S] ...      persistent claude-style stream-json session
+  fake_llm_cli.py proto [--startup S] ...                           persistent codex-proto session
+
+Replies are ``echo:<prompt>``; the prompt ``__crash__`` makes the process exit.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+
+
+def _reply(prompt: str, latency: float) -> str:
+    if prompt.strip() == "__crash__":
+        sys.exit(3)
+    time.sleep(latency)
+    return f"echo:{prompt}"
+
+
+def _emit(event: dict) -> None:
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", nargs="?", default="exec")
+    parser.add_argument("--startup", type=float, default=0.0, help="Simulated boot time (Node, auth, config).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated model time per prompt.")
+    parser.add_argument("--input-format", default="text")
+    parser.add_argument("--output-format", default="json")
+    parser.add_argument("--model", default="fake")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("-p", "--print", action="store_true", dest="print_mode")
+    args, _ = parser.parse_known_args()
+
+    time.sleep(args.startup)
+
+    if args.mode == "proto":
+        _emit({"id": "", "msg": {"type": "session_configured", "model": args.model}})
+        for line in sys.stdin:
+            request = json.loads(line)
+            text = request["op"]["items"][0]["text"]
+            answer = _reply(text, args.latency)
+            _emit({"id": request["id"], "msg": {"type": "agent_message", "message": answer}})
+            _emit({"id": request["id"], "msg": {"type": "task_complete", "last_agent_message": answer}})
+        return
+
+    if args.input_format == "stream-json":
+        _emit({"type": "system", "subtype": "init", "model": args.model})
+        for line in sys.stdin:
+            request = json.loads(line)
+            text = request["message"]["content"][0]["text"]
+            answer = _reply(text, args.latency)
+            _emit({"type": "assistant", "message": {"content": [{"type": "text", "text": answer}]}})
+            _emit({"type": "result", "subtype": "success", "is_error": False, "result": answer})
+        return
+
+    answer = _reply(sys.stdin.read(), args.latency)
+    if args.output_format == "text":
+        sys.stdout.write(answer)
+    else:
+        _emit({"type": "result", "is_error": False, "result": answer})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Impacted-test selection for QA.
+
+Maps the files a story changed to the test modules that (transitively) import
+them, so QA can run those first instead of the whole suite:
+
+* backend (``project/backend-fastapi``): ``import`` / ``from ... import``
+  statements parsed with ``ast``, resolved against the project root (the
+  directory pytest runs from) and relative to the importing package;
+* web (``project/web-express``): ``require()``, ``import ... from``,
+  ``export ... from`` and dynamic ``import()`` with relative specifiers,
+  resolved the way Node does (extension and ``index`` probing).
+
+Anything the graph cannot reason about selects the full suite (``None``):
+conftest/jest setup and package manifests, non-code files, or a change no
+test reaches.
+"""
+from __future__ import annotations
+
+import ast
+import os
+import pathlib
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from logger import logger
+
+SKIP_DIRS = frozenset({"node_modules", ".venv", "venv", "__pycache__", ".pytest_cache", ".git", "dist", "build", "coverage"})
+PY_GLOBAL_FILES = frozenset({"conftest.py", "pytest.ini", "setup.cfg", "pyproject.toml", "requirements.txt", "tox.ini"})
+JS_EXTENSIONS = (".js", ".ts", ".mjs", ".cjs", ".jsx", ".tsx")
+JS_GLOBAL_FILES = frozenset({"package.json", "package-lock.json", "jest.config.js", "jest.config.ts", "babel.config.js", "tsconfig.json", ".babelrc"})
+# Import prefixes that fix_backend_test_imports rewrites to the local ``app`` package.
+PY_PREFIX_ALIASES = (("project.backend-fastapi.", ""), ("backend_fastapi.", ""))
+
+_JS_IMPORT_RE = re.compile(
+    r"""(?:require\s*\(\s*|import\s*\(\s*|\bfrom\s+|^\s*import\s+)(['"])([^'"\n]+)\1""",
+    re.MULTILINE,
+)
+
+
+@dataclass
+class Selection:
+    """``tests`` are paths relative to the suite root; ``None`` means run everything."""
+
+    tests: Optional[List[str]]
+    reason: str
+
+    @property
+    def full(self) -> bool:
+        return self.tests is None
+
+
+def _source_files(root: pathlib.Path, suffixes: Sequence[str]) -> List[pathlib.Path]:
+    files: List[pathlib.Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        files.extend(pathlib.Path(dirpath, name) for name in filenames if name.endswith(tuple(suffixes)))
+    return files
+
+
+def _reverse_closure(graph: Dict[str, Set[str]], changed: Iterable[str]) -> Set[str]:
+    """Every file that reaches a changed file through the import graph (the changed files included)."""
+    importers: Dict[str, Set[str]] = {}
+    for module, deps in graph.items():
+        for dep in deps:
+            importers.setdefault(dep, set()).add(module)
+    seen = set(changed)
+    stack = list(seen)
+    while stack:
+        for importer in importers.get(stack.pop(), ()):
+            if importer not in seen:
+                seen.add(importer)
+                stack.append(importer)
+    return seen
+
+
+def import_closure(graph: Dict[str, Set[str]], start: str) -> Set[str]:
+    """``start`` plus every project file it imports, directly or transitively."""
+    seen = {start}
+    stack = [start]
+    while stack:
+        for dep in graph.get(stack.pop(), ()):
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    return seen
+
+
+def _select(graph: Dict[str, Set[str]], tests: Set[str], changed: Set[str], label: str) -> Selection:
+    impacted = sorted(_reverse_closure(graph, changed) & tests)
+    if not impacted:
+        return Selection(None, f"no {label} test reaches the changed files")
+    return Selection(impacted, f"{len(impacted)} of {len(tests)} {label} test files import the changed files")
+
+
+# --- Python ---------------------------------------------------------------------------------
+
+def _py_module_file(root: pathlib.Path, module: str) -> Optional[str]:
+    for old, new in PY_PREFIX_ALIASES:
+        if module.startswith(old):
+            module = new + module[len(old):]
+    parts = [p for p in module.split(".") if p]
+    if not parts:
+        return None
+    base = root.joinpath(*parts)
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.is_file():
+            return candidate.relative_to(root).as_posix()
+    return None
+
+
+def python_import_graph(root: pathlib.Path) -> Dict[str, Set[str]]:
+    """``{file: {imported project files}}`` for every ``.py`` file under ``root``."""
+    graph: Dict[str, Set[str]] = {}
+    for path in _source_files(root, (".py",)):
+        rel = path.relative_to(root).as_posix()
+        deps: Set[str] = set()
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        except (SyntaxError, UnicodeDecodeError, OSError) as exc:
+            logger.debug(f"[QA] Import graph: cannot parse {rel}: {exc}")
+            graph[rel] = deps
+            continue
+        package = list(pathlib.PurePosixPath(rel).parent.parts)
+        for node in ast.walk(tree):
+            names: List[str] = []
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    anchor = package[: len(package) - (node.level - 1)] if node.level > 1 else package
+                    base = ".".join([*anchor, node.module] if node.module else anchor)
+                else:
+                    base = node.module or ""
+                # ``from pkg import name`` may import a submodule or just an attribute of pkg.
+                names = [base] + [f"{base}.{alias.name}" if base else alias.name for alias in node.names]
+            for name in names:
+                target = _py_module_file(root, name)
+                if target and target != rel:
+                    deps.add(target)
+                # Importing pkg.sub executes pkg/__init__.py too.
+                while "." in name:
+                    name = name.rsplit(".", 1)[0]
+                    init = _py_module_file(root, name)
+                    if init and init.endswith("__init__.py") and init != rel:
+                        deps.add(init)
+        graph[rel] = deps
+    return graph
+
+
+def is_python_test(rel: str) -> bool:
+    name = pathlib.PurePosixPath(rel).name
+    return name.startswith("test_") and name.endswith(".py") or name.endswith("_test.py")
+
+
+def select_python_tests(root: pathlib.Path, changed: Iterable[str]) -> Selection:
+    """Select backend test files for ``changed`` paths (relative to ``root``)."""
+    changed = set(changed)
+    for rel in changed:
+        if pathlib.PurePosixPath(rel).name in PY_GLOBAL_FILES:
+            return Selection(None, f"{rel} affects every test")
+        if not rel.endswith(".py"):
+            return Selection(None, f"{rel} is not Python source")
+    graph = python_import_graph(root)
+    tests = {rel for rel in graph if is_python_test(rel)}
+    return _select(graph, tests, changed, "backend")
+
+
+# --- JavaScript -----------------------------------------------------------------------------
+
+def _js_resolve(root: pathlib.Path, importer: pathlib.Path, spec: str) -> Optional[str]:
+    if not spec.startswith("."):
+        return None  # package import
+    base = (importer.parent / spec).resolve()
+    candidates = [base] + [base.with_name(base.name + ext) for ext in JS_EXTENSIONS + (".json",)]
+    candidates += [base / f"index{ext}" for ext in JS_EXTENSIONS]
+    for candidate in candidates:
+        if candidate.is_file():
+            try:
+                return candidate.relative_to(root.resolve()).as_posix()
+            except ValueError:
+                return None
+    return None
+
+
+def js_import_graph(root: pathlib.Path) -> Dict[str, Set[str]]:
+    """``{file: {required project files}}`` for every JS/TS file under ``root``."""
+    graph: Dict[str, Set[str]] = {}
+    for path in _source_files(root, JS_EXTENSIONS):
+        rel = path.relative_to(root).as_posix()
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            graph[rel] = set()
+            continue
+        deps = {_js_resolve(root, path, match.group(2)) for match in _JS_IMPORT_RE.finditer(text)}
+        graph[rel] = {dep for dep in deps if dep and dep != rel}
+    return graph
+
+
+def is_js_test(rel: str) -> bool:
+    name = pathlib.PurePosixPath(rel).name
+    return any(name.endswith(f".{kind}{ext}") for kind in ("test", "spec") for ext in JS_EXTENSIONS)
+
+
+def select_js_tests(root: pathlib.Path, changed: Iterable[str]) -> Selection:
+    """Select web test files for ``changed`` paths (relative to ``root``)."""
+    changed = set(changed)
+    for rel in changed:
+        name = pathlib.PurePosixPath(rel).name
+        if name in JS_GLOBAL_FILES or name.startswith("jest."):
+            return Selection(None, f"{rel} affects every test")
+        if not name.endswith(JS_EXTENSIONS + (".json",)):
+            return Selection(None, f"{rel} is not JavaScript source")
+    graph = js_import_graph(root)
+    tests = {rel for rel in graph if is_js_test(rel)}
+    return _select(graph, tests, changed, "web")
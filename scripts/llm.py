@@ -5,13 +5,16 @@ import sys
 import json
 import pathlib
 import asyncio
+import contextlib
+import copy
+import socket
 import subprocess
+import threading
 import time
 import re
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
-import yaml
 
 from logger import logger # Import the logger
 
@@ -25,6 +28,22 @@ if SRC_DIR.exists():
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from scripts.common import config_stamp, load_config as _load_cached_config
+from scripts.cli_pool import CLITimeoutError, CLIWorkerError, cli_pool_stats, close_cli_pools, get_cli_pool
+from scripts.llm_cache import DEFAULT_CACHE_DIR, ResponseCache, make_cache_key
+from scripts.llm_limits import RateLimiter, estimate_tokens, limited, limiter_stats, resolve_limiters
+from scripts.llm_hedge import LATENCIES, hedge_delay, hedge_settings
+from scripts.progress import emit_progress
+from scripts.llm_retry import (
+    RetryPolicy,
+    TruncatedOutputError,
+    classify_error,
+    finish_reason_scope,
+    output_problem,
+    record_finish_reason,
+    retry_after_seconds,
+)
+
 try:
     from recommend.model_recommender import is_enabled as _reco_enabled, recommend_model
 except Exception as exc:  # pragma: no cover - recommender optional
@@ -33,13 +52,36 @@ except Exception as exc:  # pragma: no cover - recommender optional
     _reco_enabled = lambda: False  # type: ignore[assignment]
 
 PROVIDER_REGISTRY: dict[str, Any] = {}
+PROVIDER_STREAM_REGISTRY: dict[str, Any] = {}
+PROVIDER_ASYNC_REGISTRY: dict[str, Any] = {}
 _providers_import_err: Exception | None = None
 
+
+async def close_provider_clients() -> None:  # replaced when providers import succeeds
+    return None
+
+
+def provider_stats() -> Dict[str, Any]:  # replaced when providers import succeeds
+    return {}
+
+
 try:
-    from .providers import PROVIDER_REGISTRY  # type: ignore
+    from .providers import (  # type: ignore
+        PROVIDER_ASYNC_REGISTRY,
+        PROVIDER_REGISTRY,
+        PROVIDER_STREAM_REGISTRY,
+        close_provider_clients,
+        provider_stats,
+    )
 except Exception as exc_relative:  # pragma: no cover - providers optional
     try:
-        from scripts.providers import PROVIDER_REGISTRY  # type: ignore
+        from scripts.providers import (  # type: ignore
+            PROVIDER_ASYNC_REGISTRY,
+            PROVIDER_REGISTRY,
+            PROVIDER_STREAM_REGISTRY,
+            close_provider_clients,
+            provider_stats,
+        )
     except Exception as exc_absolute:
         _providers_import_err = exc_absolute
         logger.warning(f"[LLM] Providers import failed: {exc_absolute}")
@@ -53,7 +95,7 @@ CONFIG_P = ROOT / "config.yaml"
 def load_config() -> Dict[str, Any]:
     if CONFIG_P.exists():
         try:
-            data = yaml.safe_load(CONFIG_P.read_text(encoding="utf-8")) or {}
+            data = _load_cached_config(CONFIG_P) or {}
             if not isinstance(data, dict):
                 logger.warning("[LLM] config.yaml is not a dictionary. Returning empty config.")
                 return {}
@@ -65,6 +107,124 @@ def load_config() -> Dict[str, Any]:
     return {}
 
 
+# --- Shared HTTP connection pools ---
+# One AsyncClient per base URL so keep-alive connections survive across calls.
+# AsyncClients are bound to the event loop that created them, so each entry
+# remembers its loop and is rebuilt when a new loop (e.g. a later asyncio.run)
+# asks for the same base URL.
+DEFAULT_HTTP_TIMEOUT = 300.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+_HTTP_CLIENTS: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _http_pool_settings(options: Optional[Dict[str, Any]]) -> tuple[httpx.Limits, float]:
+    opts = options if isinstance(options, dict) else {}
+    limits = httpx.Limits(
+        max_connections=int(opts.get("max_connections", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(
+            opts.get("max_keepalive_connections", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+        ),
+        keepalive_expiry=float(opts.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY)),
+    )
+    timeout = float(opts.get("http_timeout", DEFAULT_HTTP_TIMEOUT))
+    return limits, timeout
+
+
+def get_http_client(base_url: str, options: Optional[Dict[str, Any]] = None) -> httpx.AsyncClient:
+    """Return the pooled AsyncClient for ``base_url`` on the running event loop.
+
+    ``options`` is the ``providers.<name>`` block from config.yaml; it may set
+    ``max_connections``, ``max_keepalive_connections``, ``keepalive_expiry`` and
+    ``http_timeout``. Options only apply when the client is first created.
+    """
+    key = base_url.rstrip("/")
+    loop = asyncio.get_running_loop()
+    entry = _HTTP_CLIENTS.get(key)
+    if entry is not None:
+        owner_loop, client = entry
+        if owner_loop is loop and not client.is_closed:
+            return client
+        _discard_http_client(key, owner_loop, client)
+
+    limits, timeout = _http_pool_settings(options)
+    client = httpx.AsyncClient(timeout=timeout, limits=limits)
+    _HTTP_CLIENTS[key] = (loop, client)
+    logger.debug(
+        f"[LLM] Created pooled HTTP client for {key}: max_connections={limits.max_connections}, "
+        f"keepalive_expiry={limits.keepalive_expiry}s, timeout={timeout}s"
+    )
+    return client
+
+
+def _discard_http_client(key: str, owner_loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    """Release a pooled client that the running loop cannot use.
+
+    While its own loop still runs (another thread) the client is closed there.
+    ``aclose`` cannot run on a loop that has exited, so in that case the pooled
+    connections are shut down directly and the sockets go with the client.
+    """
+    if client.is_closed:
+        logger.debug(f"[LLM] Discarding pooled HTTP client for {key} (client closed)")
+        return
+    if owner_loop.is_running() and not owner_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), owner_loop)
+    else:
+        pool = getattr(client._transport, "_pool", None)
+        for connection in list(getattr(pool, "connections", [])):
+            stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # already disconnected
+    logger.debug(f"[LLM] Discarding pooled HTTP client for {key} (event loop changed)")
+
+
+async def close_http_clients() -> None:
+    """Close every pooled HTTP client (call once before the event loop exits)."""
+    loop = asyncio.get_running_loop()
+    for key, (owner_loop, client) in list(_HTTP_CLIENTS.items()):
+        _HTTP_CLIENTS.pop(key, None)
+        if owner_loop is loop and not client.is_closed:
+            await client.aclose()
+            logger.debug(f"[LLM] Closed pooled HTTP client for {key}")
+    await close_provider_clients()
+
+
+# --- Response cache ---
+_RESPONSE_CACHES: dict[str, ResponseCache] = {}
+_CACHE_DISABLED_VALUES = {"0", "false", "no", "off"}
+
+
+def get_response_cache(settings: Optional[Dict[str, Any]] = None) -> ResponseCache:
+    """Return the process-wide ResponseCache for the ``llm_cache`` config block."""
+    opts = settings if isinstance(settings, dict) else {}
+    directory = pathlib.Path(opts.get("dir") or DEFAULT_CACHE_DIR)
+    if not directory.is_absolute():
+        directory = ROOT / directory
+    key = str(directory)
+    cache = _RESPONSE_CACHES.get(key)
+    if cache is None:
+        kwargs: Dict[str, Any] = {}
+        if opts.get("ttl_seconds") is not None:
+            kwargs["ttl_seconds"] = float(opts["ttl_seconds"])
+        if opts.get("max_entries") is not None:
+            kwargs["max_entries"] = int(opts["max_entries"])
+        cache = ResponseCache(directory, **kwargs)
+        _RESPONSE_CACHES[key] = cache
+    return cache
+
+
+def response_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for every cache used in this process, keyed by directory."""
+    return {key: cache.stats() for key, cache in _RESPONSE_CACHES.items()}
+
+
 def _default_role() -> str:
     role = os.environ.get("ROLE", "").strip().lower()
     if role:
@@ -133,11 +293,80 @@ class Client:
         providers = cfg.get("providers", {}) if isinstance(cfg.get("providers", {}), dict) else {}
         provider_key = role_cfg.get("provider") or "ollama"
         provider_cfg = providers.get(provider_key, {"type": "ollama", "base_url": "http://localhost:11434"})
+        cache_cfg = cfg.get("llm_cache", {})
+        self.cache_settings: Dict[str, Any] = cache_cfg if isinstance(cache_cfg, dict) else {}
+        # None means "auto": cache only deterministic (temperature 0) calls.
+        self.cache_policy: Optional[bool] = role_cfg.get("cache") if isinstance(role_cfg.get("cache"), bool) else None
+        # Roles with `stream: true` consume provider output incrementally even through chat().
+        self.stream_enabled = bool(role_cfg.get("stream", False))
+        self.last_stream_stats: Dict[str, Any] = {}
+        self.last_queue_seconds = 0.0
+        pipeline_cfg = cfg.get("pipeline", {}) if isinstance(cfg.get("pipeline"), dict) else {}
+        self.retry_policy = RetryPolicy.from_settings(pipeline_cfg.get("llm_retry"), role_cfg.get("retry"))
+        self.last_attempts: list[Dict[str, Any]] = []
+        self.hedge_settings = hedge_settings(role_cfg)
+        backups = role_cfg.get("backup_models")
+        self.backup_models: list[Dict[str, Any]] = [b for b in backups if isinstance(b, dict)] if isinstance(backups, list) else []
+        self.last_hedge: Dict[str, Any] = {}
 
         # Apply config defaults
         self.model = role_cfg.get("model", self.model)
         self.temperature = float(role_cfg.get("temperature", self.temperature))
         self.max_tokens = int(role_cfg.get("max_tokens", self.max_tokens))
+        self._apply_provider_config(provider_key, provider_cfg)
+
+        # Legacy positional override (provider, model, temp, max_tokens, base_url)
+        if legacy_args:
+            prov = str(legacy_args[0]).strip().lower() if len(legacy_args) >= 1 else None
+            model = legacy_args[1] if len(legacy_args) >= 2 else None
+            temp = legacy_args[2] if len(legacy_args) >= 3 else None
+            maxt = legacy_args[3] if len(legacy_args) >= 4 else None
+            base = legacy_args[4] if len(legacy_args) >= 5 else None
+
+            if prov in ("ollama", "openai", "codex_cli", "vertex_cli", "vertex_sdk", "claude_cli", "google_ai_gemini"):
+                if prov != self.provider_type:
+                    self.provider_key = prov
+                self.provider_type = prov
+            if isinstance(model, str) and model:
+                self.model = model
+            if isinstance(temp, (int, float)):
+                self.temperature = float(temp)
+            if isinstance(maxt, (int, float)):
+                self.max_tokens = int(maxt)
+            if isinstance(base, str) and base:
+                if self.provider_type == "ollama":
+                    self.ollama_base = base
+                else:
+                    self.oai_base = base
+
+        # Keyword overrides (model=..., temperature=..., max_tokens=..., provider="..." base_url="...", cache=..., stream=...)
+        if "model" in overrides and overrides["model"]:
+            self.model = str(overrides["model"])
+        if "temperature" in overrides and overrides["temperature"] is not None:
+            self.temperature = float(overrides["temperature"])
+        if "max_tokens" in overrides and overrides["max_tokens"] is not None:
+            self.max_tokens = int(overrides["max_tokens"])
+        if "provider" in overrides and overrides["provider"]:
+            p = str(overrides["provider"]).strip().lower()
+            if p in ("ollama", "openai", "codex_cli", "vertex_cli", "vertex_sdk", "claude_cli", "google_ai_gemini"):
+                if p != self.provider_type:
+                    self.provider_key = p
+                self.provider_type = p
+        if "base_url" in overrides and overrides["base_url"]:
+            if self.provider_type == "ollama":
+                self.ollama_base = str(overrides["base_url"])
+            else:
+                self.oai_base = str(overrides["base_url"])
+        if "cache" in overrides and overrides["cache"] is not None:
+            self.cache_policy = bool(overrides["cache"])
+        if "stream" in overrides and overrides["stream"] is not None:
+            self.stream_enabled = bool(overrides["stream"])
+        logger.debug(f"[LLM] Client initialized for role '{self.role}': provider={self.provider_type}, model={self.model}, temp={self.temperature}, max_tokens={self.max_tokens}")
+
+
+    def _apply_provider_config(self, provider_key: str, provider_cfg: Dict[str, Any]) -> None:
+        """Load connection/CLI settings for ``provider_key`` from its ``providers:`` entry."""
+        self.provider_key = provider_key
         self.provider_type = provider_cfg.get("type", provider_key)
         self.provider_options = provider_cfg
         base_url = provider_cfg.get("base_url")
@@ -193,59 +422,433 @@ class Client:
             self.cli_debug = bool(provider_cfg.get("debug", False))
             self.cli_log_stderr = bool(provider_cfg.get("log_stderr", self.cli_debug))
 
-        # Legacy positional override (provider, model, temp, max_tokens, base_url)
-        if legacy_args:
-            prov = str(legacy_args[0]).strip().lower() if len(legacy_args) >= 1 else None
-            model = legacy_args[1] if len(legacy_args) >= 2 else None
-            temp = legacy_args[2] if len(legacy_args) >= 3 else None
-            maxt = legacy_args[3] if len(legacy_args) >= 4 else None
-            base = legacy_args[4] if len(legacy_args) >= 5 else None
+    def _response_cache(self) -> Optional[ResponseCache]:
+        env_flag = os.environ.get("LLM_CACHE")
+        if env_flag is not None and env_flag.strip().lower() in _CACHE_DISABLED_VALUES:
+            return None
+        if not self.cache_settings.get("enabled", True):
+            return None
+        enabled = self.temperature == 0 if self.cache_policy is None else self.cache_policy
+        return get_response_cache(self.cache_settings) if enabled else None
 
-            if prov in ("ollama", "openai", "codex_cli", "vertex_cli", "vertex_sdk", "claude_cli", "google_ai_gemini"):
-                self.provider_type = prov
-            if isinstance(model, str) and model:
-                self.model = model
-            if isinstance(temp, (int, float)):
-                self.temperature = float(temp)
-            if isinstance(maxt, (int, float)):
-                self.max_tokens = int(maxt)
-            if isinstance(base, str) and base:
-                if self.provider_type == "ollama":
-                    self.ollama_base = base
-                else:
-                    self.oai_base = base
+    def _cache_key(self, system: str, user: str) -> str:
+        endpoint = ""
+        if self.provider_type == "ollama":
+            endpoint = self.ollama_base
+        elif self.provider_type == "openai":
+            endpoint = self.oai_base
+        params = {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "endpoint": endpoint.rstrip("/"),
+        }
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+        return make_cache_key(self.provider_type, self.model, params, messages)
 
-        # Keyword overrides (model=..., temperature=..., max_tokens=..., provider="..." base_url="...")
-        if "model" in overrides and overrides["model"]:
-            self.model = str(overrides["model"])
-        if "temperature" in overrides and overrides["temperature"] is not None:
-            self.temperature = float(overrides["temperature"])
-        if "max_tokens" in overrides and overrides["max_tokens"] is not None:
-            self.max_tokens = int(overrides["max_tokens"])
-        if "provider" in overrides and overrides["provider"]:
-            p = str(overrides["provider"]).strip().lower()
-            if p in ("ollama", "openai", "codex_cli", "vertex_cli", "vertex_sdk", "claude_cli", "google_ai_gemini"):
-                self.provider_type = p
-        if "base_url" in overrides and overrides["base_url"]:
-            if self.provider_type == "ollama":
-                self.ollama_base = str(overrides["base_url"])
-            else:
-                self.oai_base = str(overrides["base_url"])
-        logger.debug(f"[LLM] Client initialized for role '{self.role}': provider={self.provider_type}, model={self.model}, temp={self.temperature}, max_tokens={self.max_tokens}")
+    async def chat(self, system: str, user: str, *, use_cache: bool = True) -> str:
+        """Return the completion for (system, user).
 
+        When the response cache applies to this role, a fresh entry is returned
+        without calling the provider. ``use_cache=False`` skips the lookup (for
+        retries that need a new sample) but still refreshes the stored entry.
+        """
+        self._apply_model_recommendation(system, user)
+
+        cache = self._response_cache()
+        cache_key = self._cache_key(system, user) if cache is not None else None
+        if cache is not None and use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"[LLM] Response cache hit for role {self.role} ({self.provider_type}/{self.model})")
+                return cached
+
+        if self.hedge_settings["enabled"] and self.backup_models and self.hedge_settings["max_backups"]:
+            response, complete, winner = await self._dispatch_hedged(system, user)
+        else:
+            response, complete = await self._dispatch_with_retry(system, user)
+            winner = self
+        if cache is not None and response and complete:
+            cache.put(cache_key, response, meta={"role": self.role, "provider": winner.provider_type, "model": winner.model})
+        return response
+
+    def _backup_client(self, backup: Dict[str, Any]) -> "Client":
+        provider_key = str(backup.get("provider") or "ollama")
+        providers = self.cfg.get("providers", {}) if isinstance(self.cfg.get("providers"), dict) else {}
+        client = Client(role=self.role)
+        client._apply_provider_config(provider_key, providers.get(provider_key) or {"type": provider_key})
+        if backup.get("model"):
+            client.model = str(backup["model"])
+        client.hedge_settings = dict(client.hedge_settings, enabled=False)
+        return client
+
+    async def _dispatch_hedged(self, system: str, user: str) -> tuple[str, bool, "Client"]:
+        """Race the primary against backup models launched after the hedge delay.
+
+        The first complete answer wins and the other calls are cancelled. A call
+        that fails early triggers the next backup immediately. Returns
+        ``(response, complete, winning_client)``.
+        """
+        settings = self.hedge_settings
+        delay = hedge_delay(settings, self.provider_type, self.model)
+        backups = list(self.backup_models[: settings["max_backups"]])
+        running: Dict[asyncio.Task, Client] = {
+            asyncio.create_task(self._dispatch_with_retry(system, user)): self
+        }
+        launched = [f"{self.provider_type}/{self.model}"]
+        fallback: Optional[tuple[str, "Client"]] = None
+        last_error: Optional[BaseException] = None
+        started = time.monotonic()
+        self.last_hedge = {"threshold_seconds": round(delay, 3), "launched": launched}
 
-    async def chat(self, system: str, user: str) -> str:
-        if recommend_model and _reco_enabled():
-            prompt = f"{system.strip()}\n\n{user.strip()}"
+        try:
+            while running:
+                timeout = max(0.0, delay - (time.monotonic() - started)) if backups else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    backup = self._backup_client(backups.pop(0))
+                    logger.info(
+                        f"[LLM] Hedging {self.role}: {self.provider_type}/{self.model} slower than {delay:.1f}s; "
+                        f"launching {backup.provider_type}/{backup.model}"
+                    )
+                    running[asyncio.create_task(backup._dispatch_with_retry(system, user))] = backup
+                    launched.append(f"{backup.provider_type}/{backup.model}")
+                    continue
+                for task in done:
+                    client = running.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning(f"[LLM] Hedged call {client.provider_type}/{client.model} failed: {last_error}")
+                        continue
+                    response, complete = task.result()
+                    if complete:
+                        self.last_hedge["winner"] = f"{client.provider_type}/{client.model}"
+                        self.last_hedge["elapsed_seconds"] = round(time.monotonic() - started, 3)
+                        if client is not self:
+                            logger.info(f"[LLM] Hedge won by {self.last_hedge['winner']} for role {self.role}")
+                        return response, True, client
+                    fallback = fallback or (response, client)
+                if not running and backups:
+                    # Everything in flight failed; don't wait out the hedge delay.
+                    backup = self._backup_client(backups.pop(0))
+                    running[asyncio.create_task(backup._dispatch_with_retry(system, user))] = backup
+                    launched.append(f"{backup.provider_type}/{backup.model}")
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        if fallback is not None:
+            self.last_hedge["winner"] = f"{fallback[1].provider_type}/{fallback[1].model}"
+            return fallback[0], False, fallback[1]
+        assert last_error is not None
+        raise last_error
+
+    async def _dispatch_with_retry(self, system: str, user: str) -> tuple[str, bool]:
+        """Run ``_dispatch_chat`` under ``self.retry_policy``.
+
+        Returns ``(response, complete)``. If output still looks truncated once the
+        attempts are exhausted, the last text is returned with ``complete=False``
+        so callers can still try to salvage it; it is never cached.
+        """
+        policy = self.retry_policy
+        started = time.monotonic()
+        self.last_attempts = []
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_started = time.perf_counter()
             try:
-                chosen_model = recommend_model(prompt, role=self.role)
-                logger.info(f"[LLM] Model recommender chose: {chosen_model} for role {self.role}")
+                with finish_reason_scope() as finish:
+                    response = await self._dispatch_chat(system, user)
+                problem = (
+                    output_problem(response, finish.get("reason"), check_fences=policy.detect_unclosed_fences)
+                    if policy.retry_truncated
+                    else None
+                )
+                if problem:
+                    raise TruncatedOutputError(problem, response or "")
+                self._record_attempt(attempt, attempt_started, "ok")
+                LATENCIES.record(self.provider_type, self.model, time.perf_counter() - attempt_started)
+                return response, True
             except Exception as exc:
-                logger.warning(f"[LLM] Model recommender failed for role {self.role}: {exc}. Falling back to default model.")
-                chosen_model = None
-            if chosen_model:
-                self.model = chosen_model
+                kind = classify_error(exc)
+                self._record_attempt(attempt, attempt_started, kind or "fatal", exc)
+                if kind is None:
+                    raise
+                remaining = policy.deadline_seconds - (time.monotonic() - started)
+                delay = policy.backoff(attempt, retry_after_seconds(exc))
+                if attempt >= policy.max_attempts or delay >= remaining:
+                    logger.warning(
+                        f"[LLM] Giving up on {self.provider_type}/{self.model} after {attempt} attempt(s): {kind}"
+                    )
+                    if isinstance(exc, TruncatedOutputError):
+                        return exc.text, False
+                    raise
+                logger.warning(
+                    f"[LLM] {self.provider_type}/{self.model} attempt {attempt}/{policy.max_attempts} failed ({kind}: "
+                    f"{str(exc)[:120]}); retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    def _record_attempt(self, attempt: int, started: float, outcome: str, exc: Optional[BaseException] = None) -> None:
+        entry: Dict[str, Any] = {
+            "attempt": attempt,
+            "provider": self.provider_type,
+            "model": self.model,
+            "latency_seconds": round(time.perf_counter() - started, 3),
+            "queued_seconds": round(self.last_queue_seconds, 3),
+            "outcome": outcome,
+        }
+        if exc is not None:
+            entry["error"] = str(exc)[:200]
+        self.last_attempts.append(entry)
 
+    async def stream_chat(
+        self,
+        system: str,
+        user: str,
+        *,
+        stop_on: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """Yield the completion for (system, user) incrementally.
+
+        ``stop_on`` aborts generation as soon as that marker (e.g. a closing
+        ``</files>`` tag) has been produced; the chunk containing it is still
+        yielded. Timing for the call is left in ``self.last_stream_stats``.
+        A cache hit is yielded as a single chunk.
+        """
+        self._apply_model_recommendation(system, user)
+
+        cache = self._response_cache()
+        cache_key = self._cache_key(system, user) if cache is not None else None
+        if cache is not None and use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"[LLM] Response cache hit for role {self.role} ({self.provider_type}/{self.model})")
+                self.last_stream_stats = {"cached": True, "chars": len(cached)}
+                yield cached
+                return
+
+        parts: list[str] = []
+        async with self._rate_limited(system, user) as slot:
+            async for chunk in self._stream_with_stats(system, user, stop_on=stop_on):
+                parts.append(chunk)
+                yield chunk
+            slot["actual_tokens"] = slot["prompt_tokens"] + estimate_tokens("".join(parts))
+        # Early-stopped output is intentionally truncated; don't let it shadow a full answer.
+        if cache is not None and parts and not self.last_stream_stats.get("stopped_early"):
+            cache.put(cache_key, "".join(parts), meta={"role": self.role, "provider": self.provider_type, "model": self.model})
+
+    def _apply_model_recommendation(self, system: str, user: str) -> None:
+        if not (recommend_model and _reco_enabled()):
+            return
+        prompt = f"{system.strip()}\n\n{user.strip()}"
+        try:
+            chosen_model = recommend_model(prompt, role=self.role)
+            logger.info(f"[LLM] Model recommender chose: {chosen_model} for role {self.role}")
+        except Exception as exc:
+            logger.warning(f"[LLM] Model recommender failed for role {self.role}: {exc}. Falling back to default model.")
+            chosen_model = None
+        if chosen_model:
+            self.model = chosen_model
+
+    def _supports_streaming(self) -> bool:
+        if self.provider_type in ("vertex_cli", "vertex_sdk"):
+            return self.provider_type in PROVIDER_STREAM_REGISTRY
+        return self.provider_type in ("ollama", "openai")
+
+    async def _stream_with_stats(
+        self, system: str, user: str, *, stop_on: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+        chunks = 0
+        chars = 0
+        stopped_early = False
+        tail = ""
+        stream = self._stream_provider(system, user)
+        try:
+            async for chunk in stream:
+                if not chunk:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    logger.debug(f"[LLM] First token after {ttft:.2f}s ({self.provider_type}/{self.model})")
+                chunks += 1
+                chars += len(chunk)
+                emit_progress("llm_token", text=chunk)
+                yield chunk
+                if stop_on:
+                    # Keep just enough of the previous text to catch a marker split across chunks.
+                    window = tail + chunk
+                    if stop_on in window:
+                        stopped_early = True
+                        logger.info(f"[LLM] Stop marker {stop_on!r} seen after {chars} chars; aborting stream.")
+                        break
+                    tail = window[-(len(stop_on) - 1):] if len(stop_on) > 1 else ""
+        finally:
+            # Closing the provider generator closes the HTTP response, which stops generation server-side.
+            await stream.aclose()
+            duration = time.perf_counter() - started
+            generating = duration - (ttft or 0.0)
+            approx_tokens = chars / 4
+            self.last_stream_stats = {
+                "provider": self.provider_type,
+                "model": self.model,
+                "ttft_seconds": round(ttft, 3) if ttft is not None else None,
+                "duration_seconds": round(duration, 3),
+                "chunks": chunks,
+                "chars": chars,
+                "approx_tokens": int(approx_tokens),
+                "tokens_per_second": round(approx_tokens / generating, 1) if generating > 0 else None,
+                "stopped_early": stopped_early,
+            }
+            logger.info(f"[LLM] Stream stats for role {self.role}: {self.last_stream_stats}")
+
+    async def _stream_provider(self, system: str, user: str) -> AsyncIterator[str]:
+        if self.provider_type in ("vertex_cli", "vertex_sdk") and self.provider_type in PROVIDER_STREAM_REGISTRY:
+            provider = PROVIDER_STREAM_REGISTRY[self.provider_type]
+            messages, extra_kwargs = self._vertex_request(system, user)
+            if self.provider_type == "vertex_cli":
+                location = extra_kwargs.get("location") or os.environ.get("VERTEX_LOCATION", "us-central1")
+                extra_kwargs["http_client"] = get_http_client(
+                    f"https://{location}-aiplatform.googleapis.com", self.provider_options
+                )
+            stream = provider(
+                messages=messages,
+                model=self.model,
+                temperature=self.temperature,
+                max_output_tokens=self.max_tokens,
+                **extra_kwargs,
+            )
+        elif self.provider_type == "openai":
+            stream = self._openai_stream(system, user)
+        elif self.provider_type == "ollama":
+            model_name = self.model[len("ollama/"):] if self.model.startswith("ollama/") else self.model
+            stream = self._ollama_stream(system, user, model_name)
+        else:
+            # No incremental transport for CLI / google_ai_gemini: emit the whole answer at once.
+            yield await self._call_provider(system, user)
+            return
+
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _ollama_stream(self, system: str, user: str, model_name: str) -> AsyncIterator[str]:
+        url = f"{self.ollama_base.rstrip('/')}/api/chat"
+        payload = {
+            "model": model_name,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "options": {"temperature": self.temperature, "num_predict": self.max_tokens},
+            "stream": True,
+        }
+        client = get_http_client(self.ollama_base, self.provider_options)
+        async with client.stream("POST", url, json=payload) as r:
+            if r.status_code == 404:
+                body = (await r.aread()).decode("utf-8", errors="replace")
+                if "model not found" in body.lower():
+                    logger.error(f"[LLM] OLLAMA_MODEL_NOT_FOUND: Model '{self.model}' not found on Ollama server.")
+                    raise RuntimeError(f"OLLAMA_MODEL_NOT_FOUND: {self.model}")
+                raise RuntimeError("OLLAMA_CHAT_404: Endpoint not found or other 404 error.")
+            r.raise_for_status()
+            # Ollama streams newline-delimited JSON objects.
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"[LLM] Skipping malformed Ollama stream line: {line[:120]}")
+                    continue
+                message = data.get("message") if isinstance(data, dict) else None
+                if isinstance(message, dict) and message.get("content"):
+                    yield message["content"]
+                if isinstance(data, dict) and data.get("done"):
+                    record_finish_reason(data.get("done_reason"))
+                    break
+
+    async def _openai_stream(self, system: str, user: str) -> AsyncIterator[str]:
+        url = f"{self.oai_base.rstrip('/')}/chat/completions"
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": True,
+        }
+        headers = {"Authorization": f"Bearer {self.oai_key}", "Content-Type": "application/json"}
+        client = get_http_client(self.oai_base, self.provider_options)
+        async with client.stream("POST", url, headers=headers, json=payload) as r:
+            r.raise_for_status()
+            # Server-sent events: `data: {...}` lines terminated by `data: [DONE]`.
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.debug(f"[LLM] Skipping malformed OpenAI stream event: {data[:120]}")
+                    continue
+                for choice in event.get("choices", [])[:1]:
+                    record_finish_reason(choice.get("finish_reason"))
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
+    def _rate_limiters(self) -> list[RateLimiter]:
+        """Limiters for the configured provider entry, scoped by its key (two keys may share a type)."""
+        provider_cfg = self.provider_options if isinstance(self.provider_options, dict) else {}
+        if provider_cfg.get("type", self.provider_key) != self.provider_type:
+            # A provider= override replaced the role's provider; that provider's own entry applies.
+            providers = self.cfg.get("providers", {}) if isinstance(self.cfg.get("providers"), dict) else {}
+            provider_cfg = providers.get(self.provider_key) if isinstance(providers.get(self.provider_key), dict) else {}
+        return resolve_limiters(self.provider_key, self.model, provider_cfg.get("rate_limit"))
+
+    @contextlib.asynccontextmanager
+    async def _rate_limited(self, system: str, user: str) -> AsyncIterator[Dict[str, Any]]:
+        prompt_tokens = estimate_tokens(system) + estimate_tokens(user)
+        async with limited(self._rate_limiters(), prompt_tokens + self.max_tokens) as slot:
+            self.last_queue_seconds = slot["queued_seconds"]
+            slot["prompt_tokens"] = prompt_tokens
+            yield slot
+
+    async def _dispatch_chat(self, system: str, user: str) -> str:
+        async with self._rate_limited(system, user) as slot:
+            response = await self._call_provider(system, user)
+            slot["actual_tokens"] = slot["prompt_tokens"] + estimate_tokens(response or "")
+        return response
+
+    async def _call_provider(self, system: str, user: str) -> str:
+        if self.stream_enabled and self._supports_streaming():
+            return "".join([chunk async for chunk in self._stream_with_stats(system, user)])
+
+        if self.provider_type in PROVIDER_ASYNC_REGISTRY:
+            logger.debug(f"[LLM] Using async Vertex provider: {self.provider_type}")
+            messages, extra_kwargs = self._vertex_request(system, user)
+            return await PROVIDER_ASYNC_REGISTRY[self.provider_type](
+                messages=messages,
+                model=self.model,
+                temperature=self.temperature,
+                max_output_tokens=self.max_tokens,
+                **extra_kwargs,
+            )
         if self.provider_type in ("vertex_cli", "vertex_sdk") and PROVIDER_REGISTRY:
             logger.debug(f"[LLM] Using Vertex provider: {self.provider_type}")
             return await asyncio.to_thread(self._vertex_chat, system, user)
@@ -268,10 +871,12 @@ class Client:
             logger.debug(f"[LLM] Using Ollama provider. Model name for API: {model_name_for_ollama}")
 
 
-            # prefer /api/chat, fallback to /api/generate for older Ollama
+            # prefer /api/chat, fallback to /api/generate for older Ollama (transient errors go to the retry policy)
             try:
                 return await self._ollama_chat(system, user, model_name_for_ollama)
-            except Exception as exc:
+            except RuntimeError as exc:
+                if "OLLAMA_CHAT_404" not in str(exc):
+                    raise
                 logger.warning(f"[LLM] Ollama /api/chat failed: {exc}. Falling back to /api/generate.")
                 return await self._ollama_generate(system, user, model_name_for_ollama)
 
@@ -286,28 +891,29 @@ class Client:
             "options": {"temperature": self.temperature, "num_predict": self.max_tokens},
             "stream": False,
         }
-        async with httpx.AsyncClient(timeout=300) as client:
-            r = await client.post(url, json=payload)
-            if r.status_code == 404:
-                logger.debug(f"[OLLAMA_DEBUG] 404 Response Text (chat): {r.text}") # DEBUG
-                # Check if the 404 is due to the model not being found
-                if "model not found" in r.text.lower():
-                    logger.error(f"[LLM] OLLAMA_MODEL_NOT_FOUND: Model '{self.model}' not found on Ollama server.")
-                    raise RuntimeError(f"OLLAMA_MODEL_NOT_FOUND: {self.model}")
-                else:
-                    logger.error(f"[LLM] OLLAMA_CHAT_404: Endpoint not found or other 404 error for {url}. Response: {r.text}")
-                    raise RuntimeError("OLLAMA_CHAT_404: Endpoint not found or other 404 error.")
-            r.raise_for_status()
-            data = r.json()
-            if isinstance(data, dict):
-                if "message" in data and isinstance(data["message"], dict):
-                    return data["message"].get("content", "")
-                if "content" in data:
-                    return data.get("content", "")
-                if "response" in data:
-                    return data["response"]
-            logger.warning(f"[LLM] Unexpected Ollama chat response format: {json.dumps(data)[:200]}...")
-            return r.text
+        client = get_http_client(self.ollama_base, self.provider_options)
+        r = await client.post(url, json=payload)
+        if r.status_code == 404:
+            logger.debug(f"[OLLAMA_DEBUG] 404 Response Text (chat): {r.text}") # DEBUG
+            # Check if the 404 is due to the model not being found
+            if "model not found" in r.text.lower():
+                logger.error(f"[LLM] OLLAMA_MODEL_NOT_FOUND: Model '{self.model}' not found on Ollama server.")
+                raise RuntimeError(f"OLLAMA_MODEL_NOT_FOUND: {self.model}")
+            else:
+                logger.error(f"[LLM] OLLAMA_CHAT_404: Endpoint not found or other 404 error for {url}. Response: {r.text}")
+                raise RuntimeError("OLLAMA_CHAT_404: Endpoint not found or other 404 error.")
+        r.raise_for_status()
+        data = r.json()
+        if isinstance(data, dict):
+            record_finish_reason(data.get("done_reason"))
+            if "message" in data and isinstance(data["message"], dict):
+                return data["message"].get("content", "")
+            if "content" in data:
+                return data.get("content", "")
+            if "response" in data:
+                return data["response"]
+        logger.warning(f"[LLM] Unexpected Ollama chat response format: {json.dumps(data)[:200]}...")
+        return r.text
 
     async def _ollama_generate(self, system: str, user: str, model_name: str) -> str:
         url = f"{self.ollama_base.rstrip('/')}/api/generate"
@@ -318,21 +924,22 @@ class Client:
             "options": {"temperature": self.temperature, "num_predict": self.max_tokens},
             "stream": False,
         }
-        async with httpx.AsyncClient(timeout=300) as client:
-            r = await client.post(url, json=payload)
-            if r.status_code == 404:
-                logger.debug(f"[OLLAMA_DEBUG] 404 Response Text (generate): {r.text}") # DEBUG
-                if "model not found" in r.text.lower():
-                    logger.error(f"[LLM] OLLAMA_MODEL_NOT_FOUND (generate): Model '{self.model}' not found on Ollama server.")
-                    raise RuntimeError(f"OLLAMA_MODEL_NOT_FOUND: {self.model}")
-                else:
-                    logger.error(f"[LLM] OLLAMA_GENERATE_404: Endpoint not found or other 404 error for {url}. Response: {r.text}")
-            r.raise_for_status()
-            data = r.json()
-            if isinstance(data, dict) and "response" in data:
-                return data["response"]
-            logger.warning(f"[LLM] Unexpected Ollama generate response format: {json.dumps(data)[:200]}...")
-            return r.text
+        client = get_http_client(self.ollama_base, self.provider_options)
+        r = await client.post(url, json=payload)
+        if r.status_code == 404:
+            logger.debug(f"[OLLAMA_DEBUG] 404 Response Text (generate): {r.text}") # DEBUG
+            if "model not found" in r.text.lower():
+                logger.error(f"[LLM] OLLAMA_MODEL_NOT_FOUND (generate): Model '{self.model}' not found on Ollama server.")
+                raise RuntimeError(f"OLLAMA_MODEL_NOT_FOUND: {self.model}")
+            else:
+                logger.error(f"[LLM] OLLAMA_GENERATE_404: Endpoint not found or other 404 error for {url}. Response: {r.text}")
+        r.raise_for_status()
+        data = r.json()
+        if isinstance(data, dict) and "response" in data:
+            record_finish_reason(data.get("done_reason"))
+            return data["response"]
+        logger.warning(f"[LLM] Unexpected Ollama generate response format: {json.dumps(data)[:200]}...")
+        return r.text
 
     def _vertex_chat(self, system: str, user: str) -> str:
         provider = PROVIDER_REGISTRY.get(self.provider_type)
@@ -340,6 +947,16 @@ class Client:
             logger.critical(f"[LLM] FATAL: Vertex provider '{self.provider_type}' not available in registry.")
             raise RuntimeError(f"Provider '{self.provider_type}' not available")
 
+        messages, extra_kwargs = self._vertex_request(system, user)
+        return provider(
+            messages=messages,
+            model=self.model,
+            temperature=self.temperature,
+            max_output_tokens=self.max_tokens,
+            **extra_kwargs,
+        )
+
+    def _vertex_request(self, system: str, user: str) -> tuple[list[Dict[str, Any]], Dict[str, Any]]:
         messages = [
             {"role": "system", "content": [{"type": "text", "text": system}]},
             {"role": "user", "content": [{"type": "text", "text": user}]},
@@ -355,22 +972,15 @@ class Client:
 
         extra_kwargs = {}
         if isinstance(self.provider_options, dict):
-            # Pass only project_id and location as extra kwargs, as others are passed directly.
-            for key in ("project_id", "location"):
+            # Pass only project_id, location, auth mode and connection-pool limits as extra kwargs,
+            # as others are passed directly.
+            for key in ("project_id", "location", "auth", "max_connections", "max_keepalive_connections", "keepalive_expiry"):
                 if key in self.provider_options:
                     resolved = _sanitize(self.provider_options.get(key))
                     if resolved is not None:
                         extra_kwargs[key] = resolved
         logger.debug(f"[LLM] Vertex extra kwargs: {extra_kwargs}")
-
-
-        return provider(
-            messages=messages,
-            model=self.model,
-            temperature=self.temperature,
-            max_output_tokens=self.max_tokens,
-            **extra_kwargs,
-        )
+        return messages, extra_kwargs
 
     async def _openai_chat(self, system: str, user: str) -> str:
         url = f"{self.oai_base.rstrip('/')}/chat/completions"
@@ -388,15 +998,17 @@ class Client:
         logger.debug(f"[LLM] OpenAI chat payload prepared. Model: {self.model}")
 
 
-        async with httpx.AsyncClient(timeout=300) as client:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
-            try:
-                return data["choices"][0]["message"]["content"]
-            except Exception as exc:
-                logger.error(f"[LLM] Unexpected OpenAI chat response format: {exc}. Full response: {json.dumps(data)[:200]}...")
-                return json.dumps(data)
+        client = get_http_client(self.oai_base, self.provider_options)
+        r = await client.post(url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
+        try:
+            choice = data["choices"][0]
+            record_finish_reason(choice.get("finish_reason"))
+            return choice["message"]["content"]
+        except Exception as exc:
+            logger.error(f"[LLM] Unexpected OpenAI chat response format: {exc}. Full response: {json.dumps(data)[:200]}...")
+            return json.dumps(data)
 
     def _google_gemini_chat(self, system: str, user: str) -> str:
         try:
@@ -414,12 +1026,14 @@ class Client:
         logger.debug(f"[LLM] Google Gemini payload prepared. Model: {model_name}")
 
         response = client.models.generate_content(model=model_name, contents=prompt)
+        candidates = getattr(response, "candidates", None)
+        if candidates:
+            record_finish_reason(getattr(candidates[0], "finish_reason", None))
 
         text = getattr(response, "text", None)
         if text:
             return text
 
-        candidates = getattr(response, "candidates", None)
         if candidates:
             parts: list[str] = []
             for candidate in candidates:
@@ -448,6 +1062,17 @@ class Client:
             logger.critical(f"[LLM] FATAL: {label}_NO_COMMAND - CLI command not configured.")
             raise RuntimeError(f"{label}_NO_COMMAND")
 
+        persistent = self.provider_options.get("persistent") if isinstance(self.provider_options, dict) else None
+        if isinstance(persistent, dict) and persistent.get("enabled") and persistent.get("command"):
+            try:
+                return await self._cli_pool_chat(system, user, persistent)
+            except CLITimeoutError:
+                label = self.provider_type.upper()
+                logger.error(f"[LLM] {label}_TIMEOUT: Warm worker timed out after {self.cli_timeout}s.")
+                raise RuntimeError(f"{label}_TIMEOUT")
+            except CLIWorkerError as exc:
+                logger.warning(f"[LLM] Warm CLI worker unavailable ({exc}); falling back to spawn-per-call.")
+
         # Build command arguments
         cmd_args = list(self.cli_command)
         if self.cli_extra_args:
@@ -543,6 +1168,11 @@ class Client:
                     process.communicate(input_data.encode('utf-8') if input_data else None),
                     timeout=self.cli_timeout
                 )
+            except asyncio.CancelledError:
+                # Cancelled (e.g. a hedged request lost the race): don't leave the CLI running.
+                process.kill()
+                await process.wait()
+                raise
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
@@ -648,6 +1278,49 @@ class Client:
                 logger.error(f"[LLM] CLI execution failed: {exc}")
             raise
 
+    async def _cli_pool_chat(self, system: str, user: str, persistent: Dict[str, Any]) -> str:
+        """Send the prompt to a warm CLI worker (see scripts/cli_pool.py)."""
+        start_time = time.perf_counter()
+        argv = [str(arg) for arg in persistent["command"]]
+        if self.cli_append_model_flag and "--model" not in argv:
+            argv.extend(["--model", self.model])
+        # Sessions are long-lived, so per-call flags like --system-prompt can't be used; inline the system prompt.
+        template = self.cli_prompt_template or "{system}\n\n{user}"
+        if "{system}" not in template:
+            template = "{system}\n\n" + template
+        prompt = template.format(
+            system=system,
+            user=user,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            model=self.model,
+        )
+        env = os.environ.copy()
+        env.update(self.cli_env)
+        pool = get_cli_pool(
+            argv,
+            protocol=str(persistent.get("protocol", "stream_json")),
+            size=int(persistent.get("workers", 2)),
+            max_requests_per_worker=int(persistent.get("max_requests_per_worker", 1)),
+            cwd=self.cli_cwd,
+            env=env,
+        )
+        response = await pool.request(prompt, float(self.cli_timeout))
+        if self.cli_output_clean:
+            response = re.sub(r'\x1b\[[0-9;]*[mG]', '', response).strip()
+        if not response.strip():
+            label = self.provider_type.upper()
+            raise RuntimeError(f"{label}_EMPTY_RESPONSE")
+        self._log_cli_operation(
+            argv,
+            time.perf_counter() - start_time,
+            response,
+            success=True,
+            stderr=None,
+            debug_enabled=self.cli_debug,
+        )
+        return response
+
     def _cli_chat(self, system: str, user: str) -> str:
         """Execute configured CLI provider command and return response with timing and logging."""
         logger.debug(f"[LLM] _cli_chat: Entered for provider {self.provider_type}")
@@ -985,3 +1658,45 @@ class Client:
 
 # Backward-compat alias
 LLMClient = Client
+
+
+# --- Per-role client factory ---
+# Role scripts ask for a Client per call (per attempt, per classification). The
+# resolved prototype is built once per (role, overrides) and rebuilt when
+# config.yaml or the environment it reads changes; callers get a shallow copy
+# so per-call state (model recommendation, last_* stats) never leaks between
+# concurrent callers.
+_CLIENT_ENV_KEYS = ("ROLE", "OLLAMA_BASE_URL", "OPENAI_API_BASE", "OPENAI_API_KEY", "GEMINI_API_KEY")
+_CLIENT_PROTOTYPES: Dict[tuple, tuple[tuple, Client]] = {}
+_CLIENT_LOCK = threading.Lock()
+_CLIENT_STATS = {"hits": 0, "builds": 0}
+
+
+def get_client(role: Optional[str] = None, **overrides: Any) -> Client:
+    """Return a ready-to-use Client for ``role`` without re-resolving config.yaml."""
+    try:
+        key = (role, tuple(sorted(overrides.items())))
+        hash(key)
+    except TypeError:
+        return Client(role=role, **overrides)
+    version = (config_stamp(CONFIG_P), tuple(os.environ.get(name) for name in _CLIENT_ENV_KEYS))
+    with _CLIENT_LOCK:
+        entry = _CLIENT_PROTOTYPES.get(key)
+        if entry is not None and entry[0] == version:
+            _CLIENT_STATS["hits"] += 1
+            return copy.copy(entry[1])
+    prototype = Client(role=role, **overrides)
+    with _CLIENT_LOCK:
+        _CLIENT_PROTOTYPES[key] = (version, prototype)
+        _CLIENT_STATS["builds"] += 1
+    return copy.copy(prototype)
+
+
+def clear_clients() -> None:
+    with _CLIENT_LOCK:
+        _CLIENT_PROTOTYPES.clear()
+
+
+def client_factory_stats() -> Dict[str, int]:
+    with _CLIENT_LOCK:
+        return dict(_CLIENT_STATS, roles=len(_CLIENT_PROTOTYPES))
@@ -0,0 +1,156 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Entries are keyed by a SHA-256 of the provider, model, generation params and
+messages, stored one JSON file per key, expired by TTL and evicted
+least-recently-used once the cache grows past ``max_entries``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from logger import logger
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT / ".cache" / "llm"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    params: Mapping[str, Any],
+    messages: list[Mapping[str, Any]],
+) -> str:
+    """Hash a request into a stable cache key (dict ordering does not matter)."""
+    canonical = json.dumps(
+        {"provider": provider, "model": model, "params": dict(params), "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe response cache; recency is tracked in memory and via file mtimes."""
+
+    def __init__(
+        self,
+        directory: pathlib.Path | str = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.directory = pathlib.Path(directory)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, float] | None = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self) -> OrderedDict[str, float]:
+        if self._index is None:
+            entries: list[tuple[float, str]] = []
+            if self.directory.exists():
+                for path in self.directory.glob("*.json"):
+                    try:
+                        entries.append((path.stat().st_mtime, path.stem))
+                    except OSError:
+                        continue
+            entries.sort()
+            self._index = OrderedDict((key, mtime) for mtime, key in entries)
+        return self._index
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            index = self._load_index()
+            path = self._path(key)
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                index.pop(key, None)
+                self.misses += 1
+                return None
+
+            created = float(entry.get("created", 0))
+            if self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds:
+                logger.debug(f"[LLM_CACHE] Entry {key[:12]} expired; removing.")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            index[key] = now
+            index.move_to_end(key)
+            self.hits += 1
+            return entry.get("response")
+
+    def put(self, key: str, response: str, *, meta: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            index = self._load_index()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            payload = {"created": time.time(), "response": response, "meta": meta or {}}
+            # Write to a temp file and rename so concurrent readers never see a partial entry.
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(payload, handle, ensure_ascii=False)
+                os.replace(tmp_name, self._path(key))
+            except OSError as exc:
+                logger.warning(f"[LLM_CACHE] Failed to write entry {key[:12]}: {exc}")
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                return
+            index[key] = time.time()
+            index.move_to_end(key)
+            self.writes += 1
+            while len(index) > self.max_entries:
+                oldest, _ = next(iter(index.items()))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._load_index()
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        if self._index is not None:
+            self._index.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "entries": len(self._index) if self._index is not None else None,
+            }
@@ -0,0 +1,68 @@
+"""Latency tracking and settings for hedged LLM requests.
+
+A hedged call starts the role's primary model and, if it has not answered
+within the observed p95 (or a fixed fallback until enough samples exist),
+launches the next ``backup_models`` entry; the first valid answer wins.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MIN_SAMPLES = 10
+DEFAULT_AFTER_SECONDS = 120.0
+DEFAULT_WINDOW = 200
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per (provider, model)."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault((provider, model), deque(maxlen=self.window))
+            samples.append(float(seconds))
+
+    def percentile(self, provider: str, model: str, pct: float) -> Tuple[Optional[float], int]:
+        """Return ``(value, sample_count)``; value is None when there are no samples."""
+        with self._lock:
+            samples = sorted(self._samples.get((provider, model), ()))
+        if not samples:
+            return None, 0
+        rank = max(0, math.ceil(pct / 100.0 * len(samples)) - 1)
+        return samples[rank], len(samples)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+LATENCIES = LatencyTracker()
+
+
+def hedge_settings(role_cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    """Normalise a role's ``hedge:`` block (disabled unless ``enabled: true``)."""
+    raw = role_cfg.get("hedge") if isinstance(role_cfg, Mapping) else None
+    raw = raw if isinstance(raw, Mapping) else {}
+    return {
+        "enabled": bool(raw.get("enabled", False)),
+        "percentile": float(raw.get("percentile", DEFAULT_PERCENTILE)),
+        "min_samples": int(raw.get("min_samples", DEFAULT_MIN_SAMPLES)),
+        "after_seconds": float(raw.get("after_seconds", DEFAULT_AFTER_SECONDS)),
+        "max_backups": max(0, int(raw.get("max_backups", 1))),
+    }
+
+
+def hedge_delay(settings: Mapping[str, Any], provider: str, model: str) -> float:
+    """Seconds to wait on ``provider/model`` before launching a hedge."""
+    value, count = LATENCIES.percentile(provider, model, settings["percentile"])
+    if value is None or count < settings["min_samples"]:
+        return settings["after_seconds"]
+    return value
@@ -0,0 +1,282 @@
+"""Per-provider / per-model request governor for LLM calls.
+
+Each limiter combines a requests-per-minute bucket, a tokens-per-minute bucket
+and a cap on concurrent in-flight calls. Callers wait (asynchronously) instead
+of failing, and the time spent queued is recorded so limits can be tuned.
+
+State is guarded by threading locks rather than asyncio primitives so one
+limiter can be shared by every event loop in the process (A2A handlers and
+``asyncio.run`` call sites each bring their own loop).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional, Tuple
+
+from logger import logger
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for tokens/min budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` tokens per second.
+
+    ``reserve`` always succeeds and returns how long the caller must wait for its
+    reservation to be covered; the balance may go negative, which queues later
+    callers behind earlier ones in arrival order.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = float(per_minute) / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) after the real usage is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class InFlightGate:
+    """Counting gate usable from any event loop (waiters are woken thread-safely)."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self._take()
+                return
+            future: asyncio.Future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                except ValueError:
+                    # Slot was already handed to us; pass it on.
+                    self._release_locked()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._release_locked()
+
+    def _take(self) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+
+    def _release_locked(self) -> None:
+        self.active -= 1
+        while self._waiters:
+            loop, future = self._waiters.popleft()
+            if future.done() or loop.is_closed():
+                continue
+            # Hand the slot over directly so a newcomer cannot jump the queue.
+            self._take()
+            loop.call_soon_threadsafe(_resolve, future)
+            return
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """Requests/min + tokens/min + max in-flight for one provider or provider/model."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.limits = (rpm, tpm, max_in_flight)
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.gate = InFlightGate(max_in_flight) if max_in_flight else None
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls, name: str, settings: Mapping[str, Any]) -> "RateLimiter":
+        return cls(
+            name,
+            rpm=settings.get("rpm"),
+            tpm=settings.get("tpm"),
+            max_in_flight=settings.get("max_in_flight"),
+        )
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """Wait for budget and a slot; returns the seconds spent queued."""
+        started = time.perf_counter()
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None and estimated_tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.gate is not None:
+                await self.gate.acquire()
+        except asyncio.CancelledError:
+            self.refund(estimated_tokens)
+            raise
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.acquired += 1
+            if waited > 0.001:
+                self.waited += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def refund(self, estimated_tokens: int = 0) -> None:
+        """Give back what ``acquire`` reserved for a call that never went out."""
+        if self.requests is not None:
+            self.requests.adjust(-1)
+        if self.tokens is not None and estimated_tokens:
+            self.tokens.adjust(-estimated_tokens)
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        if self.gate is not None:
+            self.gate.release()
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait_seconds": round(self.total_wait_seconds, 3),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.acquired, 3) if self.acquired else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+                "in_flight": self.gate.active if self.gate else None,
+                "peak_in_flight": self.gate.peak if self.gate else None,
+            }
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+_LIMIT_KEYS = ("rpm", "tpm", "max_in_flight")
+
+
+def _has_limits(settings: Any) -> bool:
+    return isinstance(settings, Mapping) and any(settings.get(key) for key in _LIMIT_KEYS)
+
+
+def _limits(settings: Mapping[str, Any]) -> Tuple[Any, ...]:
+    return tuple(settings.get(key) for key in _LIMIT_KEYS)
+
+
+def resolve_limiters(provider: str, model: str, rate_limit: Any) -> list[RateLimiter]:
+    """Limiters that apply to a call: the provider-wide one, then the model override.
+
+    ``rate_limit`` is the ``providers.<name>.rate_limit`` block::
+
+        rate_limit:
+          rpm: 60
+          max_in_flight: 4
+          models:
+            gemini-2.5-pro: {rpm: 20, tpm: 200000}
+
+    Limiters live for the process, keyed by scope; when the block's limits
+    differ from the cached limiter's (a config reload), a fresh one replaces it.
+    """
+    if not isinstance(rate_limit, Mapping):
+        return []
+    scopes: list[tuple[str, Mapping[str, Any]]] = []
+    if _has_limits(rate_limit):
+        scopes.append((provider, rate_limit))
+    models = rate_limit.get("models")
+    if isinstance(models, Mapping) and _has_limits(models.get(model)):
+        scopes.append((f"{provider}/{model}", models[model]))
+
+    limiters = []
+    with _LIMITERS_LOCK:
+        for name, settings in scopes:
+            limiter = _LIMITERS.get(name)
+            if limiter is not None and limiter.limits != _limits(settings):
+                logger.info(f"[LLM_LIMITS] Limits for {name} changed to {dict(zip(_LIMIT_KEYS, _limits(settings)))}")
+                limiter = None
+            if limiter is None:
+                limiter = RateLimiter.from_settings(name, settings)
+                _LIMITERS[name] = limiter
+            limiters.append(limiter)
+    return limiters
+
+
+@contextlib.asynccontextmanager
+async def limited(limiters: list[RateLimiter], estimated_tokens: int = 0) -> AsyncIterator[Dict[str, Any]]:
+    """Hold every limiter for the duration of one call.
+
+    Yields a dict: read ``queued_seconds``; set ``actual_tokens`` once known so
+    the tokens/min budget is corrected.
+    """
+    slot: Dict[str, Any] = {"queued_seconds": 0.0, "actual_tokens": None}
+    acquired: list[RateLimiter] = []
+    try:
+        try:
+            for limiter in limiters:
+                slot["queued_seconds"] += await limiter.acquire(estimated_tokens)
+                acquired.append(limiter)
+        except asyncio.CancelledError:
+            for limiter in acquired:
+                limiter.refund(estimated_tokens)
+            raise
+        if slot["queued_seconds"] >= 1.0:
+            names = ", ".join(limiter.name for limiter in limiters)
+            logger.info(f"[LLM_LIMITS] Queued {slot['queued_seconds']:.1f}s for {names}")
+        yield slot
+    finally:
+        for limiter in reversed(acquired):
+            limiter.release(estimated_tokens, slot["actual_tokens"])
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+def reset_limiters() -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
@@ -0,0 +1,168 @@
+"""Retry policy shared by every LLM provider call made through ``Client``.
+
+Errors are classified into retryable kinds (timeouts, rate limiting, 5xx,
+dropped connections, empty or truncated output); everything else is raised
+immediately. Backoff is exponential with full jitter, honours ``Retry-After``
+and never sleeps past the policy's total deadline.
+
+Output counts as truncated when the provider says it stopped at the token
+limit: providers report their finish reason (``finish_reason: length``,
+``MAX_TOKENS``, Ollama's ``done_reason``) with ``record_finish_reason``. The
+unclosed-fence heuristic misfires on valid answers that mention ``` in
+prose or nest fences, so roles opt into it with
+``retry.detect_unclosed_fences``.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+import httpx
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+TRUNCATION_FINISH_REASONS = {"length", "max_tokens"}
+
+_FINISH: contextvars.ContextVar[Optional[Dict[str, str]]] = contextvars.ContextVar("llm_finish_reason", default=None)
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    deadline_seconds: float = 900.0
+    retry_truncated: bool = True
+    detect_unclosed_fences: bool = False
+
+    @classmethod
+    def from_settings(cls, *layers: Any) -> "RetryPolicy":
+        """Build from config mappings; later layers (e.g. the role) override earlier ones."""
+        policy = cls()
+        for layer in layers:
+            if not isinstance(layer, Mapping):
+                continue
+            for field in ("max_attempts", "base_delay", "max_delay", "deadline_seconds", "retry_truncated", "detect_unclosed_fences"):
+                if layer.get(field) is not None:
+                    current = getattr(policy, field)
+                    setattr(policy, field, type(current)(layer[field]))
+        policy.max_attempts = max(1, policy.max_attempts)
+        return policy
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number ``attempt`` (1-based): full jitter, floored by Retry-After."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class TruncatedOutputError(RuntimeError):
+    """Raised internally when a provider returns empty or visibly cut-off text."""
+
+    def __init__(self, kind: str, text: str) -> None:
+        super().__init__(kind)
+        self.kind = kind
+        self.text = text
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    # google-genai APIError and similar SDK errors expose the HTTP status as ``code``.
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    return None
+
+
+def classify_error(exc: BaseException) -> Optional[str]:
+    """Return the retryable error kind, or None when retrying cannot help."""
+    if isinstance(exc, TruncatedOutputError):
+        return exc.kind
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    status = _status_code(exc)
+    if status is not None:
+        if status == 429:
+            return "rate_limited"
+        if status in RETRYABLE_STATUS:
+            return "server_error" if status >= 500 else f"http_{status}"
+        return None
+    if isinstance(exc, httpx.TransportError):
+        return "connection"
+    message = str(exc)
+    # CLI providers surface failures as RuntimeError("<LABEL>_TIMEOUT") etc.
+    if message.endswith("_TIMEOUT"):
+        return "timeout"
+    if message.endswith("_EMPTY_RESPONSE"):
+        return "empty_output"
+    if "RESOURCE_EXHAUSTED" in message or "Too Many Requests" in message:
+        return "rate_limited"
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@contextlib.contextmanager
+def finish_reason_scope() -> Iterator[Dict[str, str]]:
+    """Collect the finish reason a provider reports during one call (``{"reason": ...}``).
+
+    The holder is shared by reference, so providers running in a worker
+    thread (``asyncio.to_thread`` copies the context) still report into it.
+    """
+    holder: Dict[str, str] = {}
+    token = _FINISH.set(holder)
+    try:
+        yield holder
+    finally:
+        _FINISH.reset(token)
+
+
+def record_finish_reason(reason: Any) -> None:
+    """Called by providers with the finish reason of the response they return; no-op outside a scope."""
+    holder = _FINISH.get()
+    if holder is not None and reason:
+        holder["reason"] = str(reason)
+
+
+def output_problem(
+    text: Optional[str], finish_reason: Optional[str] = None, *, check_fences: bool = False
+) -> Optional[str]:
+    """Detect responses that are empty or were cut off at the token limit.
+
+    With ``check_fences`` an odd number of ``` fences also counts as
+    truncation, for providers that report no finish reason.
+    """
+    if text is None or not text.strip():
+        return "empty_output"
+    # google-genai reports enums such as ``FinishReason.MAX_TOKENS``.
+    if finish_reason and str(finish_reason).rsplit(".", 1)[-1].lower() in TRUNCATION_FINISH_REASONS:
+        return "truncated_output"
+    if check_fences and text.count("```") % 2 == 1:
+        return "truncated_output"
+    return None
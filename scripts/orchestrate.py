@@ -2,20 +2,37 @@
 from __future__ import annotations
 import os, sys, yaml, pathlib, subprocess, json, datetime, shutil
 import asyncio
+import copy
 from typing import Any, Dict
 from common import load_config, ensure_dirs
+from llm import (
+    cli_pool_stats,
+    client_factory_stats,
+    close_cli_pools,
+    close_http_clients,
+    limiter_stats,
+    provider_stats,
+    response_cache_stats,
+)
 from logger import logger # Import the logger
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from a2a.executors import get_executor, RoleExecutor
-from a2a.metrics import save_metrics, instrumented
+from a2a.client import a2a_client_stats, close_a2a_clients
+from a2a.executors import get_executor, LocalExecutor, RemoteExecutor, RoleExecutor
+from a2a.metrics import record_metric, save_metrics, instrumented
 from scripts.run_ba import generate_requirements
 from scripts.run_product_owner import main as run_po
 from scripts.run_architect import run_architect_job
 from scripts.run_dev import implement_story
-from scripts.run_qa import run_quality_checks
+from scripts.run_qa import run_quality_checks_async
+from scripts.pytest_server import close_warm_pytest_servers, warm_server_stats
+from scripts.qa_cache import qa_cache_stats
+from scripts.story_dag import StoryDAG, story_statuses
+from scripts.story_store import get_story_store, story_version
+from scripts.work_queue import WorkItem, WorkQueue
+from scripts.workspaces import Workspace, WorkspaceManager
 
 ROLE_SKILLS = {
     "business_analyst": "extract_requirements",
@@ -69,13 +86,20 @@ async def _local_architect_handler(**payload: Any) -> Dict[str, Any]:
 
 async def _local_developer_handler(**payload: Any) -> Dict[str, Any]:
     story_id = payload.get("story_id")
+    story = payload.get("story") if isinstance(payload.get("story"), dict) else None
     retries_raw = payload.get("retries", payload.get("DEV_RETRIES", 3))
     try:
         retries = int(retries_raw)
     except (TypeError, ValueError):
         retries = 3
     try:
-        result = await implement_story(story_id=story_id, retries=retries)
+        result = await implement_story(
+            story_id=story_id,
+            retries=retries,
+            story=story,
+            story_version=payload.get("story_version"),
+            workspace=payload.get("workspace") or None,
+        )
         # Task: fix-metadata-persistence - Handle error dict returned by implement_story
         # If result already has status="error", return it directly to preserve model_info
         if result.get("status") == "error":
@@ -92,6 +116,13 @@ async def _local_developer_handler(**payload: Any) -> Dict[str, Any]:
         return {"status": "exception", "error": str(exc), "story_id": story_id}
 
 
+def _payload_flag(payload: Dict[str, Any], key: str, default: bool) -> bool:
+    value = payload.get(key, default)
+    if isinstance(value, str):
+        return value.lower() not in {"0", "false", "no"}
+    return bool(value)
+
+
 async def _local_qa_handler(**payload: Any) -> Dict[str, Any]:
     allow_flag = payload.get("allow_no_tests", True)
     if isinstance(allow_flag, str):
@@ -100,10 +131,16 @@ async def _local_qa_handler(**payload: Any) -> Dict[str, Any]:
         allow_no_tests = bool(allow_flag)
     story_id = payload.get("story_id", "") or ""
 
-    result = await asyncio.to_thread(
-        run_quality_checks,
+    # Suites run as asyncio subprocesses, so QA no longer needs a worker thread.
+    result = await run_quality_checks_async(
         allow_no_tests=allow_no_tests,
         story=story_id,
+        project_root=payload.get("project_root", "") or "",
+        impacted_only=_payload_flag(payload, "impacted_tests", True),
+        full_suite_gate=_payload_flag(payload, "full_suite_gate", QA_FULL_SUITE_GATE),
+        xdist_workers=payload.get("xdist_workers", QA_XDIST_WORKERS),
+        warm_pytest=_payload_flag(payload, "warm_pytest", QA_WARM_PYTEST),
+        use_cache=_payload_flag(payload, "use_cache", QA_RESULT_CACHE),
     )
     status = result.get("status", "unknown")
     return {"status": status, **result}
@@ -159,6 +196,31 @@ DEV_RETRY_THRESHOLD = max(
         or 3
     ),
 )
+# Architect reviews started per iteration (they share worker slots with dev/QA).
+ARCHITECT_REVIEWS_PER_ITERATION = 2
+# How many ready stories run at once (STORY_PARALLELISM env overrides config).
+STORY_PARALLELISM = max(
+    1,
+    int(
+        os.environ.get("STORY_PARALLELISM")
+        or (_config.get("pipeline") or {}).get("story_parallelism", 3)
+        or 3
+    ),
+)
+# Each in-flight story gets a copy-on-write clone of project/ (STORY_WORKSPACES=0 disables).
+_WORKSPACE_CONFIG = (_config.get("pipeline") or {}).get("workspaces") or {}
+USE_STORY_WORKSPACES = str(
+    os.environ.get("STORY_WORKSPACES") or _WORKSPACE_CONFIG.get("enabled", True)
+).lower() not in {"0", "false", "no"}
+WORKSPACES = WorkspaceManager(mode=str(_WORKSPACE_CONFIG.get("mode", "hardlink")))
+# QA runs the impacted tests first; the full-suite gate re-runs everything once they pass,
+# catching what the import graph cannot see (fixtures, data files, dynamic imports).
+_QA_CONFIG = (_config.get("pipeline") or {}).get("qa") or {}
+QA_IMPACTED_TESTS = bool(_QA_CONFIG.get("impacted_tests", True))
+QA_FULL_SUITE_GATE = bool(_QA_CONFIG.get("full_suite_gate", True))
+QA_XDIST_WORKERS = _QA_CONFIG.get("xdist_workers", "auto") or None
+QA_WARM_PYTEST = bool(_QA_CONFIG.get("warm_pytest", False))
+QA_RESULT_CACHE = bool(_QA_CONFIG.get("result_cache", True))
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 PLAN = ROOT / "planning"
@@ -166,14 +228,17 @@ STORIES_P = PLAN / "stories.yaml"
 NOTES_P = PLAN / "notes.md"
 DEV_FAILED_REPORT = ROOT / "artifacts" / "dev" / "failed_stories.md"
 
+STORY_STORE = get_story_store(STORIES_P)
+
 def load_stories():
-    """Load stories with automatic YAML error recovery"""
-    if not STORIES_P.exists():
+    """Current backlog from the story journal; stories.yaml is imported when edited outside it."""
+    stories = STORY_STORE.stories(parse=_parse_stories_text)
+    if not stories and not STORIES_P.exists():
         logger.info("[loop] planning/stories.yaml not found.")
-        return []
-
-    text = STORIES_P.read_text(encoding="utf-8")
+    return stories
 
+def _parse_stories_text(text: str) -> list:
+    """Parse stories.yaml with automatic YAML error recovery"""
     # Primary loading attempt
     try:
         data = yaml.safe_load(text)
@@ -207,8 +272,19 @@ def load_stories():
             return []
 
 def save_stories(stories):
-    STORIES_P.write_text(yaml.safe_dump(stories, sort_keys=False, allow_unicode=True), encoding="utf-8")
-    logger.debug("[loop] Stories saved to planning/stories.yaml")
+    """Journal every story that changed (and drop removed ones); cheap when little changed."""
+    changed = STORY_STORE.save(stories)
+    logger.debug(f"[loop] Journaled {changed} story changes")
+
+def save_story(story):
+    """Journal one story's transition without touching its siblings."""
+    STORY_STORE.put(story)
+
+def materialize_stories():
+    """Refresh the planning/stories.yaml view from the journal."""
+    if STORY_STORE.journal_path.exists():
+        STORY_STORE.materialize()
+        logger.debug("[loop] Stories view written to planning/stories.yaml")
 
 def recover_yaml_automatic(text: str) -> list:
     """Try to recover YAML automatically with repair strategies"""
@@ -422,19 +498,23 @@ async def run_architect_for_review(story: Dict[str, Any], iteration_count: int =
     result.setdefault("story_id", story_id)
     return result
 
-def next_todo_batch(stories, batch_size: int = 3):
-    """Selects a batch of 'todo' stories."""
-    batch = []
-    for s in stories:
-        if s.get("status","").lower() == "todo":
-            batch.append(s)
-            if len(batch) >= batch_size:
-                break
-    if batch:
-        logger.debug(f"[loop] Found batch of {len(batch)} 'todo' stories.")
-    else:
-        logger.debug("[loop] No 'todo' stories found.")
-    return batch
+def _block_dependency_cycles(dag: StoryDAG, stories) -> None:
+    """Mark 'todo' stories on a depends_on cycle as blocked so they are not waited on forever."""
+    for story_id, missing in dag.unknown.items():
+        logger.warning(f"[loop] [DEPENDENCY] {story_id} depends on unknown stories {missing}; ignoring them.")
+    if not dag.cycles:
+        return
+    by_id = {str(s.get("id")): s for s in stories}
+    for cycle in dag.cycles:
+        newly_blocked = [
+            sid for sid in cycle
+            if str(by_id[sid].get("status", "")).lower() == "todo"
+        ]
+        for sid in newly_blocked:
+            by_id[sid]["status"] = "blocked_dependency_cycle"
+        if newly_blocked:
+            logger.error(f"[loop] [DEPENDENCY] Cycle detected: {' -> '.join(cycle)}. Blocked {newly_blocked}.")
+            append_note(f"- Dependency cycle {' -> '.join(cycle)}: blocked {', '.join(newly_blocked)} (fix depends_on)")
 
 
 def find_in_review_stories(stories):
@@ -445,31 +525,27 @@ def find_in_review_stories(stories):
     return in_review
 
 def check_and_activate_waiting_stories(stories, completed_story_id):
-    """Check if ANY quality_gate_waiting stories can be activated after ANY test story completes"""
-    activated = []
-
-    # When ANY story that involves tests completes, it potentially frees up ALL quality_gate_waiting stories
-    # This is more intelligent - if a story adds or improves tests, ALL waiting stories can now try QA
+    """Re-activate quality_gate_waiting stories unblocked by ``completed_story_id``.
 
-    story_id_upper = completed_story_id.upper()
-    is_test_related_story = (
-        "TEST" in story_id_upper or
-        "QA" in story_id_upper or
-        # Any story that adds substantial testing/code coverage potential
-        True  # For now: any successful completion could enable waiting stories
-    )
-    logger.debug(f"[loop] Completed story {completed_story_id} is test-related: {is_test_related_story}")
-
-
-    if is_test_related_story:
-        # Activate ALL stories currently in quality_gate_waiting
-        for story in stories:
-            if story.get("status", "").lower() == "quality_gate_waiting":
-                # Activate this waiting story back to todo for QA retry
-                story["status"] = "todo"
-                activated.append(story["id"])
-                logger.info(f"[loop] [DEPENDENCY] Activated waiting story {story['id']} after testing capacity improvement by {completed_story_id}")
+    A waiting story that declares dependencies goes back to 'todo' only once all of
+    them are done and the completed story is one of them. Stories without declared
+    dependencies are retried after any story completes, since it may have added the
+    tests or code they were waiting on.
+    """
+    activated = []
+    dag = StoryDAG(stories)
+    statuses = story_statuses(stories)
 
+    for story in stories:
+        if story.get("status", "").lower() != "quality_gate_waiting":
+            continue
+        story_id = str(story.get("id"))
+        deps = dag.deps.get(story_id, [])
+        if deps and (completed_story_id not in deps or dag.unmet(story_id, statuses)):
+            continue
+        story["status"] = "todo"
+        activated.append(story["id"])
+        logger.info(f"[loop] [DEPENDENCY] Activated waiting story {story['id']} after {completed_story_id} completed")
 
     return activated
 
@@ -665,6 +741,27 @@ def analyze_failure_and_suggest_model(story: Dict[str, Any], config: Dict[str, A
     }
 
 
+def _story_workspaces_enabled(skip_qa: bool) -> bool:
+    """Workspaces only apply when Dev (and QA) run in this process and can see the clone."""
+    if not USE_STORY_WORKSPACES:
+        return False
+    roles = ("developer",) if skip_qa else ("developer", "qa")
+    return all(isinstance(_get_executor_for_role(role), LocalExecutor) for role in roles)
+
+
+async def _merge_story_workspace(story: dict[str, Any], workspace: Workspace) -> bool:
+    """Merge a passing story's workspace into project/; on conflict send the story back to todo."""
+    sid = story["id"]
+    result = await asyncio.to_thread(WORKSPACES.merge, workspace)
+    if result.ok:
+        return True
+    story["status"] = "todo"
+    story.setdefault("metadata", {})["last_failure_reason"] = "merge_conflict"
+    append_note(f"- {sid} conflicto al integrar ({', '.join(result.conflicts)}); se reintenta sobre project/ actualizado.")
+    logger.warning(f"[loop] {sid} -> todo (merge conflict on {len(result.conflicts)} files)")
+    return False
+
+
 async def _process_story(
     story: dict[str, Any],
     *,
@@ -674,7 +771,39 @@ async def _process_story(
     max_recovery_attempts: int = 2,
     config: Dict[str, Any] | None = None,
 ) -> None:
-    """Process a single story through Dev and QA (or Dev only if skip_qa=True)."""
+    """Process a single story through Dev and QA (or Dev only if skip_qa=True).
+
+    With story workspaces enabled, Dev writes and QA runs inside the story's
+    clone of project/; the changes reach project/ only once the story passes.
+    """
+    workspace = None
+    if _story_workspaces_enabled(skip_qa):
+        workspace = await asyncio.to_thread(WORKSPACES.create, story["id"])
+    try:
+        await _run_story(
+            story,
+            workspace=workspace,
+            allow_no_tests=allow_no_tests,
+            status_no_tests=status_no_tests,
+            skip_qa=skip_qa,
+            max_recovery_attempts=max_recovery_attempts,
+            config=config,
+        )
+    finally:
+        if workspace is not None:
+            await asyncio.to_thread(WORKSPACES.discard, workspace)
+
+
+async def _run_story(
+    story: dict[str, Any],
+    *,
+    workspace: Workspace | None,
+    allow_no_tests: bool,
+    status_no_tests: str,
+    skip_qa: bool,
+    max_recovery_attempts: int,
+    config: Dict[str, Any] | None,
+) -> None:
     sid = story["id"]
 
     # Task: recovery-system - Check if recovery budget exceeded
@@ -690,9 +819,24 @@ async def _process_story(
     append_note(f"- Dev implementando {sid} (iteración {story_dev_attempts[sid]})")
     logger.info(f"[loop] Dev implementing {sid} (attempt {story_dev_attempts[sid]})")
 
-    dev_payload = {"story_id": sid, "retries": os.environ.get("DEV_RETRIES", "3")}
+    # Ship the story itself (plus a version stamp) so Dev never re-reads stories.yaml.
+    snapshot = copy.deepcopy(story)
+    snapshot_version = story_version(snapshot)
+    dev_payload = {
+        "story_id": sid,
+        "story": snapshot,
+        "story_version": snapshot_version,
+        "retries": os.environ.get("DEV_RETRIES", "3"),
+    }
+    if workspace is not None:
+        dev_payload["workspace"] = str(workspace.root)
     dev_result = await execute_role("developer", dev_payload)
     dev_status = dev_result.get("status", "unknown")
+    stored = STORY_STORE.get(sid)
+    if stored is not None and story_version(stored) not in (snapshot_version, story_version(story)):
+        # Someone outside this loop (a remote architect, a manual edit) changed the story mid-run.
+        logger.warning(f"[loop] {sid} changed in the story store while Dev worked on version {snapshot_version}")
+        append_note(f"- {sid}: story changed during Dev run (snapshot {snapshot_version}); review the result")
 
     # Task: fix-metadata-persistence - Register model_history from dev result
     model_info = dev_result.get("model_info")
@@ -769,6 +913,8 @@ async def _process_story(
 
     # Task: recovery-system - Skip QA when LOOP_MODE=dev_only
     if skip_qa:
+        if workspace is not None and not await _merge_story_workspace(story, workspace):
+            return
         story["status"] = "done"
         story_dev_attempts.pop(sid, None)
         story_arch_attempts.pop(sid, None)
@@ -776,7 +922,17 @@ async def _process_story(
         append_note(f"- {sid} aprobado (dev_only mode, sin QA).")
         return
 
-    qa_payload = {"allow_no_tests": allow_no_tests, "story_id": sid}
+    qa_payload = {
+        "allow_no_tests": allow_no_tests,
+        "story_id": sid,
+        "impacted_tests": QA_IMPACTED_TESTS,
+        "full_suite_gate": QA_FULL_SUITE_GATE,
+        "xdist_workers": QA_XDIST_WORKERS,
+        "warm_pytest": QA_WARM_PYTEST,
+        "use_cache": QA_RESULT_CACHE,
+    }
+    if workspace is not None:
+        qa_payload["project_root"] = str(workspace.project)
     qa_result = await execute_role("qa", qa_payload)
     qa_status = qa_result.get("status", "unknown")
     qa_code = int(qa_result.get("code", 0 if qa_status == "pass" else 1))
@@ -789,6 +945,8 @@ async def _process_story(
         qa_status = qa_report.get("status", qa_status)
 
     if qa_status == "pass":
+        if workspace is not None and not await _merge_story_workspace(story, workspace):
+            return
         story["status"] = "done"
         story_dev_attempts.pop(sid, None)
         story_arch_attempts.pop(sid, None)
@@ -848,6 +1006,52 @@ async def _process_story(
     logger.info(f"[loop] {sid} -> {story['status']} (QA fail - severity: {severity})")
 
 
+async def _architect_review(story: dict[str, Any]) -> None:
+    """Architect intervention for a story in review; runs as its own work-queue task."""
+    story_id = story["id"]
+    story_arch_attempts[story_id] = story_arch_attempts.get(story_id, 0) + 1
+
+    logger.info(f"[loop] Architect adjusting criteria for {story_id}")
+    arch_result = await run_architect_for_review(
+        story,
+        story_arch_attempts[story_id],
+    )
+    if arch_result.get("status") == "ok":
+        _merge_story_from_disk(story)
+        attempt_count = story_arch_attempts[story_id]
+        was_force_approved = attempt_count >= FORCE_APPROVAL_THRESHOLD and story.get("priority") in ["P1", "P0"]
+        if was_force_approved:
+            story["status"] = "done_force_architect"
+            append_note(
+                f"- Architect FORCE APPROVED {story_id} (immediate, attempt {attempt_count}, "
+                f"P{story.get('priority')} priority)"
+            )
+            logger.info(f"[loop] Architect FORCE APPROVED {story_id} (iteration {attempt_count})")
+            story_dev_attempts.pop(story_id, None)
+            story_arch_attempts.pop(story_id, None)
+        else:
+            attempt = attempt_count
+            story["status"] = "todo"
+            story_arch_attempts[story_id] = 0
+            append_note(f"- Architect adjusted criteria for {story_id} (attempt {attempt}) → Dev must rework")
+            logger.info(f"[loop] Architect adjusted criteria for {story_id} → Dev must rework (counter reset)")
+    else:
+        detail = arch_result.get("detail") or arch_result.get("error") or arch_result
+        logger.warning(f"[loop] Architect could not adjust criteria for {story_id} (detail={detail})")
+        append_note(f"- Architect could not adjust criteria for {story_id} (detail={detail})")
+
+
+def _merge_story_from_disk(story: dict[str, Any]) -> None:
+    """Pick up the architect's edits to one story without clobbering in-flight siblings."""
+    for fresh in load_stories():
+        if isinstance(fresh, dict) and fresh.get("id") == story["id"]:
+            status = story.get("status")
+            story.clear()
+            story.update(fresh)
+            story["status"] = status
+            return
+
+
 async def _process_iteration(
     iteration_index: int,
     stories: list[dict[str, Any]],
@@ -857,105 +1061,145 @@ async def _process_iteration(
     status_no_tests: str,
     skip_qa: bool = False,
     max_recovery_attempts: int = 2,
+    workers: int = STORY_PARALLELISM,
 ) -> bool:
-    logger.info(f"[loop] Iteración {iteration_index}: processing {len(stories)} stories")
-
-    # 1. Architect intervention (sequential, high-level task)
-    in_review_stories = find_in_review_stories(stories)
-    if in_review_stories and enable_architect_intervention:
-        logger.info(f"[loop] {len(in_review_stories)} stories in review need architect intervention")
-        for story in in_review_stories[:2]:
-            story_id = story["id"]
-            story_arch_attempts[story_id] = story_arch_attempts.get(story_id, 0) + 1
-
-            logger.info(f"[loop] Architect adjusting criteria for {story_id}")
-            arch_result = await run_architect_for_review(
-                story,
-                story_arch_attempts[story_id],
-            )
-            if arch_result.get("status") == "ok":
-                attempt_count = story_arch_attempts[story_id]
-                was_force_approved = attempt_count >= FORCE_APPROVAL_THRESHOLD and story.get("priority") in ["P1", "P0"]
-                if was_force_approved:
-                    story["status"] = "done_force_architect"
-                    append_note(
-                        f"- Architect FORCE APPROVED {story_id} (immediate, attempt {attempt_count}, "
-                        f"P{story.get('priority')} priority)"
-                    )
-                    logger.info(f"[loop] Architect FORCE APPROVED {story_id} (iteration {attempt_count})")
-                    story_dev_attempts.pop(story_id, None)
-                    story_arch_attempts.pop(story_id, None)
-                else:
-                    attempt = attempt_count
-                    story["status"] = "todo"
-                    story_arch_attempts[story_id] = 0
-                    append_note(f"- Architect adjusted criteria for {story_id} (attempt {attempt}) → Dev must rework")
-                    logger.info(f"[loop] Architect adjusted criteria for {story_id} → Dev must rework (counter reset)")
-            else:
-                detail = arch_result.get("detail") or arch_result.get("error") or arch_result
-                logger.warning(f"[loop] Architect could not adjust criteria for {story_id} (detail={detail})")
-                append_note(f"- Architect could not adjust criteria for {story_id} (detail={detail})")
-        save_stories(stories) # Save changes from architect
-        stories = load_stories() # Reload to get a clean state
-
-    # 2. Batch processing of 'todo' stories
-    story_batch = next_todo_batch(stories)
-    if not story_batch:
-        if not in_review_stories: # Only end if there's nothing in review either
-             logger.info("[loop] Backlog vacío o sin 'todo'. Fin.")
-             return False
-        else:
-             logger.info("[loop] No 'todo' stories, but some are in review. Continuing iteration.")
-             return True
+    """Drain ready work with ``workers`` slots; returns False when there is nothing left to do.
 
-
-    # Mark batch as in_progress and save to lock them
-    for story in story_batch:
+    Architect reviews (capped per iteration) and dev/QA runs share the slots. A
+    story gets one dev pass per iteration, plus one more if the architect sends
+    it back. Stories are saved after every transition.
+    """
+    logger.info(f"[loop] Iteración {iteration_index}: processing {len(stories)} stories with {workers} workers")
+
+    dag = StoryDAG(stories)
+    _block_dependency_cycles(dag, stories)
+    if dag.cycles:
+        save_stories(stories)
+    by_id = {str(s["id"]): s for s in stories if isinstance(s, dict) and s.get("id")}
+    dev_runs: dict[str, int] = {}
+    arch_runs: dict[str, int] = {}
+    cfg = load_config()  # loaded once for all stories
+
+    def pending() -> list[WorkItem]:
+        items: list[WorkItem] = []
+        if enable_architect_intervention:
+            budget = ARCHITECT_REVIEWS_PER_ITERATION - sum(arch_runs.values())
+            in_review = [
+                sid for sid, s in by_id.items()
+                if s.get("status", "").lower() == "in_review" and not arch_runs.get(sid)
+            ]
+            items.extend(WorkItem("architect", sid) for sid in in_review[: max(0, budget)])
+        for story in dag.ready(stories):
+            sid = str(story["id"])
+            if dev_runs.get(sid, 0) <= arch_runs.get(sid, 0):
+                items.append(WorkItem("dev", sid))
+        return items
+
+    async def run(item: WorkItem) -> None:
+        story = by_id[item.story_id]
+        if item.kind == "architect":
+            arch_runs[item.story_id] = arch_runs.get(item.story_id, 0) + 1
+            try:
+                await _architect_review(story)
+            finally:
+                # The architect may rewrite stories.yaml wholesale; re-assert the in-memory state.
+                save_stories(stories)
+            return
+        dev_runs[item.story_id] = dev_runs.get(item.story_id, 0) + 1
         story["status"] = "in_progress"
-        logger.info(f"[loop] Story {story['id']} marked as 'in_progress'.")
-    save_stories(stories)
-
-    # Process batch concurrently
-    # Load config once for all stories
-    cfg = load_config()
-    tasks = [
-        _process_story(
-            story,
-            allow_no_tests=allow_no_tests,
-            status_no_tests=status_no_tests,
-            skip_qa=skip_qa,
-            max_recovery_attempts=max_recovery_attempts,
-            config=cfg,
-        )
-        for story in story_batch
-    ]
-    await asyncio.gather(*tasks)
-
-    # 3. Final state saving and dependency checks
-    # The story objects in story_batch are modified in-place by _process_story.
-    # We need to merge these changes back into the main list of stories.
-    story_map = {s["id"]: s for s in stories}
-    for processed_story in story_batch:
-        story_map[processed_story["id"]] = processed_story
-    
-    all_stories = list(story_map.values())
-
-    completed_in_batch = [s["id"] for s in story_batch if s.get("status") == "done"]
-    
-    if completed_in_batch:
-        activated_waiters = []
-        for sid in completed_in_batch:
-            # Pass the full, updated list to the check function
-            activated_waiters.extend(check_and_activate_waiting_stories(all_stories, sid))
-        if activated_waiters:
-             logger.info(
-                f"[loop] ✅ DEPENDENCY RESOLUTION: Activated {len(activated_waiters)} waiting stories: {activated_waiters}"
+        logger.info(f"[loop] Story {item.story_id} marked as 'in_progress'.")
+        save_story(story)
+        activated = []
+        try:
+            await _process_story(
+                story,
+                allow_no_tests=allow_no_tests,
+                status_no_tests=status_no_tests,
+                skip_qa=skip_qa,
+                max_recovery_attempts=max_recovery_attempts,
+                config=cfg,
             )
-
-    save_stories(all_stories)
+            if story.get("status") == "done":
+                activated = check_and_activate_waiting_stories(stories, item.story_id)
+                if activated:
+                    logger.info(f"[loop] ✅ DEPENDENCY RESOLUTION: Activated {len(activated)} waiting stories: {activated}")
+        except Exception as exc:
+            # Left 'in_progress', neither this story nor its dependents would ever be scheduled again.
+            story["status"] = "todo"
+            append_note(f"- {item.story_id} devuelta a 'todo' tras un error inesperado: {exc}")
+            raise
+        finally:
+            save_story(story)
+            for story_id in activated:
+                save_story(by_id[str(story_id)])
+
+    queue = WorkQueue(pending, run, workers=workers)
+    stats = await queue.run()
+
+    if not stats["tasks"] and not stats["failed"]:
+        if not find_in_review_stories(stories):
+            logger.info("[loop] Backlog vacío o sin 'todo'. Fin.")
+            return False
+        logger.info("[loop] No 'todo' stories, but some are in review. Continuing iteration.")
+        return True
+
+    if stats["failed"]:
+        logger.error(
+            f"[loop] Iteration {iteration_index}: failed tasks {stats['failed']}; "
+            "their stories are back in 'todo' for the next iteration"
+        )
+    logger.info(
+        f"[loop] Iteration {iteration_index} scheduler: tasks={stats['tasks']} failed={stats['failed']} "
+        f"slot_utilization={stats['slot_utilization']:.0%} "
+        f"queue_wait mean={stats['queue_wait_mean_seconds']}s max={stats['queue_wait_max_seconds']}s"
+    )
+    record_metric({
+        "role": "scheduler",
+        "iteration": iteration_index,
+        **stats,
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+    })
     return True
 
 async def main():
+    try:
+        return await _run_loops()
+    finally:
+        try:
+            materialize_stories()  # the journal is authoritative; keep the YAML view current even on errors
+        except Exception as exc:
+            logger.error(f"[loop] Could not write planning/stories.yaml view: {exc}")
+        for cache_dir, stats in response_cache_stats().items():
+            logger.info(f"[loop] LLM response cache {cache_dir}: {stats}")
+        for limiter_name, stats in limiter_stats().items():
+            logger.info(f"[loop] LLM rate limiter {limiter_name}: {stats}")
+        token_stats = provider_stats().get("vertex_token") or {}
+        if token_stats.get("refreshes"):
+            logger.info(f"[loop] Vertex token cache: {token_stats}")
+        for command, stats in cli_pool_stats().items():
+            logger.info(f"[loop] Warm CLI pool {command}: {stats}")
+        logger.info(f"[loop] LLM client factory: {client_factory_stats()}")
+        if WORKSPACES.stats["created"]:
+            logger.info(f"[loop] Story workspaces: {WORKSPACES.stats}")
+        for cache_path, stats in qa_cache_stats().items():
+            if stats["hits"] + stats["misses"]:
+                rate = stats["hits"] / (stats["hits"] + stats["misses"])
+                logger.info(f"[loop] QA result cache {cache_path}: {stats} (hit rate {rate:.0%})")
+        for python, stats in warm_server_stats().items():
+            logger.info(f"[loop] Warm pytest server {python}: {stats}")
+        for agent_url, stats in a2a_client_stats().items():
+            logger.info(f"[loop] A2A client {agent_url}: {stats}")
+        for role, executor in _ROLE_EXECUTORS.items():
+            if isinstance(executor, RemoteExecutor) and executor.pool is not None and len(executor.pool.replicas) > 1:
+                logger.info(f"[loop] A2A {role} replicas ({executor.pool.policy}): {executor.pool.stats()}")
+        close_warm_pytest_servers()
+        # Pooled provider connections and CLI workers are bound to this event loop; release them before it closes.
+        await close_cli_pools()
+        await close_http_clients()
+        await close_a2a_clients()
+
+
+async def _run_loops():
     max_loops = int(os.environ.get("MAX_LOOPS", "1"))
     allow_no_tests = os.environ.get("ALLOW_NO_TESTS", "0") == "1"
     status_no_tests = os.environ.get("BACKFLOW_STATUS_FOR_NO_TESTS", "in_review")
@@ -988,6 +1232,7 @@ async def main():
             skip_qa=skip_qa,
             max_recovery_attempts=max_recovery_attempts,
         )
+        materialize_stories()
         if not should_continue:
             save_metrics()
             return 0
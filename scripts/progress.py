@@ -0,0 +1,51 @@
+"""Progress events from role code to whoever is listening.
+
+Role code reports what it is doing with ``emit_progress("file_written",
+path=...)``. Nothing listens by default and the call is a no-op; an A2A agent
+installs a sink per task (see ``a2a.tasks``) and streams the events to the
+client over ``message/stream``, and ``RemoteExecutor`` re-emits what it
+receives so progress keeps flowing when agents call agents.
+
+Event kinds in use:
+
+* ``phase`` (``name``): the role entered a phase; ``RemoteExecutor`` applies
+  per-phase deadlines to these.
+* ``llm_token`` (``text``): a streamed chunk of LLM output.
+* ``file_written`` (``path``, ``bytes``).
+* ``tests_started`` / ``tests_finished`` (``command``, ``rc``) and
+  ``test_failed`` (``test``, ``type``).
+
+The sink lives in a ContextVar, so concurrent tasks on one event loop (and
+the worker threads they start) each report to their own listener.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from logger import logger
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+_SINK: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar("progress_sink", default=None)
+
+
+def emit_progress(event: str, **data: Any) -> None:
+    sink = _SINK.get()
+    if sink is None:
+        return
+    try:
+        sink({"event": event, **data})
+    except Exception as exc:  # a broken listener must never fail the role
+        logger.debug(f"[progress] Dropping {event} event: {exc}")
+
+
+@contextlib.contextmanager
+def progress_sink(sink: Optional[ProgressSink]) -> Iterator[None]:
+    """Send ``emit_progress`` events from this context to ``sink``."""
+    token = _SINK.set(sink)
+    try:
+        yield
+    finally:
+        _SINK.reset(token)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
 
 from . import vertex_cli as _vertex_cli
+from .auth import token_stats as _token_stats
 
 try:
     from . import vertex_sdk as _vertex_sdk  # type: ignore
@@ -10,10 +11,33 @@ except Exception:  # pragma: no cover - sdk optional
     _vertex_sdk = None  # type: ignore
 
 ProviderFn = Callable[..., str]
+StreamProviderFn = Callable[..., AsyncIterator[str]]
+AsyncProviderFn = Callable[..., Awaitable[str]]
 
 PROVIDER_REGISTRY: Dict[str, ProviderFn] = {
     "vertex_cli": _vertex_cli.chat,
 }
 
+PROVIDER_STREAM_REGISTRY: Dict[str, StreamProviderFn] = {
+    "vertex_cli": _vertex_cli.stream_chat,
+}
+
+# Providers with a native async surface; Client awaits these instead of hopping to a thread.
+PROVIDER_ASYNC_REGISTRY: Dict[str, AsyncProviderFn] = {}
+
 if _vertex_sdk is not None:
+    PROVIDER_ASYNC_REGISTRY["vertex_sdk"] = _vertex_sdk.achat  # type: ignore[attr-defined]
     PROVIDER_REGISTRY["vertex_sdk"] = _vertex_sdk.chat  # type: ignore[attr-defined]
+    PROVIDER_STREAM_REGISTRY["vertex_sdk"] = _vertex_sdk.stream_chat  # type: ignore[attr-defined]
+
+
+async def close_provider_clients() -> None:
+    """Release pooled connections held by provider modules."""
+    _vertex_cli.close_http_client()
+    if _vertex_sdk is not None:
+        await _vertex_sdk.close_clients()  # type: ignore[attr-defined]
+
+
+def provider_stats() -> Dict[str, Any]:
+    """Runtime metrics from provider modules (currently the shared Vertex token cache)."""
+    return {"vertex_token": _token_stats()}
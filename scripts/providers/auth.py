@@ -0,0 +1,186 @@
+"""Shared Vertex access-token cache.
+
+``gcloud auth print-access-token`` costs about a second of process startup, so
+tokens are fetched once, reused until shortly before they expire and refreshed
+on a background thread while callers keep using the current one.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+# gcloud access tokens live for one hour; assume slightly less since the CLI does not report expiry.
+DEFAULT_TOKEN_LIFETIME = 55 * 60
+DEFAULT_REFRESH_MARGIN = 5 * 60
+
+TokenFetcher = Callable[[], Tuple[str, Optional[float]]]
+
+
+def gcloud_fetch_token() -> Tuple[str, Optional[float]]:
+    """Return ``(token, lifetime_seconds)``; gcloud gives no lifetime, so it is None."""
+    token = subprocess.check_output(["gcloud", "auth", "print-access-token"], text=True).strip()
+    if not token:
+        raise RuntimeError("Empty access token from gcloud")
+    return token, None
+
+
+class TokenManager:
+    """Thread-safe access-token cache with refresh-ahead.
+
+    ``get_token`` only blocks when there is no usable token. Inside the refresh
+    margin it returns the cached token and starts (at most) one background
+    refresh. Concurrent callers that find the cache empty wait on a single fetch.
+    """
+
+    def __init__(
+        self,
+        fetcher: TokenFetcher = gcloud_fetch_token,
+        *,
+        lifetime_seconds: float = DEFAULT_TOKEN_LIFETIME,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._fetcher = fetcher
+        self.lifetime_seconds = float(lifetime_seconds)
+        self.refresh_margin = float(refresh_margin)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._background: Optional[threading.Thread] = None
+        self._metrics: Dict[str, Any] = {
+            "hits": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "failures": 0,
+            "invalidations": 0,
+            "last_refresh_seconds": None,
+            "max_refresh_seconds": 0.0,
+            "total_refresh_seconds": 0.0,
+        }
+
+    def get_token(self) -> str:
+        now = self._clock()
+        with self._lock:
+            if self._token and now < self._expires_at:
+                self._count("hits")
+                if now >= self._expires_at - self.refresh_margin:
+                    self._start_background_refresh()
+                return self._token
+
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock.
+            if self._token and self._clock() < self._expires_at:
+                self._count("hits")
+                return self._token
+            return self._refresh_locked()
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the API answered 401."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+        self._count("invalidations")
+
+    def expires_at(self) -> Optional[_dt.datetime]:
+        """Wall-clock (naive UTC) expiry of the cached token, as google-auth expects."""
+        with self._lock:
+            if not self._token:
+                return None
+            remaining = self._expires_at - self._clock()
+        return _dt.datetime.utcnow() + _dt.timedelta(seconds=max(0.0, remaining))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            stats = dict(self._metrics)
+        refreshes = stats["refreshes"]
+        stats["avg_refresh_seconds"] = (
+            round(stats["total_refresh_seconds"] / refreshes, 3) if refreshes else None
+        )
+        with self._lock:
+            stats["seconds_until_expiry"] = (
+                round(self._expires_at - self._clock(), 1) if self._token else None
+            )
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._metrics_lock:
+            self._metrics[name] += 1
+
+    def _fetch(self) -> Tuple[str, float, float]:
+        started = time.perf_counter()
+        try:
+            token, lifetime = self._fetcher()
+        except Exception:
+            self._count("failures")
+            raise
+        return token, float(lifetime or self.lifetime_seconds), time.perf_counter() - started
+
+    def _store_locked(self, token: str, lifetime: float, elapsed: float) -> str:
+        self._token = token
+        self._expires_at = self._clock() + lifetime
+        with self._metrics_lock:
+            self._metrics["refreshes"] += 1
+            self._metrics["last_refresh_seconds"] = round(elapsed, 3)
+            self._metrics["total_refresh_seconds"] += elapsed
+            self._metrics["max_refresh_seconds"] = max(self._metrics["max_refresh_seconds"], round(elapsed, 3))
+        logger.debug(f"[VERTEX_AUTH] Access token refreshed in {elapsed:.2f}s")
+        return token
+
+    def _refresh_locked(self) -> str:
+        return self._store_locked(*self._fetch())
+
+    def _start_background_refresh(self) -> None:
+        if self._background is not None and self._background.is_alive():
+            return
+        self._count("background_refreshes")
+        self._background = threading.Thread(target=self._background_refresh, name="vertex-token-refresh", daemon=True)
+        self._background.start()
+
+    def _background_refresh(self) -> None:
+        # Fetch outside the lock so callers keep getting the current token meanwhile.
+        try:
+            fetched = self._fetch()
+        except Exception as exc:
+            # The current token is still valid; the next caller past expiry retries in the foreground.
+            logger.warning(f"[VERTEX_AUTH] Background token refresh failed: {exc}")
+            return
+        with self._lock:
+            self._store_locked(*fetched)
+
+    def google_credentials(self) -> Any:
+        """Expose this cache as google-auth credentials (for the genai SDK)."""
+        from google.oauth2.credentials import Credentials
+
+        def _refresh_handler(request: Any, scopes: Any) -> Tuple[str, Optional[_dt.datetime]]:
+            token = self.get_token()
+            return token, self.expires_at()
+
+        return Credentials(token=None, refresh_handler=_refresh_handler)
+
+
+_DEFAULT_MANAGER: Optional[TokenManager] = None
+_DEFAULT_MANAGER_LOCK = threading.Lock()
+
+
+def get_token_manager() -> TokenManager:
+    """Process-wide manager shared by the vertex_cli and vertex_sdk providers."""
+    global _DEFAULT_MANAGER
+    with _DEFAULT_MANAGER_LOCK:
+        if _DEFAULT_MANAGER is None:
+            _DEFAULT_MANAGER = TokenManager()
+        return _DEFAULT_MANAGER
+
+
+def token_stats() -> Dict[str, Any]:
+    return get_token_manager().stats()
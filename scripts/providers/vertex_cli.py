@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-import subprocess
 import sys
-from typing import Dict, List
+import threading
+from typing import AsyncIterator, Dict, List
 
 import httpx
 
+try:
+    from .auth import get_token_manager
+except ImportError:  # executed as a script
+    from auth import get_token_manager  # type: ignore
+
 # Import logger for debugging
 try:
     from logger import logger
@@ -15,6 +21,12 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+try:
+    from scripts.llm_retry import record_finish_reason
+except ImportError:  # executed as a script
+    def record_finish_reason(reason):  # type: ignore[no-redef]
+        return None
+
 
 def _env(name: str, default: str | None = None) -> str:
     value = os.environ.get(name, default)
@@ -23,11 +35,59 @@ def _env(name: str, default: str | None = None) -> str:
     return value
 
 
+_HTTP_CLIENT: httpx.Client | None = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _http_client(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+) -> httpx.Client:
+    """Shared keep-alive client; provider calls run on worker threads, so guard creation.
+
+    Limits only apply when the client is first created.
+    """
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+            _HTTP_CLIENT = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=int(max_connections),
+                    max_keepalive_connections=int(max_keepalive_connections),
+                    keepalive_expiry=float(keepalive_expiry),
+                ),
+            )
+        return _HTTP_CLIENT
+
+
+def close_http_client() -> None:
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is not None:
+            _HTTP_CLIENT.close()
+            _HTTP_CLIENT = None
+
+
 def _gcloud_token() -> str:
-    token = subprocess.check_output(["gcloud", "auth", "print-access-token"], text=True).strip()
-    if not token:
-        raise RuntimeError("Empty access token from gcloud")
-    return token
+    return get_token_manager().get_token()
+
+
+def _post_authorized(url: str, payload: Dict, timeout: float) -> httpx.Response:
+    """POST with the cached token; on 401 drop it and retry once with a fresh one."""
+    for attempt in (1, 2):
+        headers = {
+            "Authorization": f"Bearer {_gcloud_token()}",
+            "Content-Type": "application/json",
+        }
+        response = _http_client().post(url, headers=headers, json=payload, timeout=timeout)
+        if response.status_code == 401 and attempt == 1:
+            logger.warning("[VERTEX_CLI] Access token rejected (401); refreshing and retrying once.")
+            get_token_manager().invalidate()
+            continue
+        break
+    response.raise_for_status()
+    return response
 
 
 def _to_vertex_contents(messages: List[Dict]) -> List[Dict]:
@@ -65,14 +125,8 @@ def _call_generate_content(
             "topP": top_p,
         },
     }
-    headers = {
-        "Authorization": f"Bearer {_gcloud_token()}",
-        "Content-Type": "application/json",
-    }
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    response = _post_authorized(url, payload, timeout)
+    data = response.json()
 
     # Task: fix-vertex-cli-truncation - debug logging
     candidates = data.get("candidates", [])
@@ -82,6 +136,7 @@ def _call_generate_content(
 
     candidate = candidates[0]
     finish_reason = candidate.get("finishReason")
+    record_finish_reason(finish_reason)
     safety_ratings = candidate.get("safetyRatings", [])
 
     logger.debug(f"[VERTEX_CLI] finishReason: {finish_reason}")
@@ -123,15 +178,10 @@ def _call_openai_compat(
         "max_output_tokens": max_tokens,
         "stream": False,
     }
-    headers = {
-        "Authorization": f"Bearer {_gcloud_token()}",
-        "Content-Type": "application/json",
-    }
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    response = _post_authorized(url, payload, timeout)
+    data = response.json()
     choice = (data.get("choices") or [{}])[0]
+    record_finish_reason(choice.get("finish_reason"))
     message = choice.get("message", {})
     content = message.get("content") or []
     segments = []
@@ -141,6 +191,71 @@ def _call_openai_compat(
     return "\n".join(segments).strip()
 
 
+async def stream_chat(
+    messages: List[Dict],
+    model: str | None = None,
+    project_id: str | None = None,
+    location: str | None = None,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    top_p: float = 0.95,
+    http_client: httpx.AsyncClient | None = None,
+    timeout: float = 300.0,
+    **_,
+) -> AsyncIterator[str]:
+    """Stream text parts from ``streamGenerateContent`` (server-sent events)."""
+    resolved_project = project_id or os.environ.get("GCP_PROJECT") or _env("GCP_PROJECT")
+    resolved_location = location or os.environ.get("VERTEX_LOCATION", "us-central1")
+    resolved_model = model or os.environ.get("VERTEX_MODEL", "gemini-2.5-flash")
+    url = (
+        f"https://{resolved_location}-aiplatform.googleapis.com/v1/projects/{resolved_project}/"
+        f"locations/{resolved_location}/publishers/google/models/{resolved_model}:streamGenerateContent"
+    )
+    payload = {
+        "contents": _to_vertex_contents(messages),
+        "generationConfig": {
+            "temperature": float(temperature),
+            "maxOutputTokens": int(max_output_tokens),
+            "topP": float(top_p),
+        },
+    }
+    owns_client = http_client is None
+    client = http_client or httpx.AsyncClient(timeout=timeout)
+    try:
+        # Like _post_authorized: a rejected cached token is dropped and the request retried
+        # once; nothing has been yielded yet at that point.
+        for attempt in (1, 2):
+            token = await asyncio.to_thread(_gcloud_token)
+            headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+            async with client.stream(
+                "POST", url, params={"alt": "sse"}, headers=headers, json=payload, timeout=timeout
+            ) as response:
+                if response.status_code == 401 and attempt == 1:
+                    logger.warning("[VERTEX_CLI] Access token rejected (401); refreshing and retrying the stream once.")
+                    get_token_manager().invalidate()
+                    continue
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        event = json.loads(line[len("data:"):].strip())
+                    except json.JSONDecodeError:
+                        logger.debug(f"[VERTEX_CLI] Skipping malformed stream event: {line[:120]}")
+                        continue
+                    for candidate in event.get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                yield part["text"]
+                        if candidate.get("finishReason"):
+                            logger.debug(f"[VERTEX_CLI] Stream finishReason: {candidate['finishReason']}")
+                            record_finish_reason(candidate["finishReason"])
+            break
+    finally:
+        if owns_client:
+            await client.aclose()
+
+
 def chat(
     messages: List[Dict],
     model: str | None = None,
@@ -149,8 +264,12 @@ def chat(
     temperature: float = 0.2,
     max_output_tokens: int = 2048,
     top_p: float = 0.95,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
     **_,
 ) -> str:
+    _http_client(max_connections, max_keepalive_connections, keepalive_expiry)
     resolved_project = project_id or os.environ.get("GCP_PROJECT") or _env("GCP_PROJECT")
     resolved_location = location or os.environ.get("VERTEX_LOCATION", "us-central1")
     resolved_model = model or os.environ.get("VERTEX_MODEL", "gemini-2.5-flash")
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import sys
-from typing import Dict, List
+import threading
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
 from google import genai
 from google.genai.types import HttpOptions
 
+try:
+    from .auth import get_token_manager
+except ImportError:  # executed as a script
+    from auth import get_token_manager  # type: ignore
+
 # Import logger for debugging
 try:
     from logger import logger
@@ -15,23 +22,132 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+try:
+    from scripts.llm_retry import record_finish_reason
+except ImportError:  # executed as a script
+    def record_finish_reason(reason):  # type: ignore[no-redef]
+        return None
 
-def chat(
-    messages: List[Dict],
-    model: str | None = None,
-    project_id: str | None = None,
-    location: str | None = None,
-    temperature: float = 0.2,
-    max_output_tokens: int = 2048,
-    **_,
-) -> str:
-    client = genai.Client(
+
+ClientKey = Tuple[str | None, str, str]
+
+_CLIENTS: Dict[ClientKey, "genai.Client"] = {}
+# The ``aio`` transport of a client is bound to the event loop that first used
+# it, so async callers get one client per key and loop, rebuilt when a later
+# loop (e.g. the next ``asyncio.run``) asks for the same key.
+_ASYNC_CLIENTS: Dict[ClientKey, Tuple[asyncio.AbstractEventLoop, "genai.Client"]] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _build_client(project_id: str | None, location: str | None, auth: str | None = None) -> "genai.Client":
+    kwargs = {}
+    if (auth or "adc").lower() == "gcloud":
+        # Share the gcloud token cache with the vertex_cli provider instead of ADC.
+        kwargs["credentials"] = get_token_manager().google_credentials()
+    return genai.Client(
         http_options=HttpOptions(api_version="v1"),
         vertexai=True,
-        project=project_id or os.environ.get("GCP_PROJECT"),
-        location=location or os.environ.get("VERTEX_LOCATION", "us-central1"),
+        project=project_id,
+        location=location,
+        **kwargs,
+    )
+
+
+def _client_key(project_id: str | None, location: str | None, auth: str | None) -> ClientKey:
+    return (
+        project_id or os.environ.get("GCP_PROJECT"),
+        location or os.environ.get("VERTEX_LOCATION", "us-central1"),
+        (auth or "adc").lower(),
     )
 
+
+def get_client(project_id: str | None = None, location: str | None = None, auth: str | None = None) -> "genai.Client":
+    """Return the shared client for (project, location, auth), creating it on first use.
+
+    The client owns auth state and connection pools, so rebuilding it per call
+    throws those away. Use it for the sync surface only; async callers go
+    through :func:`get_async_client`.
+    """
+    key = _client_key(project_id, location, auth)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _build_client(*key)
+            _CLIENTS[key] = client
+        return client
+
+
+def get_async_client(project_id: str | None = None, location: str | None = None, auth: str | None = None) -> "genai.Client":
+    """Return the client whose ``aio`` surface belongs to the running event loop."""
+    key = _client_key(project_id, location, auth)
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        entry = _ASYNC_CLIENTS.get(key)
+        if entry is not None:
+            owner_loop, client = entry
+            if owner_loop is loop:
+                return client
+            _discard_async_client(key, owner_loop, client)
+        client = _build_client(*key)
+        _ASYNC_CLIENTS[key] = (loop, client)
+        return client
+
+
+def _discard_async_client(key: ClientKey, owner_loop: asyncio.AbstractEventLoop, client: "genai.Client") -> None:
+    """Release a client whose ``aio`` transport belongs to another loop.
+
+    While that loop still runs (another thread) the transport is closed there;
+    a loop that has exited can no longer run it, so only the sync side is closed.
+    """
+    aclose = getattr(getattr(client, "aio", None), "aclose", None)
+    if aclose is not None and owner_loop.is_running() and not owner_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(aclose(), owner_loop)
+    _close_sync(client)
+    logger.debug(f"[VERTEX_SDK] Discarding client for {key} (event loop changed)")
+
+
+def _close_sync(client: "genai.Client") -> None:
+    close = getattr(client, "close", None)  # not on older google-genai releases
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as exc:  # pragma: no cover - best effort on shutdown
+        logger.debug(f"[VERTEX_SDK] Closing client failed: {exc}")
+
+
+async def close_clients() -> None:
+    """Close every cached client (call once before the event loop exits).
+
+    ``aio`` transports owned by the running loop are awaited; the others are
+    released as in :func:`get_async_client`.
+    """
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        sync_clients = list(_CLIENTS.values())
+        async_clients = list(_ASYNC_CLIENTS.items())
+        _CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+    for client in sync_clients:
+        _close_sync(client)
+    for key, (owner_loop, client) in async_clients:
+        if owner_loop is not loop:
+            _discard_async_client(key, owner_loop, client)
+            continue
+        aclose = getattr(getattr(client, "aio", None), "aclose", None)
+        if aclose is not None:
+            await aclose()
+        _close_sync(client)
+
+
+def clear_clients() -> None:
+    """Forget cached clients without closing them (benchmarks and tests)."""
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+
+
+def _transform_contents(messages: List[Dict]) -> List[str]:
     # Transform messages to the format expected by the SDK
     transformed_contents = []
     for msg in messages:
@@ -39,16 +155,81 @@ def chat(
             content = msg.get("content", [])
             if isinstance(content, list) and content and content[0].get("type") == "text":
                 transformed_contents.append(content[0].get("text", ""))
+    return transformed_contents
 
+
+def _generation_config(temperature: float, max_output_tokens: int) -> Dict[str, Any]:
+    return {
+        "temperature": float(temperature),
+        "max_output_tokens": int(max_output_tokens),
+    }
+
+
+async def stream_chat(
+    messages: List[Dict],
+    model: str | None = None,
+    project_id: str | None = None,
+    location: str | None = None,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    auth: str | None = None,
+    **_,
+) -> AsyncIterator[str]:
+    """Stream text chunks via the SDK's async ``generate_content_stream``."""
+    client = get_async_client(project_id, location, auth)
+    stream = await client.aio.models.generate_content_stream(
+        model=model or os.environ.get("VERTEX_MODEL", "gemini-2.5-flash"),
+        contents=_transform_contents(messages),
+        config=_generation_config(temperature, max_output_tokens),
+    )
+    async for chunk in stream:
+        for candidate in (getattr(chunk, "candidates", None) or [])[:1]:
+            record_finish_reason(getattr(candidate, "finish_reason", None))
+        text = getattr(chunk, "text", None)
+        if text:
+            yield text
+
+
+def chat(
+    messages: List[Dict],
+    model: str | None = None,
+    project_id: str | None = None,
+    location: str | None = None,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    auth: str | None = None,
+    **_,
+) -> str:
+    client = get_client(project_id, location, auth)
     response = client.models.generate_content(
         model=model or os.environ.get("VERTEX_MODEL", "gemini-2.5-flash"),
-        contents=transformed_contents,
-        config={
-            "temperature": float(temperature),
-            "max_output_tokens": int(max_output_tokens),
-        },
+        contents=_transform_contents(messages),
+        config=_generation_config(temperature, max_output_tokens),
+    )
+    return _extract_text(response)
+
+
+async def achat(
+    messages: List[Dict],
+    model: str | None = None,
+    project_id: str | None = None,
+    location: str | None = None,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    auth: str | None = None,
+    **_,
+) -> str:
+    """Async variant of :func:`chat` on the SDK's native ``aio`` surface (no thread hop)."""
+    client = get_async_client(project_id, location, auth)
+    response = await client.aio.models.generate_content(
+        model=model or os.environ.get("VERTEX_MODEL", "gemini-2.5-flash"),
+        contents=_transform_contents(messages),
+        config=_generation_config(temperature, max_output_tokens),
     )
+    return _extract_text(response)
+
 
+def _extract_text(response: Any) -> str:
     # Task: Fix vertex_sdk - Extract complete text from response and add debugging
     # response.text can be truncated, so we need to extract from candidates
     try:
@@ -63,6 +244,7 @@ def chat(
 
         if response.candidates and len(response.candidates) > 0:
             candidate = response.candidates[0]
+            record_finish_reason(getattr(candidate, "finish_reason", None))
             logger.debug(f"[VERTEX_SDK] Candidate type: {type(candidate)}")
             logger.debug(f"[VERTEX_SDK] Candidate has content: {hasattr(candidate, 'content')}")
 
@@ -0,0 +1,189 @@
+"""Warm pytest server for repeated QA runs within one orchestrator session.
+
+Every QA run used to start a fresh interpreter and re-import pytest and the
+project's third-party stack (FastAPI, pydantic, httpx...). The server imports
+those once and forks a child per request; the child inherits the warm
+``sys.modules``, changes into the suite directory and calls ``pytest.main``.
+Project modules are never preloaded, so every run still sees the story's
+current code.
+
+Protocol (JSON lines): the client writes
+``{"id": 1, "args": [...], "cwd": "...", "output": "..."}`` to stdin and reads
+``{"id": 1, "rc": 0}`` back once the child exits. Requests run concurrently.
+
+The server half only uses the standard library and pytest because it runs
+under the project's interpreter (``.venv/bin/python``). POSIX only (fork).
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SERVER_SCRIPT = pathlib.Path(__file__).resolve()
+DEFAULT_PRELOAD = ("pytest", "fastapi", "fastapi.testclient", "pydantic", "httpx", "sqlalchemy")
+
+
+# --- server (runs in the project interpreter) ----------------------------------------------
+
+def _run_child(request: dict) -> None:
+    try:
+        out = open(request["output"], "w", encoding="utf-8")
+        os.dup2(out.fileno(), 1)
+        os.dup2(out.fileno(), 2)
+        # Fresh stream objects: the inherited ones may hold locks taken by other threads at fork time.
+        sys.stdout = sys.stderr = out
+        os.chdir(request["cwd"])
+        sys.path.insert(0, request["cwd"])
+        import pytest
+
+        rc = int(pytest.main(list(request["args"])))
+        out.flush()
+    except BaseException:  # pragma: no cover - reported through the exit code
+        rc = 1
+    os._exit(rc)
+
+
+def serve(preload: Sequence[str]) -> None:
+    # Keep the orchestrator's scripts/ directory from shadowing project modules.
+    sys.path[:] = [p for p in sys.path if pathlib.Path(p or ".").resolve() != SERVER_SCRIPT.parent]
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    write_lock = threading.Lock()
+
+    def reap(pid: int, request_id: int) -> None:
+        _, status = os.waitpid(pid, 0)
+        with write_lock:
+            sys.stdout.write(json.dumps({"id": request_id, "rc": os.waitstatus_to_exitcode(status)}) + "\n")
+            sys.stdout.flush()
+
+    with write_lock:
+        sys.stdout.write(json.dumps({"ready": True}) + "\n")
+        sys.stdout.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        with write_lock:  # never fork while a reaper holds the stdout lock
+            pid = os.fork()
+        if pid == 0:
+            _run_child(request)
+        threading.Thread(target=reap, args=(pid, request["id"]), daemon=True).start()
+
+
+# --- client (runs in the orchestrator) -----------------------------------------------------
+
+class WarmPytestServer:
+    """One server process per interpreter; safe to call from any thread or event loop."""
+
+    def __init__(self, python: str, preload: Sequence[str] = DEFAULT_PRELOAD) -> None:
+        self.python = python
+        self.preload = tuple(preload)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, concurrent.futures.Future] = {}
+        self.stats = {"starts": 0, "runs": 0}
+
+    def _start(self) -> subprocess.Popen:
+        proc = subprocess.Popen(
+            [self.python, str(SERVER_SCRIPT), "--serve", ",".join(self.preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        assert proc.stdout is not None
+        if not proc.stdout.readline():  # wait for preloading to finish
+            raise RuntimeError(f"warm pytest server under {self.python} exited during startup")
+        threading.Thread(target=self._read_results, args=(proc,), daemon=True).start()
+        self.stats["starts"] += 1
+        return proc
+
+    def _read_results(self, proc: subprocess.Popen) -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            message = json.loads(line)
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+            if future is not None:
+                future.set_result(int(message["rc"]))
+        with self._lock:  # server died: fail whatever was still running
+            pending, self._pending = self._pending, {}
+            if self._proc is proc:
+                self._proc = None
+        for future in pending.values():
+            future.set_exception(RuntimeError("warm pytest server exited"))
+
+    def submit(self, args: Sequence[str], *, cwd: str, output: str) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._proc = self._start()
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            assert self._proc.stdin is not None
+            self._proc.stdin.write(json.dumps({"id": request_id, "args": list(args), "cwd": cwd, "output": output}) + "\n")
+            self._proc.stdin.flush()
+            self.stats["runs"] += 1
+        return future
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None:
+            if proc.stdin:
+                proc.stdin.close()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+_SERVERS: Dict[Tuple[str, Tuple[str, ...]], WarmPytestServer] = {}
+_SERVERS_LOCK = threading.Lock()
+
+
+def get_warm_pytest_server(python: str, preload: Sequence[str] = DEFAULT_PRELOAD) -> Optional[WarmPytestServer]:
+    """Shared server for ``python``; None where fork is unavailable."""
+    if not hasattr(os, "fork"):
+        return None
+    key = (python, tuple(preload))
+    with _SERVERS_LOCK:
+        server = _SERVERS.get(key)
+        if server is None:
+            server = _SERVERS[key] = WarmPytestServer(python, preload)
+        return server
+
+
+def warm_server_stats() -> Dict[str, Dict[str, int]]:
+    with _SERVERS_LOCK:
+        return {server.python: dict(server.stats) for server in _SERVERS.values()}
+
+
+def close_warm_pytest_servers() -> None:
+    with _SERVERS_LOCK:
+        servers = list(_SERVERS.values())
+        _SERVERS.clear()
+    for server in servers:
+        server.close()
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) >= 1 and argv[0] == "--serve":
+        serve([name for name in (argv[1] if len(argv) > 1 else "").split(",") if name])
+    else:
+        raise SystemExit("usage: pytest_server.py --serve [module,module,...]")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
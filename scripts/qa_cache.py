@@ -0,0 +1,131 @@
+"""Incremental QA: remember which test files passed against which inputs.
+
+A test file's key is a SHA-256 over the contents of the test file, every
+project file it imports (transitively, from ``scripts.impacted_tests``), the
+suite-wide inputs (conftest files, pytest/jest config, dependency manifests,
+and every non-code file in the suite such as fixtures and data files, which
+no import graph can attribute to a single test) and the command that runs
+it. Paths are relative to the suite root, so a story workspace and
+``project/`` share entries.
+
+Only passes are cached: a test file whose key matches its last pass is
+skipped; everything else runs. The cache lives in
+``artifacts/qa/test_cache.json`` and is merged on save, so concurrent QA
+runs only add entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from logger import logger
+
+from scripts.impacted_tests import SKIP_DIRS, import_closure
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CACHE_PATH = ROOT / "artifacts" / "qa" / "test_cache.json"
+
+PY_SUITE_INPUTS = ("pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini", "requirements.txt")
+JS_SUITE_INPUTS = ("package.json", "package-lock.json", "jest.config.js", "jest.config.ts", "babel.config.js", ".babelrc", "tsconfig.json")
+# Files a test run writes itself; hashing them would make every key miss.
+RUN_OUTPUT_SUFFIXES = (".pyc", ".log")
+
+
+class QaResultCache:
+    def __init__(self, path: pathlib.Path = CACHE_PATH) -> None:
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, str]] = self._read()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _digest(self, path: pathlib.Path) -> str:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return "-"
+        memo = (str(path), st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(memo)
+        if digest is None:
+            if len(self._digests) > 50_000:  # one long session over many workspaces
+                self._digests.clear()
+            digest = self._digests[memo] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return digest
+
+    def suite_inputs(self, root: pathlib.Path, graph: Mapping[str, Set[str]], names: Sequence[str]) -> List[str]:
+        """Files that can change the outcome of every test in the suite."""
+        inputs = {name for name in names if (root / name).is_file()}
+        inputs.update(rel for rel in graph if pathlib.PurePosixPath(rel).name == "conftest.py")
+        # Fixtures and data files: the graph only knows code, so any of them may feed any test.
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for name in filenames:
+                if name.startswith(".") or name.endswith(RUN_OUTPUT_SUFFIXES):
+                    continue
+                rel = pathlib.Path(dirpath, name).relative_to(root).as_posix()
+                if rel not in graph:
+                    inputs.add(rel)
+        return sorted(inputs)
+
+    def key(self, root: pathlib.Path, test: str, graph: Mapping[str, Set[str]], suite_inputs: Iterable[str], command: Sequence[str]) -> str:
+        sha = hashlib.sha256(json.dumps(list(command)).encode("utf-8"))
+        for rel in sorted(import_closure(graph, test) | set(suite_inputs)):
+            sha.update(f"\0{rel}\0{self._digest(root / rel)}".encode("utf-8"))
+        return sha.hexdigest()
+
+    def partition(self, suite: str, keys: Mapping[str, str], *, count: bool = True) -> Tuple[List[str], List[str]]:
+        """Split test files into (cached passes, to run); ``count=False`` leaves the hit/miss stats alone."""
+        with self._lock:
+            passed = self._entries.get(suite, {})
+            hits = sorted(test for test, key in keys.items() if passed.get(test) == key)
+        misses = sorted(set(keys) - set(hits))
+        if count:
+            self.stats["hits"] += len(hits)
+            self.stats["misses"] += len(misses)
+        return hits, misses
+
+    def record_passes(self, suite: str, keys: Mapping[str, str]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            merged = self._read()  # keep entries other runs saved meanwhile
+            for name, tests in self._entries.items():
+                merged.setdefault(name, {}).update(tests)
+            merged.setdefault(suite, {}).update(keys)
+            self._entries = merged
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=str(self.path.parent))
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(merged, handle, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        logger.debug(f"[QA] Cached {len(keys)} passing {suite} test files")
+
+
+_CACHES: Dict[pathlib.Path, QaResultCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_qa_cache(path: pathlib.Path = CACHE_PATH) -> QaResultCache:
+    path = pathlib.Path(path).resolve()
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = _CACHES[path] = QaResultCache(path)
+        return cache
+
+
+def qa_cache_stats() -> Dict[str, Dict[str, int]]:
+    with _CACHES_LOCK:
+        return {str(path): dict(cache.stats) for path, cache in _CACHES.items()}
@@ -0,0 +1,172 @@
+"""Structured test failures for the QA report.
+
+``analyze_test_failures`` used to scrape the captured console output with
+regexes, which broke whenever pytest or jest changed their layout and only
+ever saw the first few lines of a failure. QA now asks both runners for a
+machine-readable report as well:
+
+* pytest writes JUnit XML (``--junitxml``), parsed by ``parse_junit_failures``;
+* jest writes its JSON results (``--json --outputFile``), parsed by
+  ``parse_jest_results``.
+
+Both return the same ``{"test", "error", "type", ...}`` entries the report
+always had, or None when the file is missing or unreadable so the caller can
+fall back to the console output.
+
+``LiveFailureParser`` reads the console output as it streams to disk and
+appends every failure it recognises to ``failures.live.jsonl``, so a
+long suite's first failures are visible before it finishes. It is best
+effort; the structured report is the source of truth.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import pathlib
+import re
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Set, Tuple
+
+from logger import logger
+
+from scripts.progress import emit_progress
+
+PYTEST_JUNIT = "pytest_junit.xml"
+JEST_RESULTS = "jest_results.json"
+LIVE_FAILURES = "failures.live.jsonl"
+STRUCTURED_REPORTS = (PYTEST_JUNIT, JEST_RESULTS, LIVE_FAILURES)
+
+MAX_ERROR_CHARS = 4000
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def _clip(text: str) -> str:
+    text = _ANSI.sub("", text).strip()
+    return text if len(text) <= MAX_ERROR_CHARS else text[:MAX_ERROR_CHARS] + "\n[...]"
+
+
+def parse_junit_failures(path: pathlib.Path) -> Optional[List[Dict[str, str]]]:
+    """Failures and errors recorded in a pytest JUnit XML file."""
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+    errors = []
+    for case in root.iter("testcase"):
+        for kind in ("failure", "error"):
+            node = case.find(kind)
+            if node is None:
+                continue
+            message = node.get("message", "")
+            if kind == "error" and "collection failure" in message:
+                err_type = "pytest_collection_error"
+            else:
+                err_type = "pytest_failure" if kind == "failure" else "pytest_error"
+            text = node.text or ""
+            entry = {
+                "test": case.get("name", "?"),
+                "error": _clip(text if not message or text.startswith(message) else f"{message}\n{text}"),
+                "type": err_type,
+            }
+            if case.get("classname"):
+                entry["classname"] = case.get("classname")
+            errors.append(entry)
+    return errors
+
+
+def parse_jest_results(path: pathlib.Path) -> Optional[List[Dict[str, str]]]:
+    """Failed assertions and suites that failed to run, from ``jest --json``."""
+    try:
+        data = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    errors = []
+    for suite in data.get("testResults") or []:
+        file = suite.get("name", "")
+        failed = [a for a in suite.get("assertionResults") or [] if a.get("status") == "failed"]
+        for assertion in failed:
+            errors.append({
+                "test": assertion.get("fullName") or assertion.get("title") or "Unknown test",
+                "error": _clip("\n".join(assertion.get("failureMessages") or [])),
+                "type": "jest_failure",
+                "file": file,
+            })
+        if suite.get("status") == "failed" and not failed:
+            errors.append({
+                "test": file or "Unknown suite",
+                "error": _clip(suite.get("message") or "Test suite failed to run"),
+                "type": "jest_suite_error",
+                "file": file,
+            })
+    return errors
+
+
+class LiveFailureParser:
+    """Recognise failures in streamed runner output, one complete line at a time."""
+
+    _PATTERNS: Tuple[Tuple[re.Pattern, str], ...] = (
+        # pytest short summary: "FAILED tests/test_x.py::test_y - assert 0"
+        (re.compile(r"^(?P<kind>FAILED|ERROR) (?P<test>\S+)(?: - (?P<error>.*))?$"), "pytest"),
+        # pytest -v / xdist progress: "tests/test_x.py::test_y FAILED", "[gw0] [ 50%] FAILED tests/..."
+        (re.compile(r"^(?P<test>\S+::\S+) (?P<kind>FAILED|ERROR)\b"), "pytest"),
+        (re.compile(r"^\[gw\d+\] \[\s*\d+%\] (?P<kind>FAILED|ERROR) (?P<test>\S+)"), "pytest"),
+        (re.compile(r"ERROR collecting (?P<test>\S+)"), "pytest_collection"),
+        # jest: "FAIL tests/x.test.js", "  ✕ adds numbers (3 ms)", "  ● Suite › adds numbers"
+        (re.compile(r"^\s*FAIL\s+(?P<test>\S+)"), "jest"),
+        (re.compile(r"^\s*[✕✗]\s+(?P<test>.+?)(?: \(\d+ ms\))?$"), "jest"),
+        (re.compile(r"^\s*●\s+(?P<test>.+)$"), "jest"),
+    )
+
+    def __init__(self, path: pathlib.Path, source: str) -> None:
+        self.path = pathlib.Path(path)
+        self.source = source
+        self.started = time.monotonic()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._seen: Set[Tuple[str, str]] = set()
+        self.failures: List[Dict[str, str]] = []
+
+    def feed(self, chunk: bytes) -> None:
+        lines = (self._partial + self._decoder.decode(chunk)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(_ANSI.sub("", line.rstrip("\r")))
+
+    def close(self) -> None:
+        tail = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if tail:
+            self._line(_ANSI.sub("", tail))
+
+    def _line(self, line: str) -> None:
+        for pattern, family in self._PATTERNS:
+            match = pattern.search(line)
+            if match is None:
+                continue
+            test = match.group("test").strip()
+            groups = match.groupdict()
+            if family == "pytest_collection" or (family == "pytest" and groups.get("kind") == "ERROR" and "::" not in test):
+                err_type = "pytest_collection_error"
+            elif family == "pytest":
+                err_type = "pytest_failure" if groups.get("kind") == "FAILED" else "pytest_error"
+            else:
+                err_type = "jest_failure"
+            if family == "jest" and test == "Test suite failed to run":
+                continue  # the FAIL line for the suite is already recorded
+            self._record({"test": test, "error": (groups.get("error") or "").strip(), "type": err_type})
+            return
+
+    def _record(self, failure: Dict[str, str]) -> None:
+        key = (failure["type"], failure["test"])
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        failure = {**failure, "source": self.source, "seconds": round(time.monotonic() - self.started, 3)}
+        self.failures.append(failure)
+        logger.warning(f"[QA] {self.source}: {failure['type']} in {failure['test']}")
+        emit_progress("test_failed", test=failure["test"], type=failure["type"], source=self.source)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(failure, ensure_ascii=False) + "\n")
@@ -12,12 +12,13 @@ from typing import List, Tuple, Optional
 import yaml
 import typer
 
-from common import ensure_dirs, PLANNING, ROOT, ART, save_text
-from llm import Client
+from common import ensure_dirs, load_config, PLANNING, ROOT, ART, save_text
+from llm import get_client
 from logger import logger # Import the logger
 from pathlib import Path
 from scripts.generate_architect_dataset import generate as _dataset_generate
 from scripts.normalize_ba_jsonl import normalize as _ba_normalize
+from scripts.story_store import get_story_store
 from scripts.architect_utils import (
     convert_stories_epics_to_yaml,
     sanitize_yaml_block,
@@ -45,11 +46,12 @@ _COMPLEXITY_CACHE: dict[str, tuple[str, float]] = {}
 COMPLEXITY_CACHE_TTL_SECONDS = 300
 DEBUG_DIR = ART / "debug"
 CONFIG_PATH = ROOT / "config.yaml"
+STORY_STORE = get_story_store(PLANNING / "stories.yaml")
 
 
 def _load_config() -> dict:
     try:
-        return yaml.safe_load(CONFIG_PATH.read_text(encoding="utf-8")) or {}
+        return load_config(CONFIG_PATH) or {}
     except FileNotFoundError:
         return {}
 
@@ -291,7 +293,7 @@ async def classify_complexity_with_llm(requirements_text: str) -> str:
         logger.debug("[ARCHITECT] Complexity cache entry expired; recomputing.")
 
     try:
-        client = Client(role="architect")
+        client = get_client("architect")
         user = (
             "REQUIREMENTS:\n"
             f"{cleaned}\n\n"
@@ -353,36 +355,20 @@ def extract_original_concept(requirements_text: str) -> str:
 
 
 def load_stories() -> Tuple[str, List[dict]]:
-    stories_file = PLANNING / "stories.yaml"
-    if not stories_file.exists():
-        return ("", [])
-
-    content = stories_file.read_text(encoding="utf-8")
-    try:
-        data = yaml.safe_load(content) or []
-    except Exception:
-        data = []
-
-    if isinstance(data, dict) and "stories" in data:
-        data = data["stories"]
-
-    if not isinstance(data, list):
-        return (content, [])
-    return (content, data)
-
-
-def save_stories(stories):
-    stories_file = PLANNING / "stories.yaml"
-    stories_file.write_text(
-        yaml.safe_dump(stories, sort_keys=False, allow_unicode=True, default_flow_style=False),
-        encoding="utf-8",
-    )
+    stories = STORY_STORE.stories()
+    if not stories:
+        stories_file = PLANNING / "stories.yaml"
+        return (stories_file.read_text(encoding="utf-8") if stories_file.exists() else "", [])
+    content = yaml.safe_dump(stories, sort_keys=False, allow_unicode=True, default_flow_style=False)
+    return (content, stories)
 
 
 def extract_qa_failure_context(story_id: str) -> str:
     """Extract detailed QA failure context for the requested story."""
     try:
-        qa_report_path = ROOT / "artifacts" / "qa" / "last_report.json"
+        qa_report_path = ROOT / "artifacts" / "qa" / story_id / "report.json"
+        if not qa_report_path.exists():
+            qa_report_path = ROOT / "artifacts" / "qa" / "last_report.json"
         if not qa_report_path.exists():
             return "No QA report available"
 
@@ -467,7 +453,7 @@ def try_programmatic_adjustment(story_id: str, detail_level: str) -> bool:
 
     target["acceptance"] = acceptance
     target["status"] = "todo"
-    save_stories(stories)
+    STORY_STORE.put(target)  # only this story: siblings may be mid-transition in the orchestrator
     print(f"[ARCHITECT] Programmatic adjustment complete for {story_id}")
     return True
 
@@ -478,18 +464,12 @@ def mark_story_todo(story_id: str) -> bool:
     if not stories:
         return False
 
-    updated = False
     for story in stories:
         if isinstance(story, dict) and str(story.get("id")) == story_id:
             story["status"] = "todo"
-            updated = True
-            break
-
-    if not updated:
-        return False
-
-    save_stories(stories)
-    return True
+            STORY_STORE.put(story)
+            return True
+    return False
 
 
 async def run_architect_job(
@@ -619,7 +599,7 @@ async def run_architect_job(
             "Follow the exact output format."
         )
 
-    client = Client(role="architect")
+    client = get_client("architect")
     if concept_meta and not (concept or "").strip():
         print("[ARCHITECT] Using concept from requirements metadata.")
     elif (concept or "").strip() and not concept_meta:
@@ -750,7 +730,7 @@ async def run_architect_job(
     prd_content = grab("yaml", "PRD")
     if not prd_content and not allow_partial_blocks:
         print("[ARCHITECT] WARNING: PRD block missing in LLM response. Retrying...")
-        text = await client.chat(system=arch_prompt, user=user_input)
+        text = await client.chat(system=arch_prompt, user=user_input, use_cache=False)
         retry_path = DEBUG_DIR / "debug_architect_response_retry_prd.txt"
         save_text(retry_path, text)
         logger.warning(f"[ARCHITECT] Saved retry response for missing PRD block at {retry_path}")
@@ -765,7 +745,7 @@ async def run_architect_job(
     if not arch_content and not allow_partial_blocks:
         print("[ARCHITECT] WARNING: ARCHITECTURE block missing in LLM response. Retrying...")
         for i in range(1, 3):
-            text = await client.chat(system=arch_prompt, user=user_input)
+            text = await client.chat(system=arch_prompt, user=user_input, use_cache=False)
             retry_path = DEBUG_DIR / f"debug_architect_response_retry_arch_{i}.txt"
             save_text(retry_path, text)
             logger.warning(f"[ARCHITECT] Saved retry response for missing ARCHITECTURE block at {retry_path}")
@@ -783,7 +763,7 @@ async def run_architect_job(
     if not tasks_content and not allow_partial_blocks:
         print("[ARCHITECT] WARNING: TASKS block missing in LLM response. Retrying...")
         for i in range(1, 3):
-            text = await client.chat(system=arch_prompt, user=user_input)
+            text = await client.chat(system=arch_prompt, user=user_input, use_cache=False)
             retry_path = DEBUG_DIR / f"debug_architect_response_retry_tasks_{i}.txt"
             save_text(retry_path, text)
             logger.warning(f"[ARCHITECT] Saved retry response for missing TASKS block at {retry_path}")
@@ -16,7 +16,7 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
-from common import ensure_dirs, PLANNING
+from common import ensure_dirs, load_config, PLANNING
 from logger import logger
 import importlib.util
 
@@ -39,10 +39,7 @@ def _load_legacy_module():
 
 
 def _use_dspy() -> bool:
-    from pathlib import Path
-    import yaml
-
-    config = yaml.safe_load(Path("config.yaml").read_text(encoding="utf-8"))
+    config = load_config()
     return config.get("features", {}).get("use_dspy_ba", True)
 
 
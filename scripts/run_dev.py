@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
 import json
 import os
 import re
 import sys
+import tempfile
 import textwrap
 import pathlib
 from typing import List, Dict, Any, Optional
@@ -16,6 +18,11 @@ from common import ensure_dirs, PLANNING, ROOT
 from llm import Client
 from logger import logger # Import the logger
 
+if str(pathlib.Path(__file__).resolve().parents[1]) not in sys.path:  # `python scripts/<name>.py`
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from scripts.progress import emit_progress
+from scripts.story_store import get_story_store, story_version as _story_version
+
 # --- Paths ---
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 PLAN = ROOT / "planning"
@@ -25,6 +32,7 @@ DEV_ART_DIR.mkdir(parents=True, exist_ok=True)
 
 
 DEV_PROMPT = ROOT / "prompts" / "developer.md"
+STORY_STORE = get_story_store(PLAN / "stories.yaml")
 
 
 # --- YAML helpers (robust load that can recover from commented YAML) ---
@@ -50,12 +58,7 @@ def _try_recover_commented_yaml(text: str) -> Any:
         return None
 
 
-def load_stories() -> List[Dict[str, Any]]:
-    p = PLAN / "stories.yaml"
-    if not p.exists():
-        logger.info("[DEV] planning/stories.yaml not found.")
-        return []
-    raw = p.read_text(encoding="utf-8")
+def _parse_stories_text(raw: str) -> List[Dict[str, Any]]:
     data = None
     try:
         data = yaml.safe_load(raw)
@@ -79,6 +82,13 @@ def load_stories() -> List[Dict[str, Any]]:
     return data if isinstance(data, list) else []
 
 
+def load_stories() -> List[Dict[str, Any]]:
+    stories = STORY_STORE.stories(parse=_parse_stories_text)
+    if not stories and not (PLAN / "stories.yaml").exists():
+        logger.info("[DEV] planning/stories.yaml not found.")
+    return stories
+
+
 def pick_story(stories: List[Dict[str, Any]], sid_env: str | None) -> Dict[str, Any] | None:
     if sid_env:
         sid_env_l = sid_env.strip().lower()
@@ -238,22 +248,37 @@ def extract_files_block(text: str, story_id: str) -> List[Dict[str, str]] | None
     return [parsed_file_entry] # Return as a list of one file for compatibility
 
 
-def safe_write(rel_path: str, content: str) -> str:
+def safe_write(rel_path: str, content: str, *, root: pathlib.Path | None = None) -> str:
+    """Write ``content`` under ``project/`` (or a story workspace's ``project/`` when ``root`` is given).
+
+    Files are replaced rather than written in place: workspaces hardlink their
+    files to ``project/``, so an in-place write would leak into every clone.
+    """
     if not rel_path.startswith("project/"):
         rel_path = f"project/{rel_path.lstrip('/')}"
-    target = ROOT / rel_path
+    base = pathlib.Path(root) if root is not None else ROOT
+    project = base / "project"
+    target = base / rel_path
     target.parent.mkdir(parents=True, exist_ok=True)
     resolved = target.resolve()
-    if not str(resolved).startswith(str(PROJECT.resolve())):
+    if not str(resolved).startswith(str(project.resolve())):
         logger.error(f"[DEV] Path escapes project/: {rel_path}")
         raise ValueError(f"path escapes project/: {rel_path}")
-    target.write_text(content, encoding="utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(content)
+        os.replace(tmp, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
     logger.info(f"[DEV] Wrote file: {rel_path} ({len(content)} bytes)")
     return rel_path
 
 
-async def llm_call(story: Dict[str, Any], files_ctx: str) -> tuple[str, Dict[str, Any]]:
-    from llm import Client
+async def llm_call(story: Dict[str, Any], files_ctx: str, *, use_cache: bool = True) -> tuple[str, Dict[str, Any]]:
+    from llm import get_client
     from common import load_config
 
     # Task: recovery-system - Check for model_override in story metadata
@@ -274,7 +299,7 @@ async def llm_call(story: Dict[str, Any], files_ctx: str) -> tuple[str, Dict[str
             raise ValueError(f"Provider '{override_provider}' not configured in config.yaml providers section")
 
         # Initialize client normally to get role config first
-        client = Client(role="dev")
+        client = get_client("dev")
 
         # Override provider settings with full config rehydration
         provider_type = provider_cfg.get("type", override_provider)
@@ -329,7 +354,7 @@ async def llm_call(story: Dict[str, Any], files_ctx: str) -> tuple[str, Dict[str
         else:
             logger.warning(f"[DEV] Unknown provider type '{provider_type}', may not work correctly")
     else:
-        client = Client(role="dev")
+        client = get_client("dev")
 
     logger.debug(f"[DEV] LLM Client initialized: provider={client.provider_type}, model={client.model}")
 
@@ -369,7 +394,12 @@ async def llm_call(story: Dict[str, Any], files_ctx: str) -> tuple[str, Dict[str
     # Task: fix-metadata-persistence - Return model_info even when client.chat() fails
     # This ensures we can track which models were attempted even on errors
     try:
-        response = await client.chat(system=system_prompt, user=user)
+        response = await client.chat(system=system_prompt, user=user, use_cache=use_cache)
+        winner = client.last_hedge.get("winner")
+        if winner:
+            # A hedged backup may have answered; record the model that actually produced the code.
+            model_info["provider"], _, model_info["model"] = winner.partition("/")
+            model_info["hedge"] = dict(client.last_hedge)
         return response, model_info
     except Exception as e:
         # client.chat() failed, but we still return model_info for tracking
@@ -378,9 +408,38 @@ async def llm_call(story: Dict[str, Any], files_ctx: str) -> tuple[str, Dict[str
         return None, model_info  # Return None response but preserve model_info
 
 
-async def implement_story(story_id: str | None = None, retries: int = 3) -> dict:
-    stories = load_stories()
-    story = pick_story(stories, story_id if story_id else None)
+async def implement_story(
+    story_id: str | None = None,
+    retries: int = 3,
+    *,
+    story: Dict[str, Any] | None = None,
+    story_version: str | None = None,
+    workspace: str | pathlib.Path | None = None,
+) -> dict:
+    """Implement one story.
+
+    Callers that already hold the story (the orchestrator, A2A clients) pass it as
+    ``story`` with the ``story_version`` they read; stories.yaml is then never
+    touched. Without a snapshot the story is picked from the store as before.
+    ``workspace`` is a story workspace root (see ``scripts.workspaces``); files
+    land in its ``project/`` instead of the shared one.
+    """
+    if story is not None:
+        actual_version = _story_version(story)
+        if story_version and story_version != actual_version:
+            logger.error(f"[DEV] Story snapshot for {story.get('id')} does not match version {story_version}.")
+            return {
+                "status": "error",
+                "error": "story snapshot does not match story_version",
+                "story_id": story.get("id", story_id),
+                "story_version": actual_version,
+                "exit_code": 3,
+            }
+        story_version = actual_version
+    else:
+        stories = load_stories()
+        story = pick_story(stories, story_id if story_id else None)
+        story_version = _story_version(story) if story else None
     if not story:
         logger.info("No stories to implement (stories.yaml vacío o sin 'todo'). Ejecuta make plan o normaliza stories.yaml.")
         sys.exit(1)
@@ -396,16 +455,19 @@ async def implement_story(story_id: str | None = None, retries: int = 3) -> dict
     last_err = None
     model_info = None
 
+    # Transport errors, rate limits and truncated output are retried with backoff inside
+    # Client.chat; this loop only re-asks when the answer has no usable FILES block.
     for i in range(1, retries + 1):
         logger.info(f"[DEV] LLM intento {i}/{retries}…")
+        emit_progress("phase", name="generate", attempt=i)
         # Task: fix-metadata-persistence - llm_call now always returns model_info
-        response, model_info = await llm_call(story, files_ctx)
+        # Retries must resample, so only the first attempt may be served from the response cache.
+        response, model_info = await llm_call(story, files_ctx, use_cache=(i == 1))
 
         # response can be None if client.chat() failed
         if response is None:
             last_err = "LLM call failed to return a response"
             logger.warning(f"[DEV] Attempt {i} failed: {last_err}")
-            await asyncio.sleep(0.2)
             continue
 
         files = extract_files_block(response or "", sid)
@@ -414,7 +476,6 @@ async def implement_story(story_id: str | None = None, retries: int = 3) -> dict
             break
         last_err = "Developer response did not include FILES JSON block."
         logger.warning(f"[DEV] Attempt {i} failed: {last_err}")
-        await asyncio.sleep(0.2)
 
     if not files:
         error_msg = last_err or "[DEV] No FILES parsed from LLM response after all retries."
@@ -426,15 +487,18 @@ async def implement_story(story_id: str | None = None, retries: int = 3) -> dict
             "error": error_msg,
             "story_id": sid,
             "model_info": model_info,  # Include last model_info attempt
+            "story_version": story_version,
             "exit_code": 2
         }
 
     written = []
+    emit_progress("phase", name="write", files=len(files))
     for entry in files:
         rel = entry["path"]
         cnt = entry["content"]
-        rel2 = safe_write(rel, cnt)
+        rel2 = safe_write(rel, cnt, root=pathlib.Path(workspace) if workspace else None)
         written.append(rel2)
+        emit_progress("file_written", path=rel2, bytes=len(cnt))
 
     (story_art_dir / "files.json").write_text(json.dumps(files, indent=2, ensure_ascii=False), encoding="utf-8")
     stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -446,12 +510,14 @@ async def implement_story(story_id: str | None = None, retries: int = 3) -> dict
     # The orchestrator is now responsible for marking the story status.
     # We no longer call mark_in_review(sid) here.
 
-    logger.info(f"✓ wrote {len(written)} files under project/ (story {sid})")
+    target_tree = f"{workspace}/project/" if workspace else "project/"
+    logger.info(f"✓ wrote {len(written)} files under {target_tree} (story {sid})")
     for w in written:
         logger.info(f" - {w}")
 
     return {
         "story_id": sid,
+        "story_version": story_version,
         "files_written": written,
         "artifacts_dir": str(run_dir),
         "model_info": model_info,  # Task: fix-metadata-persistence - Return model info for orchestrator
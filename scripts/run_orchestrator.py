@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
 from typing import Optional
@@ -7,15 +8,16 @@ from typing import Optional
 import typer
 
 from a2a.client import A2AClient
+from a2a.config import get_agent_url
 
 app = typer.Typer(help="Orchestrator agent CLI")
 
 
 @app.command()
 def execute(concept: Optional[str] = typer.Option(None, help="Concept to pass to orchestrator")) -> None:
-    client = A2AClient()
+    client = A2AClient(get_agent_url("orchestrator"))
     payload = {"concept": concept} if concept else {}
-    result = client.send_task("orchestrator", "execute_pipeline", payload)
+    result = asyncio.run(client.send_task("execute_pipeline", payload))
     typer.echo(json.dumps(result, indent=2))
 
 
@@ -7,8 +7,8 @@ import re
 from pathlib import Path
 import yaml
 
-from common import ensure_dirs, PLANNING, ROOT, ART, save_text
-from llm import Client
+from common import ensure_dirs, load_config, PLANNING, ROOT, ART, save_text
+from llm import get_client
 from logger import logger # Import the logger
 
 CONFIG_PATH = ROOT / "config.yaml"
@@ -166,7 +166,7 @@ def build_user_payload(concept: str, existing_vision: str, requirements: str) ->
 
 def _load_config() -> dict:
     try:
-        return yaml.safe_load(CONFIG_PATH.read_text(encoding="utf-8")) or {}
+        return load_config(CONFIG_PATH) or {}
     except FileNotFoundError:
         return {}
 
@@ -236,7 +236,7 @@ async def main() -> None:
         except Exception as exc:
             logger.error(f"[PO][DSPY] Optimized path failed: {exc}. Falling back to default client.", exc_info=True)
 
-    client = Client(role="product_owner")
+    client = get_client("product_owner")
     logger.info(f"[PO] Using CONCEPT: {concept or 'No concept provided'}")
     logger.info("[PO] Maintaining product vision and evaluating BA alignment...")
     logger.debug(f"[PO] Calling LLM via {client.provider_type} with model {client.model}, temp {client.temperature}, max_tokens {client.max_tokens}")
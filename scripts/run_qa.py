@@ -1,12 +1,36 @@
 # scripts/run_qa.py
 from __future__ import annotations
-import os, sys, json, subprocess, pathlib, re, datetime
-from typing import Optional
+import os, sys, json, subprocess, pathlib, re, datetime, tempfile, contextlib, asyncio, time, shutil
+from typing import Optional, Sequence
 import yaml
 import typer
 from common import ensure_dirs, ROOT
 from logger import logger # Import the logger
 
+if str(pathlib.Path(__file__).resolve().parents[1]) not in sys.path:  # `python scripts/<name>.py`
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from scripts.impacted_tests import (
+    Selection,
+    is_js_test,
+    is_python_test,
+    js_import_graph,
+    python_import_graph,
+    select_js_tests,
+    select_python_tests,
+)
+from scripts.qa_failures import (
+    JEST_RESULTS,
+    LIVE_FAILURES,
+    PYTEST_JUNIT,
+    STRUCTURED_REPORTS,
+    LiveFailureParser,
+    parse_jest_results,
+    parse_junit_failures,
+)
+from scripts.qa_cache import JS_SUITE_INPUTS, PY_SUITE_INPUTS, QaResultCache, get_qa_cache
+from scripts.progress import emit_progress
+from scripts.pytest_server import get_warm_pytest_server
+
 QA_ART_DIR = ROOT / "artifacts" / "qa"
 QA_ART_DIR.mkdir(parents=True, exist_ok=True)
 # REPORT and STORY_LOG_DIR are now dynamic per story
@@ -70,11 +94,11 @@ def load_dev_snapshot(story_id: str) -> list[str]:
         logger.warning(f"[QA] Failed to load developer snapshot for {story_id}: {exc}")
         return []
 
-def log_contains_import_error(story_art_dir: pathlib.Path) -> list[str]:
+def log_contains_import_error(story_art_dir: pathlib.Path, log_name: str = "logs.txt") -> list[str]:
     """Inspect QA logs for ModuleNotFoundError entries and return missing modules."""
-    log_file = story_art_dir / "logs.txt"
+    log_file = story_art_dir / log_name
     if not log_file.exists():
-        logger.debug(f"[QA] logs.txt not found in {story_art_dir} for import error check.")
+        logger.debug(f"[QA] {log_name} not found in {story_art_dir} for import error check.")
         return []
     text = log_file.read_text(encoding="utf-8")
     matches = re.findall(r"ModuleNotFoundError: No module named '([^']+)'", text)
@@ -106,7 +130,10 @@ def fix_backend_test_imports(test_dir: pathlib.Path) -> bool:
             new_text = new_text.replace(old, new)
 
         if new_text != text:
-            py_test.write_text(new_text, encoding="utf-8")
+            # Replace rather than rewrite: story workspaces hardlink these files to project/.
+            tmp = py_test.with_name(f".{py_test.name}.qa-fix")
+            tmp.write_text(new_text, encoding="utf-8")
+            os.replace(tmp, py_test)
             changed = True
             logger.info(f"[QA] Fixed imports in {py_test}")
 
@@ -117,7 +144,12 @@ def fix_backend_test_imports(test_dir: pathlib.Path) -> bool:
     return changed
 
 def analyze_test_failures(story_art_dir: pathlib.Path, areas, be_rc, web_rc):
-    """Analyze test logs to extract specific failure details"""
+    """Extract specific failure details.
+
+    Prefers the runners' structured reports (pytest JUnit XML, jest JSON) and
+    falls back to scraping the console output when a report is missing or
+    lists nothing although the suite failed.
+    """
     failure_details = {
         "backend": {"errors": [], "warnings": [], "missing_coverage": []},
         "web": {"errors": [], "warnings": [], "missing_coverage": []}
@@ -126,10 +158,14 @@ def analyze_test_failures(story_art_dir: pathlib.Path, areas, be_rc, web_rc):
     # Analyze backend logs (pytest)
     pytest_log = story_art_dir / "pytest_output.txt"
     if pytest_log.exists():
-        pytest_output = pytest_log.read_text(encoding="utf-8")
-        failure_details["backend"]["errors"].extend(extract_pytest_errors(pytest_output))
+        pytest_output = pytest_log.read_text(encoding="utf-8", errors="replace")
+        structured = parse_junit_failures(story_art_dir / PYTEST_JUNIT)
+        if structured or (structured is not None and be_rc in (0, 5, 10)):
+            failure_details["backend"]["errors"].extend(structured)
+        else:
+            failure_details["backend"]["errors"].extend(extract_pytest_errors(pytest_output))
         failure_details["backend"]["warnings"].extend(extract_pytest_warnings(pytest_output))
-        logger.debug(f"[QA] Pytest output analyzed. Errors: {len(failure_details['backend']['errors'])}, Warnings: {len(failure_details['backend']['warnings'])}")
+        logger.debug(f"[QA] Pytest output analyzed (junit={structured is not None}). Errors: {len(failure_details['backend']['errors'])}, Warnings: {len(failure_details['backend']['warnings'])}")
 
 
         # Add error for command failures
@@ -157,9 +193,13 @@ def analyze_test_failures(story_art_dir: pathlib.Path, areas, be_rc, web_rc):
     # Analyze web logs (npm test - jest)
     npm_log = story_art_dir / "npm_output.txt"
     if npm_log.exists():
-        npm_output = npm_log.read_text(encoding="utf-8")
-        failure_details["web"]["errors"].extend(extract_npm_errors(npm_output))
-        logger.debug(f"[QA] NPM output analyzed. Errors: {len(failure_details['web']['errors'])}")
+        structured = parse_jest_results(story_art_dir / JEST_RESULTS)
+        if structured or (structured is not None and web_rc in (0, 10)):
+            failure_details["web"]["errors"].extend(structured)
+        else:
+            npm_output = npm_log.read_text(encoding="utf-8", errors="replace")
+            failure_details["web"]["errors"].extend(extract_npm_errors(npm_output))
+        logger.debug(f"[QA] NPM output analyzed (json={structured is not None}). Errors: {len(failure_details['web']['errors'])}")
 
 
     return failure_details
@@ -255,74 +295,460 @@ def has_collection_errors(failure_details: dict) -> bool:
     logger.debug("[QA] No collection errors found.")
     return False
 
-def run_cmd(cmd: list[str], story_art_dir: pathlib.Path, cwd: str | None = None) -> int:
-    try:
-        logger.info(f"[QA] Running command: {' '.join(cmd)} (cwd={cwd or os.getcwd()})")
-        res = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+def _command_name(cmd: Sequence[str]) -> str:
+    """Log-file stem for a command: ``pytest`` for ``/abs/.venv/bin/pytest`` and ``python -m pytest``."""
+    if not cmd:
+        return "unknown"
+    if len(cmd) >= 3 and cmd[1] == "-m":
+        return cmd[2]
+    return pathlib.Path(cmd[0]).name
+
 
-        # Save logs separated by test type
-        log_file = story_art_dir / f"{cmd[0] if cmd else 'unknown'}_output.txt"
-        log_file.write_text(res.stdout, encoding="utf-8")
-        logger.debug(f"[QA] Command output saved to {log_file}")
+def _impacted_selection(select, suite_root: pathlib.Path, changed_paths: Sequence[str], prefix: str) -> Selection:
+    changed = [path[len(prefix):] for path in changed_paths if path.startswith(prefix)]
+    selection = select(suite_root, changed)
+    logger.info(f"[QA] Test selection for {suite_root.name}: {selection.reason}")
+    return selection
 
 
-        # Also maintain general logs file
-        (story_art_dir / "logs.txt").write_text(res.stdout, encoding="utf-8")
-        logger.debug(f"[QA] Command output saved to story-specific logs.txt")
+def _finish_cmd_output(cmd: Sequence[str], story_art_dir: pathlib.Path, log_file: pathlib.Path, returncode: int) -> int:
+    """Copy a command's streamed output into logs.txt and run.log; note failures."""
+    logger.debug(f"[QA] Command output saved to {log_file}")
+    emit_progress("tests_finished", command=_command_name(cmd), rc=returncode)
+
+    # Also maintain general logs file
+    if log_file.exists():
+        shutil.copyfile(log_file, story_art_dir / "logs.txt")
+    else:
+        (story_art_dir / "logs.txt").write_text("", encoding="utf-8")
+    logger.debug(f"[QA] Command output saved to story-specific logs.txt")
+
+
+    # Persist log per story for traceability
+    timestamp = datetime.datetime.utcnow().isoformat()
+    story_log = story_art_dir / "run.log"
+    with story_log.open("ab") as handle:
+        handle.write(f"\n=== {timestamp} UTC | command: {' '.join(cmd)} ===\n".encode("utf-8"))
+        if log_file.exists():
+            with log_file.open("rb") as output:
+                shutil.copyfileobj(output, handle)
+        handle.write(b"\n")
+    logger.debug(f"[QA] Command output appended to story log: {story_log}")
 
 
-        # Persist log per story for traceability
-        story_id = story_art_dir.name
-        timestamp = datetime.datetime.utcnow().isoformat()
-        story_log = story_art_dir / "run.log"
-        with story_log.open("a", encoding="utf-8") as handle:
-            handle.write(f"\n=== {timestamp} UTC | command: {' '.join(cmd)} ===\n")
-            handle.write(res.stdout)
-            handle.write("\n")
-        logger.debug(f"[QA] Command output appended to story log: {story_log}")
+    # Add specific error reporting for common return codes
+    error_details = ""
+    if returncode == 127:
+        # Command not found
+        error_details = f"Command not found: {cmd[0]}. Verify virtual environment is activated and dependencies are installed."
+        logger.error(f"[QA] ERROR: {error_details}")
 
 
-        # Add specific error reporting for common return codes
-        error_details = ""
-        if res.returncode == 127:
-            # Command not found
-            error_details = f"Command not found: {cmd[0]}. Verify virtual environment is activated and dependencies are installed."
-            logger.error(f"[QA] ERROR: {error_details}")
+    # Save command-specific error for final report
+    if returncode != 0:
+        error_file = story_art_dir / f"{_command_name(cmd)}_error.txt"
+        error_file.write_text(error_details or "Unknown command error", encoding="utf-8")
+        logger.error(f"[QA] Command failed with return code {returncode}. Error details saved to {error_file}")
 
+    return returncode
 
-        # Save command-specific error for final report
-        if res.returncode != 0:
-            error_file = story_art_dir / f"{cmd[0] if cmd else 'unknown'}_error.txt"
-            error_file.write_text(error_details or "Unknown command error", encoding="utf-8")
-            logger.error(f"[QA] Command failed with return code {res.returncode}. Error details saved to {error_file}")
 
+def _record_missing_command(cmd: Sequence[str], story_art_dir: pathlib.Path, exc: Exception) -> int:
+    error_msg = f"Command not found: {cmd[0] if cmd else 'unknown'} - {exc}"
+    logger.critical(f"[QA] FATAL: {error_msg}")
+    (story_art_dir / "logs.txt").write_text(error_msg, encoding="utf-8")
+    timestamp = datetime.datetime.utcnow().isoformat()
+    story_log = story_art_dir / "run.log"
+    with story_log.open("a", encoding="utf-8") as handle:
+        handle.write(f"\n=== {timestamp} UTC | command: {' '.join(cmd)} ===\n")
+        handle.write(error_msg + "\n")
+    return 127
 
-        logger.debug(f"[QA] Command stdout/stderr:\n{res.stdout}")
-        return res.returncode
+
+def _live_parser(cmd: Sequence[str], story_art_dir: pathlib.Path) -> LiveFailureParser:
+    emit_progress("tests_started", command=_command_name(cmd), args=list(cmd[1:]))
+    return LiveFailureParser(story_art_dir / LIVE_FAILURES, source=_command_name(cmd))
+
+
+def run_cmd(cmd: list[str], story_art_dir: pathlib.Path, cwd: str | None = None) -> int:
+    """Run ``cmd``, streaming its output to ``<command>_output.txt`` as it arrives."""
+    try:
+        logger.info(f"[QA] Running command: {' '.join(cmd)} (cwd={cwd or os.getcwd()})")
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     except FileNotFoundError as e:
-        error_msg = f"Command not found: {cmd[0] if cmd else 'unknown'} - {e}"
-        logger.critical(f"[QA] FATAL: {error_msg}")
-        (story_art_dir / "logs.txt").write_text(error_msg, encoding="utf-8")
-        timestamp = datetime.datetime.utcnow().isoformat()
-        story_log = story_art_dir / "run.log"
-        with story_log.open("a", encoding="utf-8") as handle:
-            handle.write(f"\n=== {timestamp} UTC | command: {' '.join(cmd)} ===\n")
-            handle.write(error_msg + "\n")
-        return 127
+        return _record_missing_command(cmd, story_art_dir, e)
     except Exception as e:
         logger.critical(f"[QA] Unhandled exception in run_cmd: {e}", exc_info=True)
         return 1
+    log_file = story_art_dir / f"{_command_name(cmd)}_output.txt"
+    live = _live_parser(cmd, story_art_dir)
+    assert proc.stdout is not None
+    with proc.stdout, log_file.open("wb") as handle:
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            handle.write(chunk)
+            handle.flush()
+            live.feed(chunk)
+    live.close()
+    return _finish_cmd_output(cmd, story_art_dir, log_file, proc.wait())
+
+
+async def run_cmd_async(cmd: Sequence[str], story_art_dir: pathlib.Path, cwd: str | None = None) -> int:
+    """``run_cmd`` on an asyncio subprocess, so the backend and web suites can run side by side."""
+    try:
+        logger.info(f"[QA] Running command: {' '.join(cmd)} (cwd={cwd or os.getcwd()})")
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+    except FileNotFoundError as e:
+        return _record_missing_command(cmd, story_art_dir, e)
+    except Exception as e:
+        logger.critical(f"[QA] Unhandled exception in run_cmd_async: {e}", exc_info=True)
+        return 1
+    log_file = story_art_dir / f"{_command_name(cmd)}_output.txt"
+    live = _live_parser(cmd, story_art_dir)
+    assert proc.stdout is not None
+    try:
+        with log_file.open("wb") as handle:
+            while chunk := await proc.stdout.read(65536):
+                handle.write(chunk)
+                handle.flush()
+                live.feed(chunk)
+    except asyncio.CancelledError:  # e.g. tasks/cancel on the QA agent: don't leave the suite running
+        with contextlib.suppress(ProcessLookupError):
+            proc.kill()
+        raise
+    live.close()
+    return _finish_cmd_output(cmd, story_art_dir, log_file, await proc.wait())
 
 
-def main():
-    allow_no_tests = os.environ.get("ALLOW_NO_TESTS", "1") == "1"
-    story_id = os.environ.get("STORY", "").strip() or f"qa-run-{datetime.datetime.now():%Y%m%d-%H%M%S}"
-    story_art_dir = QA_ART_DIR / story_id
+def _pytest_python(pytest_cmd: Sequence[str]) -> tuple[Optional[str], list[str]]:
+    """Interpreter behind ``pytest_cmd`` and the extra arguments it carries."""
+    if len(pytest_cmd) >= 3 and list(pytest_cmd[1:3]) == ["-m", "pytest"]:
+        return pytest_cmd[0], list(pytest_cmd[3:])
+    python = pathlib.Path(pytest_cmd[0]).with_name("python")
+    return (str(python) if python.exists() else None), list(pytest_cmd[1:])
+
+
+_XDIST_AVAILABLE: dict[str, bool] = {}
+
+
+def _xdist_available(python: Optional[str]) -> bool:
+    if not python:
+        return False
+    if python not in _XDIST_AVAILABLE:
+        probe = subprocess.run([python, "-c", "import xdist"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _XDIST_AVAILABLE[python] = probe.returncode == 0
+    return _XDIST_AVAILABLE[python]
+
+
+async def _run_pytest(
+    pytest_cmd: Sequence[str],
+    args: Sequence[str],
+    story_art_dir: pathlib.Path,
+    cwd: str,
+    *,
+    warm: bool,
+) -> int:
+    python, extra = _pytest_python(pytest_cmd)
+    server = get_warm_pytest_server(python) if warm and python else None
+    if server is None:
+        return await run_cmd_async([*pytest_cmd, *args], story_art_dir, cwd)
+    cmd = ["pytest", *args]
+    output_path = story_art_dir / f"{_command_name(cmd)}_output.txt"
+    output_path.unlink(missing_ok=True)  # never tail the previous run's output
+    live = _live_parser(cmd, story_art_dir)
+    logger.info(f"[QA] Running pytest in warm server: {' '.join(args)} (cwd={cwd})")
+    try:
+        future = asyncio.wrap_future(
+            await asyncio.to_thread(server.submit, [*extra, *args], cwd=cwd, output=str(output_path))
+        )
+        offset = 0
+        while True:  # the forked child writes the file itself; follow it
+            finished = future.done()
+            offset = _tail(output_path, offset, live)
+            if finished:
+                break
+            await asyncio.wait({future}, timeout=0.25)
+        rc = future.result()
+    except (OSError, RuntimeError) as exc:
+        logger.warning(f"[QA] Warm pytest server unavailable ({exc}); running a fresh pytest process.")
+        return await run_cmd_async([*pytest_cmd, *args], story_art_dir, cwd)
+    live.close()
+    return _finish_cmd_output(cmd, story_art_dir, output_path, rc)
+
+
+def _tail(path: pathlib.Path, offset: int, live: LiveFailureParser) -> int:
+    """Feed ``live`` whatever was appended to ``path`` since ``offset``."""
+    try:
+        with path.open("rb") as handle:
+            handle.seek(offset)
+            chunk = handle.read()
+    except FileNotFoundError:
+        return offset
+    if chunk:
+        live.feed(chunk)
+    return offset + len(chunk)
+
+
+def write_report(path: pathlib.Path, report: dict) -> None:
+    """Replace ``path`` atomically so readers never see a half-written report."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+async def _backend_suite(
+    be_root: pathlib.Path,
+    story_art_dir: pathlib.Path,
+    *,
+    pytest_cmd: Optional[Sequence[str]],
+    selection: Optional[Selection],
+    full_suite_gate: bool,
+    xdist_workers: str | int | None,
+    xdist_min_test_files: int,
+    warm_pytest: bool,
+    cache: Optional[QaResultCache] = None,
+) -> dict:
+    """Run the backend suite; returns rc plus how it ran (cache, xdist, warm server, gate)."""
+    info = {"rc": None, "full_suite_gate": False, "xdist_workers": None, "warm_server": False, "cache": None}
+    be_tests = be_root / "tests"
+    # Use project-level virtual environment pytest
+    pytest_bin = ROOT / ".venv" / "bin" / "pytest"
+    if pytest_cmd is None and pytest_bin.exists():
+        pytest_cmd = [str(pytest_bin)]
+    if not pytest_cmd:
+        info["rc"] = 127  # venv/pytest not available in project .venv
+        logger.error(f"[QA] Pytest binary not found: {pytest_bin}. Setting backend return code to 127.")
+        return info
+
+    full_args = ["-q", "--disable-warnings", "--maxfail=1"]
+    selected = selection.tests if selection and not selection.full else []
+    cache_keys: dict[str, str] = {}
+    if cache is not None:
+        graph = python_import_graph(be_root)
+        cache_keys, selected = _consult_cache(
+            cache, "backend", be_root, graph, PY_SUITE_INPUTS, pytest_cmd,
+            selected or sorted(rel for rel in graph if is_python_test(rel)), selected, info,
+        )
+    narrowed = bool(selected)
+    test_files = len(selected) if selected is not None and narrowed else sum(1 for p in be_tests.rglob("*.py") if p.name.startswith("test_") or p.name.endswith("_test.py"))
+    if xdist_workers and test_files >= xdist_min_test_files and _xdist_available(_pytest_python(pytest_cmd)[0]):
+        # Shard across cores; small suites are faster in one process than paying for worker startup.
+        full_args += ["-n", str(xdist_workers)]
+        info["xdist_workers"] = xdist_workers
+    pytest_args = full_args + (selected or [])
+    info["warm_server"] = bool(warm_pytest and get_warm_pytest_server(_pytest_python(pytest_cmd)[0] or "") is not None)
+    junit = story_art_dir.resolve() / PYTEST_JUNIT
+
+    async def run(args):
+        junit.unlink(missing_ok=True)  # a crashed run must not leave the previous run's results behind
+        return await _run_pytest(pytest_cmd, [*args, f"--junitxml={junit}"], story_art_dir, str(be_root), warm=warm_pytest)
+
+    rc = 0 if selected is None else await run(pytest_args)
+    if rc not in (0, 10):
+        logger.warning(f"[QA] Pytest returned {rc}. Checking for import errors...")
+        missing = log_contains_import_error(story_art_dir, "pytest_output.txt")
+        if any(m.startswith("backend_fastapi") or "backend-fastapi" in m for m in missing):
+            if fix_backend_test_imports(be_tests):
+                logger.info("[QA] Auto-corrected backend test imports. Re-running pytest.")
+                rc = await run(pytest_args)
+            else:
+                logger.warning("[QA] Could not auto-correct backend test imports.")
+        else:
+            logger.debug("[QA] No backend-fastapi related import errors found.")
+    if rc == 0 and cache is not None and selected is not None:
+        cache.record_passes("backend", {t: cache_keys[t] for t in (selected or cache_keys) if t in cache_keys})
+    if full_suite_gate and rc == 0:
+        gate_args = full_args if narrowed else None
+        if cache is not None:
+            gate_keys, remaining = _gate_tests(
+                cache, "backend", be_root, graph, PY_SUITE_INPUTS, pytest_cmd,
+                sorted(rel for rel in graph if is_python_test(rel)),
+            )
+            gate_args = full_args + remaining if remaining else None
+        if gate_args is not None:
+            logger.info("[QA] Impacted backend tests passed. Running the rest of the backend suite as the final gate.")
+            info["full_suite_gate"] = True
+            rc = await run(gate_args)
+            if rc == 0 and cache is not None:
+                cache.record_passes("backend", {t: gate_keys[t] for t in remaining})
+    info["rc"] = rc
+    return info
+
+
+async def _web_suite(
+    web_root: pathlib.Path,
+    story_art_dir: pathlib.Path,
+    *,
+    selection: Optional[Selection],
+    full_suite_gate: bool,
+    cache: Optional[QaResultCache] = None,
+) -> dict:
+    info = {"rc": None, "full_suite_gate": False, "cache": None}
+    # Use npm for compatibility
+    full_args = ["npm", "test", "--silent", "--", "--passWithNoTests"]
+    selected = selection.tests if selection and not selection.full else []
+    cache_keys: dict[str, str] = {}
+    if cache is not None:
+        graph = js_import_graph(web_root)
+        cache_keys, selected = _consult_cache(
+            cache, "web", web_root, graph, JS_SUITE_INPUTS, full_args,
+            selected or sorted(rel for rel in graph if is_js_test(rel)), selected, info,
+        )
+    results = story_art_dir.resolve() / JEST_RESULTS
+
+    async def run(args):
+        results.unlink(missing_ok=True)
+        # Reporter flags stay out of ``full_args``: the cache keys on the command, not on where results land.
+        return await run_cmd_async([*args, "--json", f"--outputFile={results}"], story_art_dir, str(web_root))
+
+    npm_args = full_args + (["--runTestsByPath", *selected] if selected else [])
+    rc = 0 if selected is None else await run(npm_args)
+    if rc == 0 and cache is not None and selected is not None:
+        cache.record_passes("web", {t: cache_keys[t] for t in (selected or cache_keys) if t in cache_keys})
+    if full_suite_gate and rc == 0:
+        gate_args = full_args if npm_args != full_args else None
+        if cache is not None:
+            gate_keys, remaining = _gate_tests(
+                cache, "web", web_root, graph, JS_SUITE_INPUTS, full_args,
+                sorted(rel for rel in graph if is_js_test(rel)),
+            )
+            gate_args = [*full_args, "--runTestsByPath", *remaining] if remaining else None
+        if gate_args is not None:
+            logger.info("[QA] Impacted web tests passed. Running the rest of the web suite as the final gate.")
+            info["full_suite_gate"] = True
+            rc = await run(gate_args)
+            if rc == 0 and cache is not None:
+                cache.record_passes("web", {t: gate_keys[t] for t in remaining})
+    info["rc"] = rc
+    return info
+
+
+def _consult_cache(
+    cache: QaResultCache,
+    suite: str,
+    root: pathlib.Path,
+    graph: dict,
+    input_names: Sequence[str],
+    command: Sequence[str],
+    candidates: Sequence[str],
+    selected: list[str],
+    info: dict,
+) -> tuple[dict[str, str], Optional[list[str]]]:
+    """Drop test files that already passed with identical inputs.
+
+    Returns the cache keys of ``candidates`` and the test files to pass on
+    the command line: ``selected`` unchanged when nothing was cached, the
+    misses when some were, or None when every candidate is a cache hit.
+    """
+    inputs = cache.suite_inputs(root, graph, input_names)
+    keys = {test: cache.key(root, test, graph, inputs, command) for test in candidates}
+    hits, misses = cache.partition(suite, keys)
+    info["cache"] = {
+        "hits": len(hits),
+        "misses": len(misses),
+        "hit_rate": round(len(hits) / len(keys), 3) if keys else 0.0,
+    }
+    if not hits:
+        return keys, selected
+    if not misses:
+        logger.info(f"[QA] All {len(hits)} {suite} test files passed before with identical inputs; not running them.")
+        return keys, None
+    logger.info(f"[QA] {len(hits)} {suite} test files cached as passing; running the other {len(misses)}.")
+    return keys, misses
+
+
+def _gate_tests(
+    cache: QaResultCache,
+    suite: str,
+    root: pathlib.Path,
+    graph: dict,
+    input_names: Sequence[str],
+    command: Sequence[str],
+    tests: Sequence[str],
+) -> tuple[dict[str, str], list[str]]:
+    """Cache keys of every test file and those the full-suite gate still has to run.
+
+    Files with a cached pass for their current inputs, including the ones the
+    impacted run just recorded, already count as gated.
+    """
+    inputs = cache.suite_inputs(root, graph, input_names)
+    keys = {test: cache.key(root, test, graph, inputs, command) for test in tests}
+    _, remaining = cache.partition(suite, keys, count=False)
+    return keys, remaining
+
+
+async def _timed(coro) -> dict:
+    started = time.monotonic()
+    info = await coro
+    info["wall_seconds"] = round(time.monotonic() - started, 3)
+    return info
+
+
+async def run_story_qa_async(
+    story_id: str = "",
+    *,
+    allow_no_tests: bool = True,
+    project_root: str | pathlib.Path | None = None,
+    changed_paths: Optional[Sequence[str]] = None,
+    pytest_cmd: Optional[Sequence[str]] = None,
+    art_dir: Optional[pathlib.Path] = None,
+    impacted_only: bool = True,
+    full_suite_gate: bool = True,
+    xdist_workers: str | int | None = None,
+    xdist_min_test_files: int = 8,
+    warm_pytest: bool = False,
+    use_cache: bool = True,
+) -> dict:
+    """Run QA for one story and return its report.
+
+    Everything comes in as arguments (nothing is read from or written to
+    os.environ) and all output lands in the story's own artifacts directory,
+    with report.json replaced atomically, so several stories can be checked
+    at once. ``changed_paths`` defaults to the developer snapshot and
+    ``pytest_cmd`` to the project-level ``.venv/bin/pytest``.
+
+    With ``impacted_only`` a scoped run executes just the test files that
+    import the changed files (see ``scripts.impacted_tests``);
+    ``full_suite_gate`` (on by default) then runs the rest of the suite once
+    those pass, for regressions the import graph cannot see; with the cache
+    it skips files that already passed against identical inputs.
+
+    The backend and web suites run concurrently. ``xdist_workers`` ("auto" or
+    a count) shards pytest when pytest-xdist is installed and at least
+    ``xdist_min_test_files`` test files run; ``warm_pytest`` runs pytest in
+    a forked warm server (see ``scripts.pytest_server``).
+
+    With ``use_cache`` test files that already passed against identical
+    inputs are skipped (see ``scripts.qa_cache``); the cache file sits next
+    to the story artifact directories.
+
+    Command output streams to ``<command>_output.txt`` while it runs and
+    recognised failures are appended to ``failures.live.jsonl`` as they
+    appear; ``failure_details`` comes from the runners' JUnit XML / jest JSON
+    reports (see ``scripts.qa_failures``).
+    """
+    started = time.monotonic()
+    story_id = story_id.strip() or f"qa-run-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}"
+    project_root = pathlib.Path(project_root) if project_root else ROOT / "project"
+    story_art_dir = (art_dir or QA_ART_DIR) / story_id
     story_art_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"[QA] Starting QA run for story '{story_id}'. ALLOW_NO_TESTS={allow_no_tests}")
+    cache = get_qa_cache((art_dir or QA_ART_DIR) / "test_cache.json") if use_cache else None
+    for name in STRUCTURED_REPORTS:  # left over from this story's previous QA run
+        (story_art_dir / name).unlink(missing_ok=True)
+    logger.info(f"[QA] Starting QA run for story '{story_id}' in {project_root}. ALLOW_NO_TESTS={allow_no_tests}")
+    emit_progress("phase", name="tests", story_id=story_id)
     logger.info(f"[QA] Artifacts will be saved in: {story_art_dir}")
 
-    changed_paths = load_dev_snapshot(story_id)
+    if changed_paths is None:
+        changed_paths = load_dev_snapshot(story_id)
     backend_touched = any(_matches_area(path, BACKEND_PREFIX) for path in changed_paths)
     web_touched = any(_matches_area(path, WEB_PREFIX) for path in changed_paths)
     other_touched = [
@@ -353,57 +779,60 @@ def main():
     else:
         logger.debug("[QA] No developer snapshot available. Running full QA suite.")
 
-    # Backend
-    be_root = ROOT / "project" / "backend-fastapi"
+    be_root = project_root / "backend-fastapi"
     be_tests = be_root / "tests"
     be_has = has_any_test(be_tests)
-    be_rc = None
+    be_selection: Optional[Selection] = None
+    web_root = project_root / "web-express"
+    web_tests = has_any_web_test(web_root)
+    web_selection: Optional[Selection] = None
+    suites = {}  # area -> coroutine; both run at once
+    outcomes: dict[str, dict] = {}
+
+    # Backend
     if not run_backend_tests:
-        be_rc = 0
+        outcomes["backend"] = {"rc": 0}
         logger.info("[QA] Skipping backend tests for story %s (no backend changes detected).", story_id)
     elif be_has:
         logger.info(f"[QA] Backend has tests in {be_tests}. Running pytest...")
-        # Use project-level virtual environment pytest
-        pytest_bin = ROOT / ".venv" / "bin" / "pytest"
-        if pytest_bin.exists():
-            be_rc = run_cmd([str(pytest_bin), "-q", "--disable-warnings", "--maxfail=1"], story_art_dir=story_art_dir, cwd=str(be_root))
-            if be_rc not in (0, 10):
-                logger.warning(f"[QA] Pytest returned {be_rc}. Checking for import errors...")
-                missing = log_contains_import_error(story_art_dir)
-                if any(m.startswith("backend_fastapi") or "backend-fastapi" in m for m in missing):
-                    if fix_backend_test_imports(be_tests):
-                        logger.info("[QA] Auto-corrected backend test imports. Re-running pytest.")
-                        be_rc = run_cmd([str(pytest_bin), "-q", "--disable-warnings", "--maxfail=1"], story_art_dir=story_art_dir, cwd=str(be_root))
-                    else:
-                        logger.warning("[QA] Could not auto-correct backend test imports.")
-                else:
-                    logger.debug("[QA] No backend-fastapi related import errors found.")
-        else:
-            be_rc = 127  # venv/pytest not available in project .venv
-            logger.error(f"[QA] Pytest binary not found: {pytest_bin}. Setting backend return code to {be_rc}.")
+        if impacted_only and scoped_execution:
+            be_selection = _impacted_selection(select_python_tests, be_root, changed_paths, BACKEND_PREFIX)
+        suites["backend"] = _timed(_backend_suite(
+            be_root,
+            story_art_dir,
+            pytest_cmd=pytest_cmd,
+            selection=be_selection,
+            full_suite_gate=full_suite_gate,
+            xdist_workers=xdist_workers,
+            xdist_min_test_files=xdist_min_test_files,
+            warm_pytest=warm_pytest,
+            cache=cache,
+        ))
     else:
-        be_rc = 10  # no tests
+        outcomes["backend"] = {"rc": 10}  # no tests
         logger.info("[QA] No backend tests found. Setting backend return code to 10.")
 
-
     # Web
-    web_root = ROOT / "project" / "web-express"
-    web_tests = has_any_web_test(web_root)
-    web_rc = None
     if not run_web_tests:
-        web_rc = 0
+        outcomes["web"] = {"rc": 0}
         logger.info("[QA] Skipping web tests for story %s (no web changes detected).", story_id)
     elif not (web_root / "package.json").exists():
-        web_rc = 10 # no tests / not applicable
+        outcomes["web"] = {"rc": 10}  # no tests / not applicable
         logger.info("[QA] No package.json found for web project. Skipping web tests.")
     elif web_tests:
         logger.info(f"[QA] Web has tests in {web_root}. Running npm test...")
-        # Use npm for compatibility
-        web_rc = run_cmd(["npm", "test", "--silent", "--", "--passWithNoTests"], story_art_dir=story_art_dir, cwd=str(web_root))
+        if impacted_only and scoped_execution:
+            web_selection = _impacted_selection(select_js_tests, web_root, changed_paths, WEB_PREFIX)
+        suites["web"] = _timed(_web_suite(
+            web_root, story_art_dir, selection=web_selection, full_suite_gate=full_suite_gate, cache=cache
+        ))
     else:
-        web_rc = 10  # no tests
+        outcomes["web"] = {"rc": 10}  # no tests
         logger.info("[QA] No web tests found. Setting web return code to 10.")
 
+    outcomes.update(zip(suites, await asyncio.gather(*suites.values())))
+    backend, web = outcomes["backend"], outcomes["web"]
+    be_rc, web_rc = backend["rc"], web["rc"]
 
     # Future extensions: mobile etc. (omitted for now)
     areas = {
@@ -412,12 +841,24 @@ def main():
             "rc": be_rc,
             "skipped": not run_backend_tests,
             "touched": backend_touched,
+            "selected_tests": be_selection.tests if be_selection else None,
+            "selection": be_selection.reason if be_selection else "full suite",
+            "full_suite_gate": backend.get("full_suite_gate", False),
+            "xdist_workers": backend.get("xdist_workers"),
+            "warm_server": backend.get("warm_server", False),
+            "cache": backend.get("cache"),
+            "wall_seconds": backend.get("wall_seconds", 0.0),
         },
         "web":     {
             "has_tests": web_tests,
             "rc": web_rc,
             "skipped": not run_web_tests,
             "touched": web_touched,
+            "selected_tests": web_selection.tests if web_selection else None,
+            "selection": web_selection.reason if web_selection else "full suite",
+            "full_suite_gate": web.get("full_suite_gate", False),
+            "cache": web.get("cache"),
+            "wall_seconds": web.get("wall_seconds", 0.0),
         },
     }
     logger.debug(f"[QA] Test areas summary: {areas}")
@@ -474,68 +915,86 @@ def main():
 
     # Detailed failure analysis
 
+    cached = [area["cache"] for area in areas.values() if area.get("cache")]
+    cache_summary = None
+    if cached:
+        hits, misses = sum(c["hits"] for c in cached), sum(c["misses"] for c in cached)
+        cache_summary = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0}
     report = {
         "status": status,
+        "code": code,
         "allow_no_tests": allow_no_tests,
         "areas": areas,
         "failure_details": failure_details,
         "story_context": story_id,
+        "artifacts_dir": str(story_art_dir),
+        "wall_seconds": round(time.monotonic() - started, 3),
+        "cache": cache_summary,
     }
     report_path = story_art_dir / "report.json"
-    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
-    # For orchestrator compatibility, also write a "last_report" at the top level
-    (QA_ART_DIR / "last_report.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    write_report(report_path, report)
     logger.info(f"[QA] QA report for {story_id} written to {report_path}")
 
-
     # The orchestrator is now responsible for all status updates.
-    # This script only reports the QA status.
+    # This function only reports the QA status.
+    return report
 
-    logger.info(f"[QA] Final status={status} (detail in {report_path})")
-    sys.exit(code)
 
-def run_quality_checks(*, allow_no_tests: bool = True, story: str = "") -> dict:
-    previous_story = os.environ.get("STORY")
-    previous_allow = os.environ.get("ALLOW_NO_TESTS")
-    os.environ["ALLOW_NO_TESTS"] = "1" if allow_no_tests else "0"
-    if story:
-        os.environ["STORY"] = story
-    elif "STORY" in os.environ:
-        os.environ.pop("STORY")
+def run_story_qa(story_id: str = "", **options) -> dict:
+    """Blocking wrapper around ``run_story_qa_async`` for threads and the CLI."""
+    return asyncio.run(run_story_qa_async(story_id, **options))
 
-    exit_code = 0
-    try:
-        main()
-    except SystemExit as exc:  # main exits via sys.exit
-        exit_code = int(exc.code or 0)
-    finally:
-        if previous_allow is not None:
-            os.environ["ALLOW_NO_TESTS"] = previous_allow
-        else:
-            os.environ.pop("ALLOW_NO_TESTS", None)
-        if previous_story is not None:
-            os.environ["STORY"] = previous_story
-        else:
-            os.environ.pop("STORY", None)
 
-    # The orchestrator reads the global "last_report.json", so we check that one
-    report_path = QA_ART_DIR / "last_report.json"
-    report_data = {}
-    if report_path.exists():
-        try:
-            report_data = json.loads(report_path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
-            report_data = {}
-
-    status = report_data.get("status", "unknown")
+def main():
+    allow_no_tests = os.environ.get("ALLOW_NO_TESTS", "1") == "1"
+    report = run_story_qa(
+        os.environ.get("STORY", ""),
+        allow_no_tests=allow_no_tests,
+        project_root=os.environ.get("QA_PROJECT_ROOT", "").strip() or None,
+        full_suite_gate=os.environ.get("QA_FULL_SUITE", "1") == "1",
+        use_cache=os.environ.get("QA_NO_CACHE", "0") != "1",
+    )
+    # Convenience copy for people running `make qa` by hand; callers use the per-story report.
+    write_report(QA_ART_DIR / "last_report.json", report)
+    logger.info(f"[QA] Final status={report['status']} (detail in {report['artifacts_dir']}/report.json)")
+    sys.exit(report["code"])
+
+
+async def run_quality_checks_async(
+    *,
+    allow_no_tests: bool = True,
+    story: str = "",
+    project_root: str = "",
+    impacted_only: bool = True,
+    full_suite_gate: bool = True,
+    xdist_workers: str | int | None = None,
+    warm_pytest: bool = False,
+    use_cache: bool = True,
+) -> dict:
+    """Run QA; ``project_root`` points at a story workspace's ``project/`` instead of the shared tree."""
+    report = await run_story_qa_async(
+        story,
+        allow_no_tests=allow_no_tests,
+        project_root=project_root or None,
+        impacted_only=impacted_only,
+        full_suite_gate=full_suite_gate,
+        xdist_workers=xdist_workers,
+        warm_pytest=warm_pytest,
+        use_cache=use_cache,
+    )
     return {
-        "status": status,
-        "code": exit_code,
-        "report_path": str(report_path),
-        "report": report_data,
+        "status": report["status"],
+        "code": report["code"],
+        "report_path": str(pathlib.Path(report["artifacts_dir"]) / "report.json"),
+        "report": report,
     }
 
 
+def run_quality_checks(**options) -> dict:
+    """Blocking ``run_quality_checks_async`` for the CLI and synchronous A2A handlers."""
+    return asyncio.run(run_quality_checks_async(**options))
+
+
 app = typer.Typer(help="QA agent CLI")
 
 
@@ -543,8 +1002,17 @@ app = typer.Typer(help="QA agent CLI")
 def run(
     allow_no_tests: bool = typer.Option(True, help="Allow passing when tests are missing"),
     story_id: Optional[str] = typer.Option(None, help="Story identifier for logging"),
+    impacted_only: bool = typer.Option(True, help="Run only tests that import the story's changed files"),
+    full_suite: bool = typer.Option(True, help="Re-run the full suites after the impacted tests pass"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Run every selected test even if it passed before with the same inputs"),
 ) -> None:
-    result = run_quality_checks(allow_no_tests=allow_no_tests, story=story_id or "")
+    result = run_quality_checks(
+        allow_no_tests=allow_no_tests,
+        story=story_id or "",
+        impacted_only=impacted_only,
+        full_suite_gate=full_suite,
+        use_cache=not no_cache,
+    )
     typer.echo(json.dumps(result, indent=2))
 
 
@@ -0,0 +1,179 @@
+"""Dependency graph over planning/stories.yaml for the orchestrator.
+
+Stories may declare ``depends_on`` (a list or a comma-separated string, the
+same shapes ``architect_metrics._depends_valid`` accepts). A story is ready
+when it is ``todo`` and every dependency is done. Ready stories are ordered so
+the critical path starts first:
+
+1. priority (P0 before P1 before P2 ...),
+2. longest chain of stories waiting on it downstream,
+3. number of transitive dependents (fan-out),
+4. position in the file.
+
+Stories on a dependency cycle are never ready; ``cycles`` lists them so the
+orchestrator can block them instead of waiting forever.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+DONE_STATUSES = frozenset({"done", "done_force_architect"})
+DEPENDENCY_FIELDS = ("depends_on", "dependencies")
+_UNRANKED_PRIORITY = 9
+
+
+def parse_depends_on(story: Mapping[str, Any]) -> List[str]:
+    for field in DEPENDENCY_FIELDS:
+        deps = story.get(field)
+        if deps is None:
+            continue
+        if isinstance(deps, str):
+            return [dep.strip() for dep in deps.split(",") if dep.strip()]
+        if isinstance(deps, (list, tuple)):
+            return [str(dep).strip() for dep in deps if dep and str(dep).strip()]
+    return []
+
+
+def priority_rank(story: Mapping[str, Any]) -> int:
+    value = str(story.get("priority") or "").strip().upper()
+    if value.startswith("P") and value[1:].isdigit():
+        return int(value[1:])
+    return _UNRANKED_PRIORITY
+
+
+class StoryDAG:
+    def __init__(self, stories: Iterable[Mapping[str, Any]]) -> None:
+        self.order: Dict[str, int] = {}
+        self.deps: Dict[str, List[str]] = {}
+        self.unknown: Dict[str, List[str]] = {}
+        for index, story in enumerate(stories):
+            story_id = str(story.get("id") or "").strip()
+            if story_id and story_id not in self.order:
+                self.order[story_id] = index
+                self.deps[story_id] = parse_depends_on(story)
+        self.dependents: Dict[str, List[str]] = {story_id: [] for story_id in self.order}
+        for story_id, deps in self.deps.items():
+            known = []
+            for dep in deps:
+                if dep in self.order:
+                    known.append(dep)
+                    self.dependents[dep].append(story_id)
+                else:
+                    # A reference to a story that doesn't exist can never complete; don't let it block.
+                    self.unknown.setdefault(story_id, []).append(dep)
+            self.deps[story_id] = known
+        self.cycles = self._find_cycles()
+        self.on_cycle: Set[str] = {story_id for cycle in self.cycles for story_id in cycle}
+        self._depth: Dict[str, int] = {}
+        self._fan_out: Dict[str, int] = {}
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Strongly connected components with more than one node, or a self-dependency (Tarjan)."""
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        cycles: List[List[str]] = []
+        counter = 0
+
+        for root in self.order:
+            if root in index:
+                continue
+            work = [(root, iter(self.deps[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.deps[child])))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.deps[node]:
+                        cycles.append(sorted(component, key=self.order.__getitem__))
+        return cycles
+
+    def depth(self, story_id: str) -> int:
+        """Length of the longest chain of stories that wait on ``story_id``."""
+        if story_id in self._depth:
+            return self._depth[story_id]
+        pending = [story_id]
+        while pending:
+            node = pending[-1]
+            children = [c for c in self.dependents.get(node, []) if c not in self.on_cycle]
+            missing = [c for c in children if c not in self._depth]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            self._depth[node] = 1 + max((self._depth[c] for c in children), default=0)
+        return self._depth[story_id]
+
+    def fan_out(self, story_id: str) -> int:
+        """Number of stories that transitively depend on ``story_id``."""
+        if story_id not in self._fan_out:
+            seen: Set[str] = set()
+            pending = list(self.dependents.get(story_id, []))
+            while pending:
+                node = pending.pop()
+                if node not in seen:
+                    seen.add(node)
+                    pending.extend(self.dependents.get(node, []))
+            seen.discard(story_id)
+            self._fan_out[story_id] = len(seen)
+        return self._fan_out[story_id]
+
+    def unmet(self, story_id: str, statuses: Mapping[str, str]) -> List[str]:
+        return [dep for dep in self.deps.get(story_id, []) if statuses.get(dep, "") not in DONE_STATUSES]
+
+    def sort_key(self, story: Mapping[str, Any]) -> tuple:
+        story_id = str(story.get("id") or "")
+        return (priority_rank(story), -self.depth(story_id), -self.fan_out(story_id), self.order.get(story_id, 0))
+
+    def ready(
+        self,
+        stories: Iterable[Dict[str, Any]],
+        limit: Optional[int] = None,
+        *,
+        exclude: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """``todo`` stories whose dependencies are all done, critical path first."""
+        stories = list(stories)
+        statuses = story_statuses(stories)
+        skip = set(exclude)
+        candidates = []
+        for story in stories:
+            story_id = str(story.get("id") or "")
+            if str(story.get("status", "")).lower() != "todo" or story_id in skip or story_id in self.on_cycle:
+                continue
+            if not self.unmet(story_id, statuses):
+                candidates.append(story)
+        candidates.sort(key=self.sort_key)
+        return candidates if limit is None else candidates[:limit]
+
+
+def story_statuses(stories: Iterable[Mapping[str, Any]]) -> Dict[str, str]:
+    return {str(s.get("id")): str(s.get("status", "")).lower() for s in stories if s.get("id")}
@@ -0,0 +1,338 @@
+"""Crash-safe story state: an append-only journal with stories.yaml as a view.
+
+Every story transition is one JSON line appended to
+``planning/stories.journal.jsonl`` (flushed and fsynced), instead of
+re-dumping the whole backlog. The in-memory index (by id and by status) is
+rebuilt by replaying the journal and then kept current by reading only the
+bytes other writers appended since the last sync. A torn trailing line from a
+crash is dropped on open.
+
+``planning/stories.yaml`` is materialized from the index on demand with an
+atomic replace. Tools and humans may still edit or regenerate it (the
+architect writes a fresh backlog, ``reopen_stories`` edits statuses): when its
+mtime/size no longer matches the last materialization, the file is imported
+as a new snapshot.
+
+Record shapes::
+
+    {"op": "snapshot", "stories": [...]}
+    {"op": "put", "story": {...}}
+    {"op": "delete", "id": "S1"}
+    {"op": "view", "stamp": [mtime_ns, size]}
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import yaml
+
+from logger import logger
+
+try:  # POSIX advisory locks keep journal appends from separate agent processes whole.
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+COMPACT_AFTER = 500
+Parser = Callable[[str], List[Dict[str, Any]]]
+
+
+def parse_stories_yaml(text: str) -> List[Dict[str, Any]]:
+    data = yaml.safe_load(text) or []
+    if isinstance(data, dict) and "stories" in data:
+        data = data["stories"]
+    return data if isinstance(data, list) else []
+
+
+def _normalize(story: Dict[str, Any]) -> Dict[str, Any]:
+    # YAML can yield dates and other non-JSON scalars; keep the index in the journal's form.
+    return json.loads(json.dumps(story, ensure_ascii=False, default=str))
+
+
+def story_version(story: Dict[str, Any]) -> str:
+    """Content hash of a story; lets a role detect that its snapshot went stale."""
+    canonical = json.dumps(_normalize(story), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _stamp(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class StoryStore:
+    def __init__(
+        self,
+        yaml_path: pathlib.Path,
+        journal_path: Optional[pathlib.Path] = None,
+        *,
+        compact_after: int = COMPACT_AFTER,
+    ) -> None:
+        self.yaml_path = pathlib.Path(yaml_path)
+        self.journal_path = journal_path or self.yaml_path.with_name(self.yaml_path.stem + ".journal.jsonl")
+        self.lock_path = self.journal_path.with_suffix(".lock")
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._order: List[str] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._view_stamp: Optional[Tuple[int, int]] = None
+        self._journal_id: Optional[Tuple[int, int]] = None  # (inode, device) of the file we replayed
+        self._offset = 0
+        self._records = 0
+        self._opened = False
+        self.stats: Dict[str, int] = {"appends": 0, "replayed": 0, "imports": 0, "views": 0, "compactions": 0}
+
+    # --- locking -----------------------------------------------------
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    # --- replay ------------------------------------------------------
+    def _reset(self) -> None:
+        self._order, self._by_id = [], {}
+        self._view_stamp = None
+        self._offset = 0
+        self._records = 0
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "snapshot":
+            self._order, self._by_id = [], {}
+            for story in record.get("stories") or []:
+                self._put_index(story)
+            self._records = 0
+        elif op == "put":
+            self._put_index(record.get("story") or {})
+        elif op == "delete":
+            story_id = str(record.get("id"))
+            if self._by_id.pop(story_id, None) is not None:
+                self._order.remove(story_id)
+        elif op == "view":
+            stamp = record.get("stamp")
+            self._view_stamp = tuple(stamp) if stamp else None  # type: ignore[assignment]
+        self._records += 1
+
+    def _put_index(self, story: Dict[str, Any]) -> None:
+        if not isinstance(story, dict) or not story.get("id"):
+            return
+        story_id = str(story["id"])
+        if story_id not in self._by_id:
+            self._order.append(story_id)
+        self._by_id[story_id] = story
+
+    def _repair_torn_tail(self) -> None:
+        """Drop a partial last line left by a crash mid-append."""
+        with open(self.journal_path, "rb+") as handle:
+            data = handle.read()
+            if data and not data.endswith(b"\n"):
+                keep = data.rfind(b"\n") + 1
+                handle.truncate(keep)
+                logger.warning(f"[stories] Dropped torn journal tail ({len(data) - keep} bytes) in {self.journal_path}")
+
+    def _replay_new(self) -> None:
+        try:
+            st = self.journal_path.stat()
+        except FileNotFoundError:
+            if self._journal_id is not None:
+                self._reset()  # journal wiped (e.g. CLEAN_FLUSH)
+            self._journal_id = None
+            return
+        identity = (st.st_ino, st.st_dev)
+        if identity != self._journal_id or st.st_size < self._offset:
+            self._reset()  # compacted or replaced by another process
+            self._journal_id = identity
+        if st.st_size == self._offset:
+            return
+        with open(self.journal_path, "rb") as handle:
+            handle.seek(self._offset)
+            chunk = handle.read()
+        end = chunk.rfind(b"\n") + 1  # an unterminated line is still being written
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+                self.stats["replayed"] += 1
+            except json.JSONDecodeError:
+                logger.warning(f"[stories] Skipping unreadable journal record in {self.journal_path}")
+        self._offset += end
+
+    def sync(self, parse: Parser = parse_stories_yaml) -> None:
+        """Catch up with the journal and import stories.yaml if it was edited outside the store."""
+        with self._lock, self._file_lock():
+            if not self._opened:
+                if self.journal_path.exists():
+                    self._repair_torn_tail()
+                self._opened = True
+            self._replay_new()
+            stamp = _stamp(self.yaml_path)
+            if stamp is None or stamp == self._view_stamp:
+                return
+            text = self.yaml_path.read_text(encoding="utf-8")
+            try:
+                stories = [s for s in parse(text) if isinstance(s, dict)]
+            except Exception as exc:
+                logger.error(f"[stories] Could not parse {self.yaml_path.name}: {exc}")
+                stories = []
+            if not stories and text.strip():
+                # Never let an unreadable edit wipe the journal; wait for the next edit instead.
+                logger.warning(f"[stories] Ignoring unreadable {self.yaml_path.name}; keeping {len(self._by_id)} journaled stories")
+                self._append([{"op": "view", "stamp": list(stamp)}])
+                return
+            if self._by_id:
+                logger.info(f"[stories] {self.yaml_path.name} changed outside the store; importing it as a new snapshot")
+            self._write_snapshot(stories, view_stamp=stamp)
+            self.stats["imports"] += 1
+
+    # --- writes ------------------------------------------------------
+    def _append(self, records: Sequence[Dict[str, Any]]) -> None:
+        payload = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records).encode("utf-8")
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self.stats["appends"] += len(records)
+        self._replay_new()
+
+    def _write_snapshot(self, stories: List[Dict[str, Any]], *, view_stamp: Optional[Tuple[int, int]]) -> None:
+        records: List[Dict[str, Any]] = [{"op": "snapshot", "stories": [_normalize(s) for s in stories]}]
+        if view_stamp:
+            records.append({"op": "view", "stamp": list(view_stamp)})
+        _atomic_write(self.journal_path, "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+        self._reset()
+        self._journal_id = None
+        self._replay_new()
+
+    def _maybe_compact(self) -> None:
+        if self._records < self.compact_after:
+            return
+        self._write_snapshot([self._by_id[i] for i in self._order], view_stamp=self._view_stamp)
+        self.stats["compactions"] += 1
+
+    def put(self, story: Dict[str, Any]) -> bool:
+        """Record one story's new state; returns False when nothing changed."""
+        return self.put_many([story]) > 0
+
+    def put_many(self, stories: Sequence[Dict[str, Any]]) -> int:
+        with self._lock:
+            self.sync()
+            with self._file_lock():
+                self._replay_new()
+                records = []
+                for story in stories:
+                    if not isinstance(story, dict) or not story.get("id"):
+                        continue
+                    normalized = _normalize(story)
+                    if self._by_id.get(str(story["id"])) != normalized:
+                        records.append({"op": "put", "story": normalized})
+                if records:
+                    self._append(records)
+                    self._maybe_compact()
+                return len(records)
+
+    def save(self, stories: Sequence[Dict[str, Any]]) -> int:
+        """Make ``stories`` the whole backlog: changed stories are put, missing ones deleted."""
+        with self._lock:
+            changed = self.put_many(stories)
+            keep = {str(s.get("id")) for s in stories if isinstance(s, dict) and s.get("id")}
+            with self._file_lock():
+                self._replay_new()
+                removed = [{"op": "delete", "id": sid} for sid in self._order if sid not in keep]
+                if removed:
+                    self._append(removed)
+            return changed + len(removed)
+
+    def materialize(self) -> pathlib.Path:
+        """Write stories.yaml from the index (atomic replace) and remember its stamp."""
+        with self._lock:
+            self.sync()
+            with self._file_lock():
+                self._replay_new()
+                text = yaml.safe_dump(self._list(), sort_keys=False, allow_unicode=True)
+                if self.yaml_path.exists() and self.yaml_path.read_text(encoding="utf-8") == text:
+                    stamp = _stamp(self.yaml_path)
+                else:
+                    stamp = _atomic_write(self.yaml_path, text)
+                    self.stats["views"] += 1
+                if stamp != self._view_stamp:
+                    self._append([{"op": "view", "stamp": list(stamp)}])
+        return self.yaml_path
+
+    # --- reads -------------------------------------------------------
+    def _list(self) -> List[Dict[str, Any]]:
+        return [self._by_id[story_id] for story_id in self._order]
+
+    def stories(self, parse: Parser = parse_stories_yaml) -> List[Dict[str, Any]]:
+        """Current backlog in file order; the dicts are copies the caller may mutate."""
+        with self._lock:
+            self.sync(parse)
+            return [_normalize(story) for story in self._list()]
+
+    def get(self, story_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.sync()
+            story = self._by_id.get(str(story_id))
+            return _normalize(story) if story is not None else None
+
+    def ids_by_status(self) -> Dict[str, List[str]]:
+        with self._lock:
+            self.sync()
+            index: Dict[str, List[str]] = {}
+            for story_id in self._order:
+                status = str(self._by_id[story_id].get("status", "")).lower()
+                index.setdefault(status, []).append(story_id)
+            return index
+
+
+def _atomic_write(path: pathlib.Path, text: str) -> Tuple[int, int]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    stamp = _stamp(path)
+    assert stamp is not None
+    return stamp
+
+
+_STORES: Dict[pathlib.Path, StoryStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_story_store(yaml_path: pathlib.Path) -> StoryStore:
+    """One store per stories.yaml in this process, so every role shares the index."""
+    key = pathlib.Path(yaml_path).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = StoryStore(key)
+        return store
@@ -0,0 +1,117 @@
+"""Continuous worker pool for the orchestrator loop.
+
+Instead of gathering a fixed batch and waiting for its slowest member, N
+workers each pull the next ready item the moment they finish one. Readiness
+is recomputed from live state after every completion (a finished story can
+unblock its dependents), so the source is a callable rather than a static
+queue.
+
+Stats cover slot utilization (busy time / workers x wall time) and queue
+wait: the time between an item first being seen ready and a worker starting it.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+from logger import logger
+
+
+@dataclass
+class WorkItem:
+    kind: str
+    story_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> Hashable:
+        return (self.kind, self.story_id)
+
+
+class WorkQueue:
+    def __init__(
+        self,
+        pending: Callable[[], Sequence[WorkItem]],
+        run: Callable[[WorkItem], Awaitable[None]],
+        *,
+        workers: int,
+    ) -> None:
+        """``pending`` returns currently runnable items, best first; ``run`` executes one."""
+        self.pending = pending
+        self.run_item = run
+        self.workers = max(1, int(workers))
+        self._in_flight: set = set()
+        self._ready_since: Dict[Hashable, float] = {}
+        self._changed: Optional[asyncio.Condition] = None
+        self.waits: List[float] = []
+        self.busy_seconds = 0.0
+        self.completed: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self.wall_seconds = 0.0
+
+    def _refresh(self) -> List[WorkItem]:
+        now = time.monotonic()
+        items = [item for item in self.pending() if item.key not in self._in_flight]
+        live = {item.key for item in items}
+        for key in live:
+            self._ready_since.setdefault(key, now)
+        for key in list(self._ready_since):
+            if key not in live:
+                self._ready_since.pop(key)
+        return items
+
+    async def _worker(self, slot: int) -> None:
+        assert self._changed is not None
+        while True:
+            async with self._changed:
+                while True:
+                    items = self._refresh()
+                    if items:
+                        item = items[0]
+                        break
+                    if not self._in_flight:
+                        self._changed.notify_all()
+                        return
+                    await self._changed.wait()
+                self._in_flight.add(item.key)
+                waited = time.monotonic() - self._ready_since.pop(item.key, time.monotonic())
+                self.waits.append(waited)
+            logger.debug(f"[queue] slot {slot} -> {item.kind} {item.story_id} (waited {waited:.2f}s)")
+            started = time.monotonic()
+            try:
+                await self.run_item(item)
+                self.completed[item.kind] = self.completed.get(item.kind, 0) + 1
+            except Exception as exc:
+                self.failed[item.kind] = self.failed.get(item.kind, 0) + 1
+                logger.error(f"[queue] {item.kind} task for {item.story_id} failed: {exc}", exc_info=True)
+            finally:
+                self.busy_seconds += time.monotonic() - started
+                async with self._changed:
+                    self._in_flight.discard(item.key)
+                    self._refresh()  # stamp newly unblocked items before anyone waits on them
+                    self._changed.notify_all()
+
+    async def run(self) -> Dict[str, Any]:
+        self._changed = asyncio.Condition()
+        started = time.monotonic()
+        async with self._changed:
+            self._refresh()
+        await asyncio.gather(*(self._worker(slot) for slot in range(self.workers)))
+        self.wall_seconds = time.monotonic() - started
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        capacity = self.workers * self.wall_seconds
+        return {
+            "workers": self.workers,
+            "tasks": dict(self.completed),
+            "failed": dict(self.failed),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "busy_seconds": round(self.busy_seconds, 3),
+            "slot_utilization": round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+            "queue_wait_mean_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "queue_wait_max_seconds": round(waits[-1], 3) if waits else 0.0,
+        }
@@ -0,0 +1,246 @@
+"""Per-story copy-on-write workspaces over ``project/``.
+
+Concurrent stories used to write into the shared ``project/`` tree and QA ran
+against whatever the other stories had half-written. Each in-flight story now
+gets its own clone under ``artifacts/workspaces/<story>/project``:
+
+* ``hardlink`` (default): every file is a hardlink to the original, so a
+  clone costs one directory entry per file. Writers must replace files
+  (write a temp file, then ``os.replace``) instead of writing in place;
+  ``run_dev.safe_write`` and the merge below do.
+* ``reflink``: a FICLONE copy on filesystems that support it (btrfs, xfs),
+  a plain copy elsewhere.
+* ``copy``: a plain copy.
+
+Dependency trees (``node_modules``, ``.venv``) are symlinked rather than
+cloned and caches are skipped.
+
+When the story passes QA its changes are merged back. A change is the
+story's file differing from the clone-time state; it conflicts when the same
+path in ``project/`` also moved since the clone (another story merged first)
+and the two contents differ. Conflicting merges apply nothing.
+"""
+from __future__ import annotations
+
+import contextlib
+import filecmp
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from logger import logger
+
+try:  # pragma: no cover - platform dependent
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+PROJECT_DIR = ROOT / "project"
+WORKSPACES_DIR = ROOT / "artifacts" / "workspaces"
+
+MODES = ("hardlink", "reflink", "copy")
+LINKED_DIRS = frozenset({"node_modules", ".venv", "venv"})
+SKIPPED_DIRS = frozenset({".git", "__pycache__", ".pytest_cache", ".mypy_cache"})
+_FICLONE = 0x40049409
+
+# (inode, size, mtime_ns) of a file; None when it does not exist.
+FileStamp = Optional[Tuple[int, int, int]]
+
+
+def _file_stamp(path: pathlib.Path) -> FileStamp:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _walk_files(top: pathlib.Path) -> List[str]:
+    """Relative paths of regular files under ``top``, skipping caches and linked dependency dirs."""
+    files: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(top):
+        dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRS and d not in LINKED_DIRS]
+        for name in filenames:
+            path = pathlib.Path(dirpath, name)
+            if path.is_symlink():
+                continue
+            files.append(path.relative_to(top).as_posix())
+    return files
+
+
+def _reflink(src: pathlib.Path, dst: pathlib.Path) -> None:
+    if fcntl is None:
+        raise OSError("reflink not supported on this platform")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    shutil.copystat(src, dst)
+
+
+def replace_file(src: pathlib.Path, dst: pathlib.Path) -> None:
+    """Copy ``src`` over ``dst`` with a rename, never writing into ``dst``'s inode."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{dst.name}.", dir=str(dst.parent))
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+@dataclass
+class Workspace:
+    story_id: str
+    root: pathlib.Path
+    mode: str
+    # rel path -> (stamp of project/ file, stamp of the clone) at creation time
+    base: Dict[str, Tuple[FileStamp, FileStamp]] = field(default_factory=dict)
+
+    @property
+    def project(self) -> pathlib.Path:
+        return self.root / "project"
+
+
+@dataclass
+class MergeResult:
+    merged: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+
+class WorkspaceManager:
+    def __init__(
+        self,
+        project_dir: pathlib.Path = PROJECT_DIR,
+        workspaces_dir: pathlib.Path = WORKSPACES_DIR,
+        *,
+        mode: str = "hardlink",
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"unknown workspace mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.project_dir = pathlib.Path(project_dir)
+        self.workspaces_dir = pathlib.Path(workspaces_dir)
+        self.mode = mode
+        self._merge_lock = threading.Lock()
+        self.stats = {"created": 0, "merged": 0, "conflicts": 0, "discarded": 0, "copied_files": 0}
+
+    def _clone_file(self, src: pathlib.Path, dst: pathlib.Path) -> None:
+        if self.mode == "hardlink":
+            try:
+                os.link(src, dst)
+                return
+            except OSError:  # cross-device or unsupported: fall back to a copy
+                pass
+        elif self.mode == "reflink":
+            try:
+                _reflink(src, dst)
+                return
+            except OSError:
+                with contextlib.suppress(OSError):
+                    dst.unlink()
+        shutil.copy2(src, dst)
+        self.stats["copied_files"] += 1
+
+    def create(self, story_id: str) -> Workspace:
+        """Clone ``project/`` for ``story_id``, replacing any workspace left from a previous attempt."""
+        root = self.workspaces_dir / story_id
+        if root.exists():
+            shutil.rmtree(root)
+        target = root / "project"
+        target.mkdir(parents=True)
+        workspace = Workspace(story_id=story_id, root=root, mode=self.mode)
+        # Hold the merge lock so the clone never sees another story's merge half applied.
+        with self._merge_lock:
+            if self.project_dir.exists():
+                self._clone_project(workspace, target)
+        self.stats["created"] += 1
+        logger.debug(f"[workspace] {story_id}: {len(workspace.base)} files cloned ({self.mode}) into {target}")
+        return workspace
+
+    def _clone_project(self, workspace: Workspace, target: pathlib.Path) -> None:
+        for dirpath, dirnames, filenames in os.walk(self.project_dir):
+            rel_dir = pathlib.Path(dirpath).relative_to(self.project_dir)
+            for name in list(dirnames):
+                src = pathlib.Path(dirpath, name)
+                if name in SKIPPED_DIRS:
+                    dirnames.remove(name)
+                elif name in LINKED_DIRS or src.is_symlink():
+                    dirnames.remove(name)
+                    link = src if name in LINKED_DIRS else os.readlink(src)
+                    os.symlink(link, target / rel_dir / name, target_is_directory=True)
+                else:
+                    (target / rel_dir / name).mkdir()
+            for name in filenames:
+                src = pathlib.Path(dirpath, name)
+                dst = target / rel_dir / name
+                if src.is_symlink():
+                    os.symlink(os.readlink(src), dst)
+                    continue
+                # Stamp before cloning: a file replaced in between then reads as changed
+                # in project/ (a checked merge), never as the base of the clone.
+                src_stamp = _file_stamp(src)
+                self._clone_file(src, dst)
+                workspace.base[(rel_dir / name).as_posix()] = (src_stamp, _file_stamp(dst))
+
+    def changes(self, workspace: Workspace) -> Dict[str, str]:
+        """Paths the story added, modified or deleted relative to its clone."""
+        changed: Dict[str, str] = {}
+        present = set(_walk_files(workspace.project))
+        for rel in present:
+            if rel not in workspace.base:
+                changed[rel] = "added"
+            elif _file_stamp(workspace.project / rel) != workspace.base[rel][1]:
+                changed[rel] = "modified"
+        for rel in workspace.base:
+            if rel not in present:
+                changed[rel] = "deleted"
+        return changed
+
+    def _conflicts(self, workspace: Workspace, rel: str, kind: str) -> bool:
+        base_stamp = workspace.base.get(rel, (None, None))[0]
+        current = self.project_dir / rel
+        if _file_stamp(current) == base_stamp:
+            return False
+        # project/ moved too; fine only if both sides ended up identical.
+        if kind == "deleted":
+            return current.exists()
+        return not (current.is_file() and filecmp.cmp(current, workspace.project / rel, shallow=False))
+
+    def merge(self, workspace: Workspace) -> MergeResult:
+        """Apply the story's changes to ``project/`` unless any of them conflicts."""
+        result = MergeResult()
+        with self._merge_lock:
+            changed = self.changes(workspace)
+            result.conflicts = sorted(rel for rel, kind in changed.items() if self._conflicts(workspace, rel, kind))
+            if result.conflicts:
+                self.stats["conflicts"] += 1
+                logger.warning(f"[workspace] {workspace.story_id}: merge conflicts on {', '.join(result.conflicts)}")
+                return result
+            for rel, kind in sorted(changed.items()):
+                if kind == "deleted":
+                    with contextlib.suppress(FileNotFoundError):
+                        (self.project_dir / rel).unlink()
+                    result.deleted.append(rel)
+                else:
+                    replace_file(workspace.project / rel, self.project_dir / rel)
+                    result.merged.append(rel)
+        self.stats["merged"] += 1
+        logger.info(
+            f"[workspace] {workspace.story_id}: merged {len(result.merged)} files, deleted {len(result.deleted)}"
+        )
+        return result
+
+    def discard(self, workspace: Workspace) -> None:
+        shutil.rmtree(workspace.root, ignore_errors=True)
+        self.stats["discarded"] += 1
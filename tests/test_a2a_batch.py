@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+
+from a2a.client import A2AClient
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+
+
+def _app(handlers, **kwargs):
+    skills = [AgentSkill(id=name, name=name, description=name, input_modes=[], output_modes=[]) for name in handlers]
+    card = AgentCard(
+        name="Test Agent",
+        description="",
+        url="http://agent/",
+        version="0",
+        default_input_modes=[],
+        default_output_modes=[],
+        capabilities={"streaming": False},
+        skills=skills,
+    )
+    return create_agent_app(card, handlers, **kwargs)
+
+
+def _rpc(request_id, method, **params):
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_up_to_the_limit_and_keeps_order():
+    running = 0
+    peak = 0
+
+    async def work(payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05 * (5 - payload["n"]))  # later entries finish first
+        running -= 1
+        return {"n": payload["n"]}
+
+    app = _app({"work": work}, batch_concurrency=3)
+    batch = [_rpc(n, "message/send", skill_id="work", payload={"n": n}) for n in range(5)]
+    batch += [
+        _rpc("missing", "message/send", skill_id="nope", payload={}),
+        {"jsonrpc": "2.0", "method": "tasks/get", "params": {"id": "x"}},  # a notification: no reply
+        _rpc("stream", "message/stream", skill_id="work", payload={"n": 0}),
+        "not a request",
+    ]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://agent") as http:
+        response = await http.post("/jsonrpc", json=batch)
+        assert response.status_code == 200
+        replies = response.json()
+        assert [reply["id"] for reply in replies] == [0, 1, 2, 3, 4, "missing", "stream", None]
+        assert [reply["result"] for reply in replies[:5]] == [{"n": n} for n in range(5)]
+        assert [reply["error"]["code"] for reply in replies[5:]] == [-32601, -32600, -32600]
+        assert peak == 3
+
+        assert (await http.post("/jsonrpc", json=[])).json()["error"]["code"] == -32600
+        assert (await http.post("/jsonrpc", content=b"{not json")).json()["error"]["code"] == -32700
+
+
+@pytest.mark.asyncio
+async def test_send_tasks_batches_submission_and_polling():
+    async def work(payload):
+        if payload["n"] == 2:
+            raise ValueError("bad input")
+        await asyncio.sleep(0.01 * payload["n"])
+        return {"n": payload["n"]}
+
+    app = _app({"work": work})
+    client = A2AClient("http://agent", transport=httpx.ASGITransport(app=app), poll_wait=5)
+    results = await client.send_tasks("work", [{"n": n} for n in range(20)], return_exceptions=True, batch_size=8)
+    assert [result if isinstance(result, dict) else "error" for result in results] == [
+        {"n": n} if n != 2 else "error" for n in range(20)
+    ]
+    assert "bad input" in str(results[2])
+    assert client.stats["requests"] <= 6  # 3 submit batches and a few poll rounds, not 20+ requests
+
+    with pytest.raises(RuntimeError, match="bad input"):
+        await client.send_tasks("work", [{"n": 1}, {"n": 2}])
+    await client.aclose()
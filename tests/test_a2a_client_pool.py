@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from a2a.client import A2AClient, close_a2a_clients, get_a2a_client
+from a2a.executors import LocalExecutor, RemoteExecutor
+from a2a.runtime import running_agent
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+
+
+def _agent(seen):
+    async def echo(payload):
+        return {"status": "ok", "echo": payload}
+
+    card = AgentCard(
+        name="Echo Agent",
+        description="",
+        url="http://127.0.0.1/",
+        version="0",
+        default_input_modes=[],
+        default_output_modes=[],
+        capabilities={},
+        skills=[AgentSkill(id="echo", name="echo", description="echo", input_modes=[], output_modes=[])],
+    )
+    app = create_agent_app(card, {"echo": echo})
+
+    @app.middleware("http")
+    async def record(request, call_next):
+        seen.append((request.url.path, request.client.port))
+        return await call_next(request)
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_client_reuses_connections_and_caches_health():
+    seen = []
+    with running_agent(_agent(seen)) as url:
+        async with A2AClient(url, health_ttl=0.3) as client:
+            for i in range(3):
+                assert await client.is_healthy()
+                assert await client.send_task("echo", {"n": i}) == {"status": "ok", "echo": {"n": i}}
+
+            assert [path for path, _ in seen].count("/health") == 1  # the other checks hit the cache
+            assert len({port for _, port in seen}) == 1  # one keep-alive connection served every request
+            assert client.stats["clients_created"] == 1
+
+            client.start_health_probe(0.1)
+            await asyncio.sleep(0.35)
+            assert [path for path, _ in seen].count("/health") >= 3
+            assert client.cached_health() is True
+
+
+@pytest.mark.asyncio
+async def test_remote_executor_fails_over_on_cached_health():
+    seen = []
+    local_calls = []
+    local = LocalExecutor("developer", lambda **payload: local_calls.append(payload) or {"status": "local"})
+    with running_agent(_agent(seen)) as url:
+        config = {"url": url, "health": {"ttl": 30, "probe_interval": 0}}
+        executor = RemoteExecutor("developer", "echo", config, local)
+        client = executor.pool.replicas[0].client
+        assert client is get_a2a_client(url)
+        assert await executor.execute({"n": 1}) == {"status": "ok", "echo": {"n": 1}}
+        assert await executor.execute({"n": 2}) == {"status": "ok", "echo": {"n": 2}}
+        assert [path for path, _ in seen].count("/health") == 1
+
+    # The agent is gone: the first call fails over after a connection error,
+    # later ones straight from the cached status without touching the network.
+    assert await executor.execute({"n": 3}) == {"status": "local"}
+    assert client.cached_health() is False
+    requests = client.stats["requests"]
+    assert await executor.execute({"n": 4}) == {"status": "local"}
+    assert client.stats["requests"] == requests
+    assert [call["n"] for call in local_calls] == [3, 4]
+    await close_a2a_clients()
@@ -0,0 +1,146 @@
+import collections
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from a2a.client import A2ATransportError, close_a2a_clients
+from a2a.executors import LocalExecutor, RemoteExecutor
+from a2a.routing import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ReplicaPool
+from a2a.runtime import running_agent
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+
+URLS = ["http://10.0.0.1:8004", "http://10.0.0.2:8004", "http://10.0.0.3:8004"]
+
+
+def _pool(policy):
+    return ReplicaPool.from_config("developer", URLS, {"routing": {"policy": policy}})
+
+
+def test_policies_order_replicas():
+    pool = _pool("round_robin")
+    assert [pool.candidates({})[0].url for _ in range(4)] == [URLS[0], URLS[1], URLS[2], URLS[0]]
+
+    pool = _pool("least_outstanding")
+    with pool.lease(pool.replicas[0]), pool.lease(pool.replicas[1]), pool.lease(pool.replicas[1]):
+        assert [replica.url for replica in pool.candidates({})] == [URLS[2], URLS[0], URLS[1]]
+
+    pool = _pool("consistent_hash")
+    owners = {f"S{i}": pool.candidates({"story_id": f"S{i}"})[0].url for i in range(60)}
+    assert all(pool.candidates({"story_id": story})[0].url == url for story, url in owners.items())
+    assert len(set(owners.values())) == 3  # stories spread over every replica
+
+    # Losing a replica only moves the stories it owned.
+    smaller = ReplicaPool.from_config("developer", URLS[:2], {"routing": {"policy": "consistent_hash"}})
+    moved = [story for story, url in owners.items() if url != URLS[2] and smaller.candidates({"story_id": story})[0].url != url]
+    assert moved == []
+
+    with pytest.raises(ValueError):
+        _pool("random")
+
+
+def test_circuit_breaker_opens_and_half_opens(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("a2a.routing.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("dev", failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock[0] += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()  # a single trial call
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def _agent(name, fail=False, calls=None):
+    async def echo(payload):
+        if calls is not None:
+            calls.append(payload)
+        if fail:
+            raise RuntimeError("story did not pass")
+        return {"status": "ok", "replica": name, "story_id": payload.get("story_id")}
+
+    card = AgentCard(
+        name=name,
+        description="",
+        url="http://127.0.0.1/",
+        version="0",
+        default_input_modes=[],
+        default_output_modes=[],
+        capabilities={},
+        skills=[AgentSkill(id="implement_story", name="implement", description="", input_modes=[], output_modes=[])],
+    )
+    return create_agent_app(card, {"implement_story": echo})
+
+
+def _overloaded_agent():
+    app = FastAPI()
+    app.get("/health")(lambda: {"status": "ok"})
+    app.post("/jsonrpc")(lambda: PlainTextResponse("overloaded", status_code=503))
+    return app
+
+
+def _config(*urls, **extra):
+    return {"replicas": list(urls), "health": {"probe_interval": 0}, **extra}
+
+
+@pytest.mark.asyncio
+async def test_remote_executor_balances_fails_over_and_breaks_circuits():
+    local = LocalExecutor("developer", lambda **payload: {"status": "local"})
+    with running_agent(_agent("a")) as url_a, running_agent(_agent("b")) as url_b:
+        with running_agent(_agent("gone")) as url_gone:
+            pass  # a replica that is configured but no longer listening
+        executor = RemoteExecutor("developer", "implement_story", _config(url_a, url_b, url_gone, routing={"policy": "round_robin"}), local)
+        results = [await executor.execute({"story_id": f"S{i}"}) for i in range(6)]
+        assert collections.Counter(result["replica"] for result in results) == {"a": 3, "b": 3}
+        assert executor.pool.stats()[url_gone]["healthy"] is False
+
+    with running_agent(_overloaded_agent()) as url_busy, running_agent(_agent("failing", fail=True)) as url_failing:
+        executor = RemoteExecutor("developer", "implement_story", _config(url_busy, circuit_breaker={"failure_threshold": 2}), local)
+        for _ in range(3):
+            assert await executor.execute({"story_id": "S1"}) == {"status": "local"}
+        stats = executor.pool.stats()[url_busy]
+        assert stats["circuit"] == OPEN
+        assert stats["calls"] == 2  # the third call never reached the overloaded replica
+
+        # Tasks that fail on a healthy replica do not count against its circuit.
+        executor = RemoteExecutor("developer", "implement_story", _config(url_failing, circuit_breaker={"failure_threshold": 2}), local)
+        for _ in range(3):
+            assert await executor.execute({"story_id": "S1"}) == {"status": "local"}
+        stats = executor.pool.stats()[url_failing]
+        assert (stats["circuit"], stats["calls"]) == (CLOSED, 3)
+    await close_a2a_clients()
+
+
+@pytest.mark.asyncio
+async def test_accepted_task_is_not_repeated_on_another_replica(monkeypatch):
+    local = LocalExecutor("developer", lambda **payload: {"status": "local"})
+    calls_a, calls_b = [], []
+    with running_agent(_agent("a", calls=calls_a)) as url_a, running_agent(_agent("b", calls=calls_b)) as url_b:
+        executor = RemoteExecutor("developer", "implement_story", _config(url_a, url_b, routing={"policy": "round_robin"}), local)
+        first = executor.pool.replicas[0].client
+        canceled = []
+        cancel_task = first.cancel_task
+
+        async def lose_connection(task_id, **kwargs):
+            first._set_health(False)  # as a ConnectError while polling tasks/get would
+            raise A2ATransportError("connection refused")
+
+        async def record_cancel(task_id):
+            canceled.append(task_id)
+            return await cancel_task(task_id)
+
+        monkeypatch.setattr(first, "wait_for_task", lose_connection)
+        monkeypatch.setattr(first, "cancel_task", record_cancel)
+        assert await executor.execute({"story_id": "S1"}) == {"status": "local"}
+        assert len(calls_a) == 1 and calls_b == []
+        assert len(canceled) == 1
+    await close_a2a_clients()
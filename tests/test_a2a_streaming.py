@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+import pytest
+
+from a2a.client import A2AClient, close_a2a_clients
+from a2a.executors import LocalExecutor, RemoteExecutor
+from a2a.runtime import running_agent
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+from scripts.progress import emit_progress, progress_sink
+
+
+@contextlib.contextmanager
+def _serve(handlers):
+    card = AgentCard(
+        name="Streaming Agent",
+        description="",
+        url="http://127.0.0.1/",
+        version="0",
+        default_input_modes=[],
+        default_output_modes=[],
+        capabilities={"streaming": True},
+        skills=[AgentSkill(id=name, name=name, description=name, input_modes=[], output_modes=[]) for name in handlers],
+    )
+    with running_agent(create_agent_app(card, handlers, heartbeat_seconds=0.1)) as url:
+        yield url
+
+
+async def _implement(payload):
+    emit_progress("phase", name="generate")
+    for token in ("FILES", ":", " ok"):
+        emit_progress("llm_token", text=token)
+        await asyncio.sleep(0.05)
+    emit_progress("phase", name="write")
+    emit_progress("file_written", path="project/app.py", bytes=3)
+    return {"status": "ok", "story_id": payload["story_id"]}
+
+
+@pytest.mark.asyncio
+async def test_stream_task_yields_progress_before_the_result():
+    with _serve({"implement_story": _implement}) as url:
+        items = [item async for item in A2AClient(url).stream_task("implement_story", {"story_id": "S1"})]
+
+    assert items[0]["kind"] == "task"
+    progress = [(item["event"], item.get("name") or item.get("text") or item.get("path")) for item in items if item["kind"] == "progress"]
+    assert progress == [
+        ("phase", "generate"),
+        ("llm_token", "FILES"),
+        ("llm_token", ":"),
+        ("llm_token", " ok"),
+        ("phase", "write"),
+        ("file_written", "project/app.py"),
+    ]
+    assert items[-1]["final"] and items[-1]["task"]["result"] == {"status": "ok", "story_id": "S1"}
+
+
+@pytest.mark.asyncio
+async def test_remote_executor_forwards_progress_and_enforces_phase_deadlines():
+    cancelled = threading.Event()
+
+    async def stuck(payload):
+        emit_progress("phase", name="generate")
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with _serve({"implement_story": _implement, "stuck": stuck}) as url:
+        config = {"url": url, "capabilities": {"streaming": True}, "deadlines": {"phases": {"generate": 0.5}}}
+        local = LocalExecutor("developer", lambda **payload: {"status": "local"})
+
+        seen = []
+        with progress_sink(seen.append):
+            result = await RemoteExecutor("developer", "implement_story", config, local).execute({"story_id": "S2"})
+        assert result == {"status": "ok", "story_id": "S2"}
+        assert [event["event"] for event in seen if event["event"] != "llm_token"] == ["phase", "phase", "file_written"]
+        assert all(event["role"] == "developer" for event in seen)
+
+        started = time.monotonic()
+        result = await RemoteExecutor("developer", "stuck", config, local).execute({"story_id": "S3"})
+        assert result == {"status": "local"}  # deadline hit: fell back to local execution
+        assert time.monotonic() - started < 5
+        assert await asyncio.to_thread(cancelled.wait, 5)  # and the remote task was cancelled
+        await close_a2a_clients()
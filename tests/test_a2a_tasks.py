@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from a2a.client import A2AClient
+from a2a.server import AgentCard, AgentSkill, create_agent_app
+
+
+def _app(handlers):
+    skills = [AgentSkill(id=name, name=name, description=name, input_modes=[], output_modes=[]) for name in handlers]
+    card = AgentCard(
+        name="Test Agent",
+        description="",
+        url="http://agent/",
+        version="0",
+        default_input_modes=[],
+        default_output_modes=[],
+        capabilities={"streaming": False},
+        skills=skills,
+    )
+    return create_agent_app(card, handlers)
+
+
+def _rpc(method, **params):
+    return {"jsonrpc": "2.0", "id": method, "method": method, "params": params}
+
+
+@pytest.mark.asyncio
+async def test_message_send_returns_a_task_and_requests_do_not_block_each_other():
+    release = asyncio.Event()
+
+    async def slow(payload):
+        await release.wait()
+        return {"status": "ok", "story": payload["story_id"]}
+
+    app = _app({"slow": slow, "echo": lambda payload: {"status": "ok", **payload}})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://agent") as http:
+        submitted = (await http.post("/jsonrpc", json=_rpc("message/send", skill_id="slow", payload={"story_id": "S1"}, blocking=False))).json()["result"]
+        assert submitted["status"]["state"] in {"submitted", "working"}
+
+        # A blocking call to another skill completes while the first task is still running.
+        echoed = await http.post("/jsonrpc", json=_rpc("message/send", skill_id="echo", payload={"x": 1}))
+        assert echoed.json()["result"] == {"status": "ok", "x": 1}
+
+        pending = (await http.post("/jsonrpc", json=_rpc("tasks/get", id=submitted["id"], wait_seconds=0.05))).json()["result"]
+        assert pending["status"]["state"] == "working"
+
+        release.set()
+        done = (await http.post("/jsonrpc", json=_rpc("tasks/get", id=submitted["id"], wait_seconds=5))).json()["result"]
+        assert done["status"]["state"] == "completed"
+        assert done["result"] == {"status": "ok", "story": "S1"}
+
+        missing = await http.post("/jsonrpc", json=_rpc("tasks/get", id="nope"))
+        assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_client_waits_for_tasks_and_cancels_them():
+    cancelled = asyncio.Event()
+
+    async def forever(payload):
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def fails(payload):
+        raise ValueError("boom")
+
+    app = _app({"forever": forever, "fails": fails, "echo": lambda payload: {"status": "ok", **payload}})
+    client = A2AClient("http://agent", timeout=5, poll_wait=0.2, transport=httpx.ASGITransport(app=app))
+
+    assert await client.send_task("echo", {"story_id": "S2"}) == {"status": "ok", "story_id": "S2"}
+    with pytest.raises(RuntimeError, match="boom"):
+        await client.send_task("fails", {})
+
+    with pytest.raises(TimeoutError):
+        await client.send_task("forever", {}, timeout=0.3)
+    await asyncio.wait_for(cancelled.wait(), 2)
+
+    task = await client.submit_task("forever", {})
+    assert (await client.cancel_task(task["id"]))["status"]["state"] == "canceled"
+    with pytest.raises(RuntimeError, match="canceled"):
+        await client.wait_for_task(task["id"])
@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from scripts import llm
+from scripts.cli_pool import CLIWorkerError, CLIWorkerPool, close_cli_pools
+
+FAKE_CLI = Path(__file__).resolve().parents[1] / "scripts" / "fake_llm_cli.py"
+
+
+@pytest.mark.asyncio
+async def test_stream_json_pool_retires_and_replaces_workers():
+    pool = CLIWorkerPool([sys.executable, str(FAKE_CLI), "--input-format", "stream-json"], size=1)
+    try:
+        assert await pool.request("one", timeout=10) == "echo:one"
+        assert await pool.request("two", timeout=10) == "echo:two"
+        assert pool.stats["requests"] == 2
+        assert pool.stats["spawned"] >= 2  # each session served a single prompt
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_codex_proto_pool_reuses_session():
+    pool = CLIWorkerPool(
+        [sys.executable, str(FAKE_CLI), "proto"], protocol="codex_proto", size=1, max_requests_per_worker=5
+    )
+    try:
+        assert await pool.request("a", timeout=10) == "echo:a"
+        assert await pool.request("b", timeout=10) == "echo:b"
+        assert pool.stats["spawned"] == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_crashed_worker_raises_worker_error():
+    pool = CLIWorkerPool([sys.executable, str(FAKE_CLI), "--input-format", "stream-json"], size=1)
+    try:
+        with pytest.raises(CLIWorkerError):
+            await pool.request("__crash__", timeout=10)
+        assert await pool.request("after", timeout=10) == "echo:after"
+    finally:
+        await pool.close()
+
+
+def _cli_client(persistent_command):
+    client = llm.Client(role="dev", provider="claude_cli", model="fake")
+    client._apply_provider_config(
+        "claude_cli",
+        {
+            "type": "claude_cli",
+            "command": [sys.executable, str(FAKE_CLI), "--output-format", "text"],
+            "input_format": "stdin_text",
+            "parse_json": False,
+            "timeout": 10,
+            "persistent": {"enabled": True, "protocol": "stream_json", "workers": 1, "command": persistent_command},
+        },
+    )
+    client.cli_append_model_flag = False
+    return client
+
+
+@pytest.mark.asyncio
+async def test_client_uses_warm_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "ROOT", tmp_path)  # keep CLI operation logs out of the repo
+    client = _cli_client([sys.executable, str(FAKE_CLI), "--input-format", "stream-json"])
+    try:
+        assert await client._cli_chat_async("sys", "hi") == "echo:sys\n\nhi"
+        assert llm.cli_pool_stats()
+    finally:
+        await close_cli_pools()
+
+
+@pytest.mark.asyncio
+async def test_client_falls_back_to_spawn_per_call(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "ROOT", tmp_path)
+    client = _cli_client(["/nonexistent/cli-binary"])
+    try:
+        assert await client._cli_chat_async("sys", "hi") == "echo:sys\n\nhi"
+    finally:
+        await close_cli_pools()
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from scripts import common, llm
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    common.clear_config_cache()
+    llm.clear_clients()
+    yield
+    common.clear_config_cache()
+    llm.clear_clients()
+
+
+def _touch(path, text, bump):
+    path.write_text(text, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def test_config_parsed_once_until_file_changes(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    _touch(cfg, "roles:\n  dev:\n    model: a\n", 0)
+    parses = []
+    real_safe_load = common.yaml.safe_load
+    monkeypatch.setattr(common.yaml, "safe_load", lambda text: parses.append(1) or real_safe_load(text))
+
+    first = common.load_config(cfg)
+    first["roles"]["dev"]["model"] = "mutated"
+    assert common.load_config(cfg)["roles"]["dev"]["model"] == "a"
+    assert len(parses) == 1
+
+    _touch(cfg, "roles:\n  dev:\n    model: b\n", 1_000_000_000)
+    assert common.load_config(cfg)["roles"]["dev"]["model"] == "b"
+    assert len(parses) == 2
+
+    with pytest.raises(FileNotFoundError):
+        common.load_config(tmp_path / "missing.yaml")
+
+
+def test_get_client_reuses_prototype_and_isolates_state(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    _touch(cfg, "roles:\n  dev:\n    provider: ollama\n    model: first\n", 0)
+    monkeypatch.setattr(llm, "CONFIG_P", cfg)
+    builds = []
+    real_init = llm.Client.__init__
+
+    def counting_init(self, *args, **kwargs):
+        builds.append(1)
+        real_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(llm.Client, "__init__", counting_init)
+
+    one = llm.get_client("dev")
+    one.model = "recommended"
+    two = llm.get_client("dev")
+    assert len(builds) == 1
+    assert two is not one and two.model == "first"
+
+    _touch(cfg, "roles:\n  dev:\n    provider: ollama\n    model: second\n", 1_000_000_000)
+    assert llm.get_client("dev").model == "second"
+    assert len(builds) == 2
@@ -0,0 +1,40 @@
+import pytest
+
+from scripts import run_dev
+from scripts.story_store import story_version
+
+
+@pytest.fixture
+def no_disk_stories(monkeypatch):
+    def fail():
+        raise AssertionError("implement_story must not read stories.yaml when given a snapshot")
+
+    monkeypatch.setattr(run_dev, "load_stories", fail)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_used_without_loading_stories(monkeypatch, no_disk_stories):
+    seen = []
+
+    async def fake_llm_call(story, files_ctx, *, use_cache=True):
+        seen.append(story)
+        return None, {"provider": "fake", "model": "m"}
+
+    monkeypatch.setattr(run_dev, "llm_call", fake_llm_call)
+    monkeypatch.setattr(run_dev, "repo_tree", lambda limit=300: "")
+    story = {"id": "SNAP-1", "status": "in_progress", "description": "snapshot"}
+
+    result = await run_dev.implement_story(retries=1, story=story, story_version=story_version(story))
+
+    assert seen == [story]
+    assert result["status"] == "error" and result["story_version"] == story_version(story)
+
+
+@pytest.mark.asyncio
+async def test_mismatched_version_is_rejected(no_disk_stories):
+    story = {"id": "SNAP-2", "status": "todo"}
+
+    result = await run_dev.implement_story(story=story, story_version="stale")
+
+    assert result["status"] == "error"
+    assert result["exit_code"] == 3
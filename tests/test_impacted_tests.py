@@ -0,0 +1,103 @@
+import sys
+
+import pytest
+
+from scripts.impacted_tests import select_js_tests, select_python_tests
+from scripts.run_qa import run_story_qa
+
+
+def _write(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def test_python_selection_follows_transitive_imports(tmp_path):
+    _write(tmp_path, {
+        "app/__init__.py": "",
+        "app/models.py": "VALUE = 1\n",
+        "app/services.py": "from .models import VALUE\n",
+        "app/other.py": "OTHER = 2\n",
+        "tests/test_services.py": "from app.services import VALUE\n",
+        "tests/test_other.py": "import app.other\n",
+    })
+
+    assert select_python_tests(tmp_path, ["app/models.py"]).tests == ["tests/test_services.py"]
+    assert select_python_tests(tmp_path, ["app/models.py", "tests/test_other.py"]).tests == [
+        "tests/test_other.py",
+        "tests/test_services.py",
+    ]
+    # __init__ runs for every ``app.*`` import.
+    assert len(select_python_tests(tmp_path, ["app/__init__.py"]).tests) == 2
+    assert select_python_tests(tmp_path, ["tests/conftest.py"]).full
+    assert select_python_tests(tmp_path, ["app/unused.py"]).full
+
+
+def test_js_selection_follows_require_and_import(tmp_path):
+    _write(tmp_path, {
+        "src/util.js": "module.exports = 1;\n",
+        "src/app.js": "const util = require('./util');\n",
+        "src/other.ts": "export const x = 1;\n",
+        "tests/app.test.js": "const app = require('../src/app');\nconst express = require('express');\n",
+        "tests/other.test.ts": "import { x } from '../src/other';\n",
+    })
+
+    assert select_js_tests(tmp_path, ["src/util.js"]).tests == ["tests/app.test.js"]
+    assert select_js_tests(tmp_path, ["src/other.ts"]).tests == ["tests/other.test.ts"]
+    assert select_js_tests(tmp_path, ["package.json"]).full
+
+
+def test_run_story_qa_runs_impacted_tests_then_the_full_gate(tmp_path):
+    project = tmp_path / "project"
+    _write(project / "backend-fastapi", {
+        "app/__init__.py": "",
+        "app/good.py": "def ok():\n    return True\n",
+        "app/broken.py": "def ok():\n    return False\n",
+        "tests/test_good.py": "from app.good import ok\n\ndef test_good():\n    assert ok()\n",
+        "tests/test_broken.py": "from app.broken import ok\n\ndef test_broken():\n    assert ok()\n",
+    })
+    kwargs = dict(
+        allow_no_tests=False,
+        project_root=project,
+        changed_paths=["project/backend-fastapi/app/good.py"],
+        pytest_cmd=[sys.executable, "-m", "pytest", "-p", "no:cacheprovider"],
+        art_dir=tmp_path / "qa",
+    )
+
+    report = run_story_qa("IMP-1", full_suite_gate=False, **kwargs)
+    assert report["status"] == "pass"
+    assert report["areas"]["backend"]["selected_tests"] == ["tests/test_good.py"]
+
+    gated = run_story_qa("IMP-2", **kwargs)  # the gate is on by default
+    assert gated["status"] == "fail"
+    assert gated["areas"]["backend"]["full_suite_gate"]
+
+    # The gate only runs files without a cached pass, and caches its own passes.
+    _write(project / "backend-fastapi", {"app/broken.py": "def ok():\n    return True\n"})
+    fixed = run_story_qa("IMP-3", **kwargs)
+    assert fixed["status"] == "pass" and fixed["areas"]["backend"]["full_suite_gate"]
+    assert "1 passed" in (tmp_path / "qa" / "IMP-3" / "pytest_output.txt").read_text(encoding="utf-8")
+    again = run_story_qa("IMP-4", **kwargs)
+    assert again["status"] == "pass" and not again["areas"]["backend"]["full_suite_gate"]
+
+
+@pytest.mark.asyncio
+async def test_qa_agent_forwards_the_same_options_as_the_local_handler(monkeypatch):
+    cards = pytest.importorskip("a2a.cards", exc_type=ImportError)
+    calls = []
+
+    async def fake_run(**options):
+        calls.append(options)
+        return {"status": "pass", "code": 0}
+
+    monkeypatch.setattr(cards, "run_quality_checks_async", fake_run)
+    _, handlers = cards.qa_card()
+    await handlers["run_quality_checks"]({"story_id": "S1"})
+    await handlers["run_quality_checks"](
+        {"story_id": "S2", "full_suite_gate": False, "use_cache": "0", "xdist_workers": 4, "warm_pytest": True, "project_root": "/w/project"}
+    )
+    assert calls[0]["full_suite_gate"] is True and calls[0]["use_cache"] is True
+    assert {key: calls[1][key] for key in ("full_suite_gate", "use_cache", "xdist_workers", "warm_pytest", "project_root")} == {
+        "full_suite_gate": False, "use_cache": False, "xdist_workers": 4, "warm_pytest": True, "project_root": "/w/project",
+    }
@@ -0,0 +1,80 @@
+import pytest
+
+from scripts import llm
+from scripts.llm_cache import ResponseCache, make_cache_key
+
+
+def test_cache_key_is_stable_and_param_sensitive():
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+    key = make_cache_key("ollama", "m", {"temperature": 0, "max_tokens": 10}, messages)
+    assert key == make_cache_key("ollama", "m", {"max_tokens": 10, "temperature": 0}, messages)
+    assert key != make_cache_key("ollama", "m", {"temperature": 0, "max_tokens": 11}, messages)
+    assert key != make_cache_key("openai", "m", {"temperature": 0, "max_tokens": 10}, messages)
+
+
+def test_ttl_expiry_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path, ttl_seconds=60)
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+    assert cache.get("missing") is None
+
+    entry = tmp_path / "k.json"
+    entry.write_text(entry.read_text().replace('"created": ', '"created": 1, "old": '), encoding="utf-8")
+    assert cache.get("k") is None
+    assert not entry.exists()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    ResponseCache(tmp_path).put("persisted", "hello")
+    assert ResponseCache(tmp_path).get("persisted") == "hello"
+
+
+@pytest.mark.asyncio
+async def test_client_chat_skips_provider_on_hit(tmp_path, monkeypatch):
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    monkeypatch.setattr(llm, "_RESPONSE_CACHES", {})
+    calls = []
+
+    async def fake_dispatch(self, system, user):
+        calls.append(user)
+        return f"answer-{len(calls)}"
+
+    monkeypatch.setattr(llm.Client, "_dispatch_chat", fake_dispatch)
+    client = llm.Client(role="dev", provider="ollama", model="m", temperature=0)
+    client.cache_settings = {"dir": str(tmp_path)}
+
+    assert await client.chat("sys", "hello") == "answer-1"
+    assert await client.chat("sys", "hello") == "answer-1"
+    assert await client.chat("sys", "hello", use_cache=False) == "answer-2"
+    assert await client.chat("sys", "hello") == "answer-2"
+    assert calls == ["hello", "hello"]
+
+
+@pytest.mark.asyncio
+async def test_client_cache_policy(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "_RESPONSE_CACHES", {})
+    warm = llm.Client(role="dev", provider="ollama", model="m", temperature=0.7)
+    warm.cache_settings = {"dir": str(tmp_path)}
+    assert warm._response_cache() is None
+
+    forced = llm.Client(role="dev", provider="ollama", model="m", temperature=0.7, cache=True)
+    forced.cache_settings = {"dir": str(tmp_path)}
+    assert forced._response_cache() is not None
+
+    monkeypatch.setenv("LLM_CACHE", "0")
+    assert forced._response_cache() is None
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from scripts import llm
+from scripts.llm_hedge import LATENCIES, LatencyTracker, hedge_delay, hedge_settings
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "0")
+    LATENCIES.clear()
+    yield
+    LATENCIES.clear()
+
+
+def test_percentile_and_delay_fallback():
+    tracker = LatencyTracker()
+    for value in range(1, 101):
+        tracker.record("p", "m", value)
+    assert tracker.percentile("p", "m", 95) == (95, 100)
+
+    settings = hedge_settings({"hedge": {"enabled": True, "after_seconds": 7, "min_samples": 3}})
+    assert hedge_delay(settings, "p", "m") == 7
+    for value in (1.0, 2.0, 3.0):
+        LATENCIES.record("p", "m", value)
+    assert hedge_delay(settings, "p", "m") == 3.0
+
+
+def _hedging_client(monkeypatch, behaviours):
+    cancelled = []
+
+    async def fake_dispatch(self, system, user):
+        behaviour = behaviours[self.provider_type]
+        try:
+            delay, outcome = behaviour
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(self.provider_type)
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome, True
+
+    monkeypatch.setattr(llm.Client, "_dispatch_with_retry", fake_dispatch)
+    client = llm.Client(role="dev", provider="vertex_sdk", model="primary")
+    client.hedge_settings = {"enabled": True, "percentile": 95, "min_samples": 10, "after_seconds": 0.05, "max_backups": 1}
+    client.backup_models = [{"provider": "ollama", "model": "backup"}]
+    return client, cancelled
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled(monkeypatch):
+    client, cancelled = _hedging_client(monkeypatch, {"vertex_sdk": (5, "slow"), "ollama": (0.01, "fast")})
+
+    assert await client.chat("sys", "hi") == "fast"
+    assert client.last_hedge["winner"] == "ollama/backup"
+    assert client.last_hedge["launched"] == ["vertex_sdk/primary", "ollama/backup"]
+    assert cancelled == ["vertex_sdk"]
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_never_launches_backup(monkeypatch):
+    client, cancelled = _hedging_client(monkeypatch, {"vertex_sdk": (0, "quick"), "ollama": (0, "unused")})
+
+    assert await client.chat("sys", "hi") == "quick"
+    assert client.last_hedge["launched"] == ["vertex_sdk/primary"]
+    assert cancelled == []
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_launches_backup_without_waiting(monkeypatch):
+    client, _ = _hedging_client(monkeypatch, {"vertex_sdk": (0, RuntimeError("boom")), "ollama": (0, "rescued")})
+    client.hedge_settings["after_seconds"] = 30
+
+    assert await asyncio.wait_for(client.chat("sys", "hi"), timeout=2) == "rescued"
+    assert client.last_hedge["winner"] == "ollama/backup"
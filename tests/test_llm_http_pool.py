@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from a2a.runtime import running_agent
+
+from scripts import llm
+
+
+@pytest.fixture(autouse=True)
+def _reset_pool():
+    llm._HTTP_CLIENTS.clear()
+    yield
+    llm._HTTP_CLIENTS.clear()
+
+
+@pytest.mark.asyncio
+async def test_same_base_url_reuses_client():
+    first = llm.get_http_client("http://localhost:11434/")
+    second = llm.get_http_client("http://localhost:11434")
+    other = llm.get_http_client("http://localhost:4010/v1")
+
+    assert first is second
+    assert other is not first
+    await llm.close_http_clients()
+    assert first.is_closed and other.is_closed
+    assert not llm._HTTP_CLIENTS
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_come_from_provider_options():
+    client = llm.get_http_client(
+        "http://localhost:11434",
+        {"max_connections": 4, "max_keepalive_connections": 2, "keepalive_expiry": 5, "http_timeout": 12},
+    )
+    pool = client._transport._pool
+    assert pool._max_connections == 4
+    assert pool._max_keepalive_connections == 2
+    assert pool._keepalive_expiry == 5.0
+    assert client.timeout.read == 12.0
+    await llm.close_http_clients()
+
+
+def test_new_event_loop_gets_fresh_client():
+    async def _grab():
+        return llm.get_http_client("http://localhost:11434")
+
+    first = asyncio.run(_grab())
+    second = asyncio.run(_grab())
+    assert first is not second
+
+
+def test_client_left_by_a_finished_loop_releases_its_connections():
+    app = FastAPI()
+    app.get("/ping")(lambda: {"ok": True})
+
+    async def _ping(url, close=False):
+        client = llm.get_http_client(url)
+        (await client.get(f"{url}/ping")).raise_for_status()
+        if close:
+            await llm.close_http_clients()
+        return client
+
+    with running_agent(app) as url:
+        stale = asyncio.run(_ping(url))
+        [connection] = stale._transport._pool.connections
+        fd = connection._connection._network_stream.get_extra_info("socket").fileno()
+        with pytest.raises(BlockingIOError):
+            os.read(fd, 1)  # an idle keep-alive connection
+
+        fresh = asyncio.run(_ping(url, close=True))
+        assert fresh is not stale
+        assert os.read(fd, 1) == b""  # shut down when the next loop replaced the client
+
+
+@pytest.mark.asyncio
+async def test_openai_chat_uses_pooled_client():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "pong"}}]})
+
+    loop = asyncio.get_running_loop()
+    pooled = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    llm._HTTP_CLIENTS["http://fake/v1"] = (loop, pooled)
+
+    client = llm.Client(role="dev", provider="openai", model="gpt-test", base_url="http://fake/v1")
+    assert await client.chat("sys", "ping") == "pong"
+    assert await client.chat("sys", "ping") == "pong"
+    assert calls == ["http://fake/v1/chat/completions"] * 2
+    assert llm._HTTP_CLIENTS["http://fake/v1"][1] is pooled
+    await llm.close_http_clients()
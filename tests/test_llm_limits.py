@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from scripts import llm
+from scripts.llm_limits import InFlightGate, RateLimiter, TokenBucket, limiter_stats, reset_limiters, resolve_limiters
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "0")
+    reset_limiters()
+    yield
+    reset_limiters()
+
+
+def test_token_bucket_queues_reservations_in_order():
+    bucket = TokenBucket(per_minute=600, capacity=1)  # 10 tokens/s
+    assert bucket.reserve(1) == 0.0
+    first_wait = bucket.reserve(1)
+    second_wait = bucket.reserve(1)
+    assert 0.05 < first_wait <= 0.1
+    assert second_wait > first_wait
+
+
+def test_resolve_limiters_combines_provider_and_model_scopes():
+    cfg = {"rpm": 60, "models": {"gemini-2.5-pro": {"tpm": 1000}, "other": {}}}
+    limiters = resolve_limiters("vertex_sdk", "gemini-2.5-pro", cfg)
+    assert [limiter.name for limiter in limiters] == ["vertex_sdk", "vertex_sdk/gemini-2.5-pro"]
+    assert resolve_limiters("vertex_sdk", "gemini-2.5-pro", cfg)[0] is limiters[0]
+    assert [limiter.name for limiter in resolve_limiters("vertex_sdk", "other", cfg)] == ["vertex_sdk"]
+    assert resolve_limiters("ollama", "m", None) == []
+
+
+def test_resolve_limiters_follows_changed_limits():
+    first = resolve_limiters("ollama", "m", {"rpm": 60})[0]
+    assert resolve_limiters("ollama", "m", {"rpm": 60})[0] is first
+    reloaded = resolve_limiters("ollama", "m", {"rpm": 30, "max_in_flight": 2})[0]
+    assert reloaded is not first
+    assert reloaded.requests.rate == 0.5 and reloaded.gate.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_rpm_limit_waits_instead_of_failing():
+    limiter = RateLimiter("p", rpm=600)
+    limiter.requests = TokenBucket(per_minute=600, capacity=1)
+    assert await limiter.acquire() == pytest.approx(0.0, abs=0.01)
+    waited = await limiter.acquire()
+    assert waited >= 0.08
+    assert limiter.stats()["waited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_acquire_refunds_its_reservation():
+    limiter = RateLimiter("p", rpm=60, tpm=600)  # 1 request/s, 10 tokens/s
+    limiter.requests.reserve(60)
+    limiter.tokens.reserve(600)
+    waiter = asyncio.create_task(limiter.acquire(estimated_tokens=100))
+    await asyncio.sleep(0.05)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    # Without the refund the next caller would also wait for the cancelled call's budget.
+    assert limiter.requests.reserve(1) < 1.0
+    assert limiter.tokens.reserve(100) < 10.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    gate = InFlightGate(1)
+    await gate.acquire()
+    waiter = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    gate.release()
+    assert gate.active == 0
+    await asyncio.wait_for(gate.acquire(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_client_calls_respect_max_in_flight(monkeypatch):
+    running = 0
+    peak = 0
+
+    async def fake_provider(self, system, user):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "ok"
+
+    monkeypatch.setattr(llm.Client, "_call_provider", fake_provider)
+    client = llm.Client(role="dev", provider="codex_cli", model="default")
+    client.cfg = {"providers": {"codex_cli": {"type": "codex_cli", "rate_limit": {"max_in_flight": 1}}}}
+
+    results = await asyncio.gather(*(client.chat("sys", f"u{i}") for i in range(3)))
+    assert results == ["ok"] * 3
+    assert peak == 1
+    stats = limiter_stats()["codex_cli"]
+    assert stats["acquired"] == 3 and stats["waited"] == 2
+    assert stats["in_flight"] == 0 and stats["peak_in_flight"] == 1
+
+
+def test_client_limiters_are_scoped_by_provider_key():
+    prod = llm.Client(role="dev", model="gemini-2.5-pro")
+    prod._apply_provider_config("vertex_prod", {"type": "vertex_sdk", "rate_limit": {"rpm": 10}})
+    batch = llm.Client(role="dev", model="gemini-2.5-pro")
+    batch._apply_provider_config("vertex_batch", {"type": "vertex_sdk", "rate_limit": {"rpm": 120}})
+
+    [prod_limiter] = prod._rate_limiters()
+    [batch_limiter] = batch._rate_limiters()
+    assert (prod_limiter.name, batch_limiter.name) == ("vertex_prod", "vertex_batch")
+    # Alternating calls keep their own buckets instead of rebuilding a shared one.
+    assert prod._rate_limiters()[0] is prod_limiter and batch._rate_limiters()[0] is batch_limiter
+    assert prod_limiter.requests.rate == pytest.approx(10 / 60)
@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scripts import llm
+from scripts.llm_retry import RetryPolicy, classify_error, output_problem, record_finish_reason, retry_after_seconds
+
+
+def _status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://fake/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+def test_classify_error_kinds():
+    assert classify_error(_status_error(429)) == "rate_limited"
+    assert classify_error(_status_error(503)) == "server_error"
+    assert classify_error(_status_error(400)) is None
+    assert classify_error(httpx.ReadTimeout("slow")) == "timeout"
+    assert classify_error(httpx.ConnectError("refused")) == "connection"
+    assert classify_error(RuntimeError("CODEX_CLI_TIMEOUT")) == "timeout"
+    assert classify_error(RuntimeError("OLLAMA_MODEL_NOT_FOUND: m")) is None
+
+
+def test_retry_after_and_output_checks():
+    assert retry_after_seconds(_status_error(429, {"Retry-After": "7"})) == 7.0
+    assert retry_after_seconds(_status_error(429)) is None
+    assert output_problem("") == "empty_output"
+    assert output_problem("{\"a\": ", "length") == "truncated_output"
+    assert output_problem("{\"a\": ", "FinishReason.MAX_TOKENS") == "truncated_output"
+    assert output_problem("{}", "stop") is None
+    # An odd fence count is only a truncation signal when the role opts in.
+    assert output_problem("Wrap code in ``` fences.") is None
+    assert output_problem("```json\n{\"a\": ", check_fences=True) == "truncated_output"
+    assert output_problem("```json\n{}\n```", check_fences=True) is None
+
+
+def test_policy_layers_and_backoff_bounds():
+    policy = RetryPolicy.from_settings({"max_attempts": 6, "max_delay": 4}, {"max_attempts": 2})
+    assert policy.max_attempts == 2 and policy.max_delay == 4.0
+    assert all(0 <= policy.backoff(5) <= 4.0 for _ in range(50))
+    assert policy.backoff(1, retry_after=10) == 10
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setattr(llm.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def _client(monkeypatch, outcomes):
+    async def fake_dispatch(self, system, user):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if isinstance(outcome, tuple):  # (text, provider finish reason)
+            record_finish_reason(outcome[1])
+            return outcome[0]
+        return outcome
+
+    monkeypatch.setattr(llm.Client, "_dispatch_chat", fake_dispatch)
+    client = llm.Client(role="dev", provider="openai", model="gpt-test")
+    client.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=2)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_honouring_retry_after(monkeypatch, sleeps):
+    client = _client(monkeypatch, [_status_error(429, {"Retry-After": "3"}), _status_error(502), "done"])
+
+    assert await client.chat("sys", "hi") == "done"
+    assert sleeps[0] == 3.0
+    assert 0 <= sleeps[1] <= 1.0
+    assert [a["outcome"] for a in client.last_attempts] == ["rate_limited", "server_error", "ok"]
+    assert all("latency_seconds" in a for a in client.last_attempts)
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_are_not_retried(monkeypatch, sleeps):
+    client = _client(monkeypatch, [_status_error(401), "unused"])
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat("sys", "hi")
+    assert sleeps == []
+    assert client.last_attempts[0]["outcome"] == "fatal"
+
+
+@pytest.mark.asyncio
+async def test_truncated_output_is_retried_then_returned_uncached(monkeypatch, sleeps, tmp_path):
+    monkeypatch.setattr(llm, "_RESPONSE_CACHES", {})
+    monkeypatch.delenv("LLM_CACHE")
+    client = _client(monkeypatch, [("```json\n{", "length")] * 3)
+    client.cache_policy = True
+    client.cache_settings = {"dir": str(tmp_path)}
+
+    assert await client.chat("sys", "hi") == "```json\n{"
+    assert len(sleeps) == 2
+    assert not list(tmp_path.glob("*.json"))
+
+
+@pytest.mark.asyncio
+async def test_unbalanced_fences_are_retried_only_when_the_role_opts_in(monkeypatch, sleeps):
+    answer = "Use ```` to nest a ``` fence."
+    client = _client(monkeypatch, [(answer, "stop"), ("```py\nx = 1", None), "```py\nx = 1\n```"])
+    assert await client.chat("sys", "hi") == answer
+    assert sleeps == []
+
+    client.retry_policy = RetryPolicy.from_settings({}, {"detect_unclosed_fences": True})
+    assert await client.chat("sys", "again") == "```py\nx = 1\n```"
+    assert len(sleeps) == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries_early(monkeypatch, sleeps):
+    client = _client(monkeypatch, [_status_error(429, {"Retry-After": "60"}), "unused"])
+    client.retry_policy = RetryPolicy(max_attempts=5, deadline_seconds=10)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat("sys", "hi")
+    assert sleeps == []
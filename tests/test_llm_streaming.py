@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from scripts import llm
+
+
+@pytest.fixture(autouse=True)
+def _reset_pool(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "0")
+    llm._HTTP_CLIENTS.clear()
+    yield
+    llm._HTTP_CLIENTS.clear()
+
+
+def _install(base_url: str, handler) -> None:
+    loop = asyncio.get_running_loop()
+    llm._HTTP_CLIENTS[base_url] = (loop, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+@pytest.mark.asyncio
+async def test_ollama_stream_yields_ndjson_chunks():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        lines = [
+            {"message": {"content": "Hel"}, "done": False},
+            {"message": {"content": "lo"}, "done": False},
+            {"message": {"content": ""}, "done": True, "eval_count": 2},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    _install("http://ollama", handler)
+    client = llm.Client(role="dev", provider="ollama", model="ollama/m", base_url="http://ollama")
+    chunks = [chunk async for chunk in client.stream_chat("sys", "hi")]
+
+    assert chunks == ["Hel", "lo"]
+    assert seen[0]["stream"] is True and seen[0]["model"] == "m"
+    stats = client.last_stream_stats
+    assert stats["chunks"] == 2 and stats["chars"] == 5
+    assert stats["ttft_seconds"] is not None and stats["stopped_early"] is False
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_stops_on_marker_split_across_chunks():
+    def handler(request: httpx.Request) -> httpx.Response:
+        pieces = ["<files>a</fi", "les>", "trailing junk"]
+        body = "".join(
+            f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n" for piece in pieces
+        ) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode())
+
+    _install("http://fake/v1", handler)
+    client = llm.Client(role="dev", provider="openai", model="gpt-test", base_url="http://fake/v1")
+    chunks = [chunk async for chunk in client.stream_chat("sys", "hi", stop_on="</files>")]
+
+    assert "".join(chunks) == "<files>a</files>"
+    assert client.last_stream_stats["stopped_early"] is True
+
+
+@pytest.mark.asyncio
+async def test_chat_collects_stream_when_role_opts_in():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        body = "".join(
+            f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n" for piece in ("po", "ng")
+        ) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode())
+
+    _install("http://fake/v1", handler)
+    client = llm.Client(role="dev", provider="openai", model="gpt-test", base_url="http://fake/v1", stream=True)
+    assert await client.chat("sys", "ping") == "pong"
+    assert client.last_stream_stats["chunks"] == 2
+
+
+@pytest.mark.asyncio
+async def test_providers_without_streaming_yield_full_answer(monkeypatch):
+    async def fake_cli(self, system, user):
+        return "whole answer"
+
+    monkeypatch.setattr(llm.Client, "_cli_chat_async", fake_cli)
+    client = llm.Client(role="dev", provider="codex_cli", model="default")
+    assert [chunk async for chunk in client.stream_chat("sys", "hi")] == ["whole answer"]
@@ -0,0 +1,56 @@
+import sys
+
+from scripts.run_qa import run_story_qa
+
+
+def _write(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def test_unchanged_test_files_are_served_from_the_cache(tmp_path):
+    backend = tmp_path / "project" / "backend-fastapi"
+    _write(backend, {
+        "app/__init__.py": "",
+        "app/users.py": "def name():\n    return 'ada'\n",
+        "app/orders.py": "def total():\n    return 3\n",
+        "tests/test_users.py": "from app.users import name\n\ndef test_name():\n    assert name() == 'ada'\n",
+        "tests/test_orders.py": "from app.orders import total\n\ndef test_total():\n    assert total() == 3\n",
+    })
+    art_dir = tmp_path / "qa"
+
+    def run(story_id, **kwargs):
+        return run_story_qa(
+            story_id,
+            allow_no_tests=False,
+            project_root=tmp_path / "project",
+            changed_paths=["project/backend-fastapi/app/unused.py"],  # no test reaches it -> full suite
+            pytest_cmd=[sys.executable, "-m", "pytest", "-p", "no:cacheprovider"],
+            art_dir=art_dir,
+            **kwargs,
+        )
+
+    first = run("C-1")
+    assert first["status"] == "pass"
+    assert first["cache"] == {"hits": 0, "misses": 2, "hit_rate": 0.0}
+
+    second = run("C-2")
+    assert second["status"] == "pass"
+    assert second["areas"]["backend"]["cache"]["hit_rate"] == 1.0
+    assert not (art_dir / "C-2" / "pytest_output.txt").exists()  # pytest never started
+
+    # Data files are not in the import graph, so any of them invalidates every test file.
+    _write(backend, {"tests/fixtures/users.json": '["ada"]\n'})
+    assert run("C-2b")["cache"]["misses"] == 2
+
+    _write(backend, {"app/orders.py": "def total():\n    return 4\n"})
+    third = run("C-3")
+    assert third["status"] == "fail"
+    assert third["cache"]["hits"] == 1 and third["cache"]["misses"] == 1
+    assert "test_orders.py" in (art_dir / "C-3" / "run.log").read_text(encoding="utf-8")
+
+    uncached = run("C-4", use_cache=False)
+    assert uncached["cache"] is None
+    assert "1 failed" in (art_dir / "C-4" / "pytest_output.txt").read_text(encoding="utf-8")
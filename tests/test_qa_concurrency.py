@@ -0,0 +1,48 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+from scripts.run_qa import run_story_qa
+
+
+def _fixture_project(root, *, passing: bool):
+    tests = root / "project" / "backend-fastapi" / "tests"
+    tests.mkdir(parents=True)
+    assertion = "1 + 1 == 2" if passing else "1 + 1 == 3"
+    (tests / "test_story.py").write_text(f"def test_story():\n    assert {assertion}\n", encoding="utf-8")
+    return root / "project"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_qa_runs_do_not_share_state(tmp_path):
+    art_dir = tmp_path / "qa"
+    jobs = {f"QA-{n}": n % 3 != 0 for n in range(6)}  # QA-0 and QA-3 fail
+    env_before = dict(os.environ)
+
+    reports = await asyncio.gather(*(
+        asyncio.to_thread(
+            run_story_qa,
+            sid,
+            allow_no_tests=False,
+            project_root=_fixture_project(tmp_path / sid, passing=passing),
+            changed_paths=["project/backend-fastapi/app/main.py"],
+            pytest_cmd=[sys.executable, "-m", "pytest", "-p", "no:cacheprovider"],
+            art_dir=art_dir,
+            use_cache=False,
+        )
+        for sid, passing in jobs.items()
+    ))
+
+    assert dict(os.environ) == env_before
+    assert not (art_dir / "last_report.json").exists()
+    for (sid, passing), report in zip(jobs.items(), reports):
+        assert report["story_context"] == sid
+        assert report["status"] == ("pass" if passing else "fail"), report
+        assert report["areas"]["web"]["skipped"]
+        on_disk = json.loads((art_dir / sid / "report.json").read_text(encoding="utf-8"))
+        assert on_disk == report
+        output = (art_dir / sid / "pytest_output.txt").read_text(encoding="utf-8")
+        assert ("1 passed" if passing else "1 failed") in output
@@ -0,0 +1,64 @@
+import json
+import sys
+
+from scripts.qa_failures import LiveFailureParser, parse_jest_results
+from scripts.run_qa import run_story_qa
+
+
+def test_failure_details_come_from_junit_and_stream_live(tmp_path):
+    tests = tmp_path / "project" / "backend-fastapi" / "tests"
+    tests.mkdir(parents=True)
+    (tests / "test_story.py").write_text(
+        "def test_ok():\n    pass\n\n"
+        "def test_total():\n    expected = 4\n    assert 2 + 1 == expected, 'totals differ'\n",
+        encoding="utf-8",
+    )
+    art_dir = tmp_path / "qa"
+
+    report = run_story_qa(
+        "F-1",
+        allow_no_tests=False,
+        project_root=tmp_path / "project",
+        changed_paths=[],
+        pytest_cmd=[sys.executable, "-m", "pytest", "-p", "no:cacheprovider"],
+        art_dir=art_dir,
+        use_cache=False,
+    )
+
+    assert report["status"] == "fail"
+    [error] = report["failure_details"]["backend"]["errors"]
+    assert error["test"] == "test_total" and error["type"] == "pytest_failure"
+    assert error["error"].startswith("AssertionError: totals differ")
+    assert "expected = 4" in error["error"]  # full traceback, not the first three console lines
+    live = [json.loads(line) for line in (art_dir / "F-1" / "failures.live.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(f["test"], f["type"]) for f in live] == [("tests/test_story.py::test_total", "pytest_failure")]
+    assert "1 failed" in (art_dir / "F-1" / "run.log").read_text(encoding="utf-8")
+
+
+def test_jest_json_results(tmp_path):
+    results = tmp_path / "jest_results.json"
+    results.write_text(json.dumps({"testResults": [
+        {"name": "/w/tests/sum.test.js", "status": "failed", "message": "", "assertionResults": [
+            {"fullName": "sum adds", "status": "failed", "failureMessages": ["\x1b[31mExpected: 3\x1b[39m\nReceived: 4"]},
+            {"fullName": "sum zero", "status": "passed", "failureMessages": []},
+        ]},
+        {"name": "/w/tests/broken.test.js", "status": "failed", "message": "SyntaxError: Unexpected token", "assertionResults": []},
+    ]}), encoding="utf-8")
+
+    assert parse_jest_results(results) == [
+        {"test": "sum adds", "error": "Expected: 3\nReceived: 4", "type": "jest_failure", "file": "/w/tests/sum.test.js"},
+        {"test": "/w/tests/broken.test.js", "error": "SyntaxError: Unexpected token", "type": "jest_suite_error", "file": "/w/tests/broken.test.js"},
+    ]
+    assert parse_jest_results(tmp_path / "missing.json") is None
+
+
+def test_live_parser_handles_lines_split_across_chunks(tmp_path):
+    live = LiveFailureParser(tmp_path / "live.jsonl", source="pytest")
+    for chunk in (b"..F\n_____ ERROR collecting tests/test_b", b"ad.py _____\nFAILED tests/test_a.py::te", b"st_x - assert 0\nERROR tests/test_bad.py"):
+        live.feed(chunk)
+    live.close()
+
+    assert [(f["test"], f["type"], f["error"]) for f in live.failures] == [
+        ("tests/test_bad.py", "pytest_collection_error", ""),
+        ("tests/test_a.py::test_x", "pytest_failure", "assert 0"),
+    ]
@@ -0,0 +1,63 @@
+import json
+import sys
+
+import pytest
+
+from scripts import pytest_server
+from scripts.run_qa import run_story_qa
+
+PYTEST_CMD = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider"]
+
+
+def _project(root, *, backend_test: str, web: bool = False):
+    tests = root / "project" / "backend-fastapi" / "tests"
+    tests.mkdir(parents=True)
+    (tests / "test_story.py").write_text(backend_test, encoding="utf-8")
+    if web:
+        web_root = root / "project" / "web-express"
+        (web_root / "tests").mkdir(parents=True)
+        (web_root / "tests" / "story.test.js").write_text("// placeholder\n", encoding="utf-8")
+        (web_root / "slow.js").write_text("setTimeout(() => {}, 1500);\n", encoding="utf-8")
+        (web_root / "package.json").write_text(json.dumps({"name": "web", "scripts": {"test": "node slow.js"}}), encoding="utf-8")
+    return root / "project"
+
+
+def test_backend_and_web_suites_run_concurrently(tmp_path):
+    project = _project(
+        tmp_path,
+        backend_test="import time\n\ndef test_slow():\n    time.sleep(1.5)\n",
+        web=True,
+    )
+
+    report = run_story_qa(
+        "PAR-1", allow_no_tests=False, project_root=project, changed_paths=[], pytest_cmd=PYTEST_CMD, art_dir=tmp_path / "qa"
+    )
+
+    assert report["status"] == "pass", report
+    backend, web = report["areas"]["backend"]["wall_seconds"], report["areas"]["web"]["wall_seconds"]
+    assert backend >= 1.5 and web >= 1.5
+    assert report["wall_seconds"] < backend + web - 1.0
+
+
+@pytest.mark.skipif(not hasattr(__import__("os"), "fork"), reason="warm server needs fork")
+def test_warm_pytest_server_is_reused_across_runs(tmp_path):
+    try:
+        outcomes = []
+        for n, assertion in enumerate(["True", "False"]):
+            project = _project(tmp_path / f"s{n}", backend_test=f"def test_story():\n    assert {assertion}\n")
+            report = run_story_qa(
+                f"WARM-{n}",
+                allow_no_tests=False,
+                project_root=project,
+                changed_paths=["project/backend-fastapi/app/main.py"],
+                pytest_cmd=PYTEST_CMD,
+                art_dir=tmp_path / "qa",
+                warm_pytest=True,
+            )
+            assert report["areas"]["backend"]["warm_server"]
+            outcomes.append(report["status"])
+        assert outcomes == ["pass", "fail"]
+        assert "1 failed" in (tmp_path / "qa" / "WARM-1" / "pytest_output.txt").read_text(encoding="utf-8")
+        assert pytest_server.warm_server_stats()[sys.executable] == {"starts": 1, "runs": 2}
+    finally:
+        pytest_server.close_warm_pytest_servers()
@@ -0,0 +1,90 @@
+from scripts.story_dag import StoryDAG, parse_depends_on
+
+
+def _story(story_id, status="todo", priority="P2", depends_on=None):
+    story = {"id": story_id, "status": status, "priority": priority}
+    if depends_on is not None:
+        story["depends_on"] = depends_on
+    return story
+
+
+def test_parse_depends_on_accepts_list_and_csv():
+    assert parse_depends_on({"depends_on": "S1, S2"}) == ["S1", "S2"]
+    assert parse_depends_on({"depends_on": ["S1", None, ""]}) == ["S1"]
+    assert parse_depends_on({}) == []
+
+
+def test_ready_respects_dependencies_and_width():
+    stories = [
+        _story("S1", status="done"),
+        _story("S2", depends_on=["S1"]),
+        _story("S3", depends_on=["S2"]),
+        _story("S4"),
+        _story("S5"),
+    ]
+    dag = StoryDAG(stories)
+    assert [s["id"] for s in dag.ready(stories)] == ["S2", "S4", "S5"]
+    assert [s["id"] for s in dag.ready(stories, 2)] == ["S2", "S4"]
+    assert dag.unmet("S3", {"S2": "in_progress"}) == ["S2"]
+
+
+def test_critical_path_and_priority_order():
+    stories = [
+        _story("LEAF"),
+        _story("ROOT"),
+        _story("MID", depends_on="ROOT"),
+        _story("TAIL", depends_on="MID"),
+        _story("URGENT", priority="P0"),
+    ]
+    dag = StoryDAG(stories)
+    assert dag.depth("ROOT") == 3
+    assert dag.fan_out("ROOT") == 2
+    assert [s["id"] for s in dag.ready(stories)] == ["URGENT", "ROOT", "LEAF"]
+
+
+def test_cycles_are_detected_and_never_ready():
+    stories = [
+        _story("A", depends_on=["C"]),
+        _story("B", depends_on=["A"]),
+        _story("C", depends_on=["B"]),
+        _story("D", depends_on=["D"]),
+        _story("E", depends_on=["GHOST"]),
+    ]
+    dag = StoryDAG(stories)
+    assert dag.cycles == [["A", "B", "C"], ["D"]]
+    assert dag.unknown == {"E": ["GHOST"]}
+    assert [s["id"] for s in dag.ready(stories)] == ["E"]
+
+
+def test_orchestrator_activates_only_unblocked_waiters(monkeypatch):
+    from scripts import orchestrate
+
+    monkeypatch.setattr(orchestrate, "append_note", lambda text: None)
+    stories = [
+        _story("S1", status="done"),
+        _story("S2", status="quality_gate_waiting", depends_on=["S1"]),
+        _story("S3", status="quality_gate_waiting", depends_on=["S1", "S4"]),
+        _story("S4", status="in_progress"),
+        _story("S5", status="quality_gate_waiting"),
+    ]
+    assert orchestrate.check_and_activate_waiting_stories(stories, "S1") == ["S2", "S5"]
+    assert stories[2]["status"] == "quality_gate_waiting"  # S4 is not done yet
+
+    cyclic = [_story("A", depends_on=["B"]), _story("B", depends_on=["A"]), _story("C")]
+    orchestrate._block_dependency_cycles(StoryDAG(cyclic), cyclic)
+    assert [s["status"] for s in cyclic] == ["blocked_dependency_cycle", "blocked_dependency_cycle", "todo"]
+
+
+def test_waiters_without_dependencies_wake_after_any_completion(monkeypatch):
+    from scripts import orchestrate
+
+    monkeypatch.setattr(orchestrate, "append_note", lambda text: None)
+    stories = [
+        _story("S1", status="done"),
+        _story("S2", status="quality_gate_waiting"),
+        _story("S3", status="quality_gate_waiting"),
+        _story("S4", status="quality_gate_waiting", depends_on=["S5"]),
+        _story("S5", status="in_progress"),
+    ]
+    assert orchestrate.check_and_activate_waiting_stories(stories, "S1") == ["S2", "S3"]
+    assert [s["status"] for s in stories[1:4]] == ["todo", "todo", "quality_gate_waiting"]
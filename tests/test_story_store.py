@@ -0,0 +1,78 @@
+import os
+
+import yaml
+
+from scripts.story_store import StoryStore
+
+
+def _write_yaml(path, stories):
+    path.write_text(yaml.safe_dump(stories, sort_keys=False), encoding="utf-8")
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_transitions_are_journaled_and_survive_restart(tmp_path):
+    stories_yaml = tmp_path / "stories.yaml"
+    _write_yaml(stories_yaml, [{"id": "S1", "status": "todo"}, {"id": "S2", "status": "todo"}])
+    before = stories_yaml.read_text(encoding="utf-8")
+
+    store = StoryStore(stories_yaml)
+    s1 = store.stories()[0]
+    s1["status"] = "in_progress"
+    assert store.put(s1)
+    assert not store.put(s1)  # unchanged -> nothing appended
+    assert stories_yaml.read_text(encoding="utf-8") == before  # the view is only written on demand
+
+    reopened = StoryStore(stories_yaml)
+    assert [s["status"] for s in reopened.stories()] == ["in_progress", "todo"]
+    assert reopened.ids_by_status() == {"in_progress": ["S1"], "todo": ["S2"]}
+
+    reopened.materialize()
+    assert yaml.safe_load(stories_yaml.read_text(encoding="utf-8"))[0]["status"] == "in_progress"
+    assert reopened.stats["imports"] == 0  # its own view is not re-imported
+
+
+def test_torn_tail_is_dropped_and_other_writers_are_seen(tmp_path):
+    stories_yaml = tmp_path / "stories.yaml"
+    _write_yaml(stories_yaml, [{"id": "S1", "status": "todo"}])
+    writer, reader = StoryStore(stories_yaml), StoryStore(stories_yaml)
+    writer.put({"id": "S1", "status": "done"})
+    assert reader.get("S1")["status"] == "done"
+
+    with open(writer.journal_path, "ab") as handle:
+        handle.write(b'{"op": "put", "story": {"id": "S1", "sta')  # crash mid-append
+    recovered = StoryStore(stories_yaml)
+    assert recovered.get("S1")["status"] == "done"
+    recovered.put({"id": "S2", "status": "todo"})
+    assert [s["id"] for s in StoryStore(stories_yaml).stories()] == ["S1", "S2"]
+
+
+def test_external_yaml_edits_are_imported_but_garbage_is_not(tmp_path):
+    stories_yaml = tmp_path / "stories.yaml"
+    _write_yaml(stories_yaml, [{"id": "S1", "status": "done"}])
+    store = StoryStore(stories_yaml)
+    store.materialize()
+
+    _write_yaml(stories_yaml, [{"id": "S1", "status": "todo"}, {"id": "S3", "status": "todo"}])
+    _bump_mtime(stories_yaml)
+    assert [(s["id"], s["status"]) for s in store.stories()] == [("S1", "todo"), ("S3", "todo")]
+
+    stories_yaml.write_text("- id: [unclosed", encoding="utf-8")
+    _bump_mtime(stories_yaml)
+    assert [s["id"] for s in store.stories()] == ["S1", "S3"]
+
+
+def test_save_deletes_missing_and_journal_compacts(tmp_path):
+    stories_yaml = tmp_path / "stories.yaml"
+    store = StoryStore(stories_yaml, compact_after=5)
+    store.save([{"id": "S1", "status": "todo"}, {"id": "S2", "status": "todo"}])
+    for attempt in range(6):
+        store.put({"id": "S1", "status": "todo", "attempt": attempt})
+    store.save([{"id": "S1", "status": "done"}])
+
+    assert [s["id"] for s in StoryStore(stories_yaml).stories()] == ["S1"]
+    assert store.stats["compactions"] >= 1
+    assert len(store.journal_path.read_text(encoding="utf-8").splitlines()) < 5
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from scripts import llm
+
+
+@pytest.mark.asyncio
+async def test_client_awaits_native_async_provider(monkeypatch):
+    calls = []
+
+    async def fake_achat(**kwargs):
+        calls.append(kwargs)
+        return "async-ok"
+
+    def forbidden_thread_path(self, system, user):
+        raise AssertionError("sync provider should not be used when an async one is registered")
+
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setitem(llm.PROVIDER_ASYNC_REGISTRY, "vertex_sdk", fake_achat)
+    monkeypatch.setattr(llm.Client, "_vertex_chat", forbidden_thread_path)
+    client = llm.Client(role="architect", provider="vertex_sdk", model="gemini-test")
+    client.provider_options = {"project_id": "p", "location": "europe-west1", "auth": "gcloud"}
+
+    assert await client.chat("sys", "hi") == "async-ok"
+    assert calls[0]["model"] == "gemini-test"
+    assert calls[0]["project_id"] == "p" and calls[0]["auth"] == "gcloud"
+
+
+def test_genai_client_is_cached_per_project_and_location(monkeypatch):
+    pytest.importorskip("google.genai")
+    from scripts.providers import vertex_sdk
+
+    built = []
+    monkeypatch.setattr(vertex_sdk, "_build_client", lambda *key: built.append(key) or object())
+    vertex_sdk.clear_clients()
+
+    first = vertex_sdk.get_client("p", "us-central1")
+    assert vertex_sdk.get_client("p", "us-central1") is first
+    assert vertex_sdk.get_client("p", "europe-west1") is not first
+    assert len(built) == 2
+    vertex_sdk.clear_clients()
+
+
+def test_async_client_is_rebuilt_for_each_event_loop_and_closed(monkeypatch):
+    pytest.importorskip("google.genai")
+    from scripts.providers import vertex_sdk
+
+    class FakeAio:
+        def __init__(self):
+            self.closed = False
+
+        async def aclose(self):
+            self.closed = True
+
+    class FakeClient:
+        def __init__(self):
+            self.aio = FakeAio()
+
+    monkeypatch.setattr(vertex_sdk, "_build_client", lambda *key: FakeClient())
+    vertex_sdk.clear_clients()
+
+    async def grab(close=False):
+        client = vertex_sdk.get_async_client("p", "us-central1")
+        assert vertex_sdk.get_async_client("p", "us-central1") is client
+        if close:
+            await llm.close_http_clients()
+        return client
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab(close=True))
+    assert second is not first
+    assert second.aio.closed and not first.aio.closed  # the first loop had exited; nothing could await it
+    assert not vertex_sdk._ASYNC_CLIENTS
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from scripts.providers import auth, vertex_cli
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counting_fetcher(delay: float = 0.0):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if delay:
+            time.sleep(delay)
+        return f"token-{len(calls)}", None
+
+    return fetch, calls
+
+
+def test_token_is_cached_until_refresh_margin():
+    clock = FakeClock()
+    fetch, calls = _counting_fetcher()
+    manager = auth.TokenManager(fetch, lifetime_seconds=100, refresh_margin=10, clock=clock)
+
+    assert manager.get_token() == "token-1"
+    clock.now += 50
+    assert manager.get_token() == "token-1"
+    assert len(calls) == 1
+    stats = manager.stats()
+    assert stats["refreshes"] == 1 and stats["hits"] == 1
+    assert stats["last_refresh_seconds"] is not None
+
+
+def test_refresh_ahead_runs_in_background():
+    clock = FakeClock()
+    fetch, calls = _counting_fetcher()
+    manager = auth.TokenManager(fetch, lifetime_seconds=100, refresh_margin=10, clock=clock)
+    manager.get_token()
+
+    clock.now += 95  # inside the margin but not yet expired
+    assert manager.get_token() == "token-1"
+    manager._background.join(timeout=2)
+    assert manager.get_token() == "token-2"
+    assert manager.stats()["background_refreshes"] == 1
+
+
+def test_concurrent_callers_share_one_fetch():
+    fetch, calls = _counting_fetcher(delay=0.05)
+    manager = auth.TokenManager(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["token-1"] * 8
+    assert len(calls) == 1
+
+
+def test_expired_token_and_invalidate_force_foreground_refresh():
+    clock = FakeClock()
+    fetch, calls = _counting_fetcher()
+    manager = auth.TokenManager(fetch, lifetime_seconds=100, refresh_margin=10, clock=clock)
+    manager.get_token()
+    clock.now += 101
+    assert manager.get_token() == "token-2"
+    manager.invalidate()
+    assert manager.get_token() == "token-3"
+
+
+def test_vertex_cli_retries_once_after_401(monkeypatch):
+    fetch, calls = _counting_fetcher()
+    monkeypatch.setattr(auth, "_DEFAULT_MANAGER", auth.TokenManager(fetch))
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["Authorization"])
+        if len(seen) == 1:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+    monkeypatch.setattr(vertex_cli, "_HTTP_CLIENT", httpx.Client(transport=httpx.MockTransport(handler)))
+    result = vertex_cli.chat([{"role": "user", "content": [{"type": "text", "text": "hi"}]}], project_id="p")
+
+    assert result == "ok"
+    assert seen == ["Bearer token-1", "Bearer token-2"]
+
+
+def test_vertex_cli_stream_retries_once_after_401(monkeypatch):
+    fetch, calls = _counting_fetcher()
+    monkeypatch.setattr(auth, "_DEFAULT_MANAGER", auth.TokenManager(fetch))
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["Authorization"])
+        if len(seen) == 1:
+            return httpx.Response(401)
+        event = {"candidates": [{"content": {"parts": [{"text": "ok"}]}, "finishReason": "STOP"}]}
+        return httpx.Response(200, text=f"data: {json.dumps(event)}\n\n")
+
+    async def collect():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        messages = [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]
+        chunks = [chunk async for chunk in vertex_cli.stream_chat(messages, project_id="p", http_client=client)]
+        await client.aclose()
+        return chunks
+
+    assert asyncio.run(collect()) == ["ok"]
+    assert seen == ["Bearer token-1", "Bearer token-2"]
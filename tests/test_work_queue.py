@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from scripts.work_queue import WorkItem, WorkQueue
+
+
+@pytest.mark.asyncio
+async def test_free_slot_pulls_next_item_without_waiting_for_slow_one():
+    remaining = ["slow", "a", "b", "c"]
+    finished = {}
+    started_at = time.monotonic()
+
+    def pending():
+        return [WorkItem("dev", sid) for sid in remaining]
+
+    async def run(item):
+        remaining.remove(item.story_id)
+        await asyncio.sleep(0.3 if item.story_id == "slow" else 0.05)
+        finished[item.story_id] = time.monotonic() - started_at
+
+    stats = await WorkQueue(pending, run, workers=2).run()
+
+    assert stats["tasks"] == {"dev": 4}
+    # a, b and c all ran on the second slot while "slow" was still going.
+    assert max(finished["a"], finished["b"], finished["c"]) < finished["slow"]
+    assert 0 < stats["slot_utilization"] <= 1
+
+
+@pytest.mark.asyncio
+async def test_completion_unlocks_dependents_and_failures_do_not_stop_workers():
+    done = set()
+    started = []
+
+    def pending():
+        items = []
+        if "root" not in started:
+            items.append(WorkItem("dev", "root"))
+        if "root" in done and "child" not in started:
+            items.append(WorkItem("dev", "child"))
+        if "boom" not in started:
+            items.append(WorkItem("architect", "boom"))
+        return items
+
+    async def run(item):
+        started.append(item.story_id)
+        if item.story_id == "boom":
+            raise RuntimeError("architect crashed")
+        await asyncio.sleep(0.01)
+        done.add(item.story_id)
+
+    stats = await WorkQueue(pending, run, workers=3).run()
+
+    assert started.index("child") > started.index("root")
+    assert stats["tasks"] == {"dev": 2}
+    assert stats["failed"] == {"architect": 1}
+
+
+@pytest.mark.asyncio
+async def test_process_iteration_persists_every_transition(monkeypatch):
+    from scripts import orchestrate
+
+    saves = []
+    monkeypatch.setattr(orchestrate, "save_story", lambda story: saves.append({s["id"]: s["status"] for s in stories}))
+    monkeypatch.setattr(orchestrate, "record_metric", lambda metric: None)
+    monkeypatch.setattr(orchestrate, "append_note", lambda text: None)
+
+    async def fake_process_story(story, **kwargs):
+        await asyncio.sleep(0.2 if story["id"] == "SLOW" else 0.01)
+        story["status"] = "done"
+
+    monkeypatch.setattr(orchestrate, "_process_story", fake_process_story)
+    stories = [
+        {"id": "SLOW", "status": "todo"},
+        {"id": "BASE", "status": "todo"},
+        {"id": "NEXT", "status": "todo", "depends_on": ["BASE"]},
+    ]
+
+    assert await orchestrate._process_iteration(
+        1, stories, allow_no_tests=False, enable_architect_intervention=False, status_no_tests="in_review", workers=2
+    )
+    assert [s["status"] for s in stories] == ["done", "done", "done"]
+    # NEXT started (and finished) while SLOW still held the other slot.
+    assert {"SLOW": "in_progress", "BASE": "done", "NEXT": "done"} in saves
+
+
+@pytest.mark.asyncio
+async def test_story_that_raises_goes_back_to_todo(monkeypatch):
+    from scripts import orchestrate
+
+    saved, notes = [], []
+    monkeypatch.setattr(orchestrate, "save_story", lambda story: saved.append((story["id"], story["status"])))
+    monkeypatch.setattr(orchestrate, "record_metric", lambda metric: None)
+    monkeypatch.setattr(orchestrate, "append_note", notes.append)
+
+    async def broken_workspace(story, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(orchestrate, "_process_story", broken_workspace)
+    stories = [{"id": "S1", "status": "todo"}, {"id": "S2", "status": "todo", "depends_on": ["S1"]}]
+
+    assert await orchestrate._process_iteration(
+        1, stories, allow_no_tests=False, enable_architect_intervention=False, status_no_tests="in_review", workers=1
+    )  # not "backlog empty": the next iteration retries
+    assert [s["status"] for s in stories] == ["todo", "todo"]
+    assert saved[-1] == ("S1", "todo")
+    assert "disk full" in notes[-1]
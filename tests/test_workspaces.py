@@ -0,0 +1,110 @@
+import pytest
+
+from scripts import run_dev
+from scripts.workspaces import WorkspaceManager
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "backend-fastapi" / "app").mkdir(parents=True)
+    (root / "backend-fastapi" / "app" / "main.py").write_text("app = 1\n", encoding="utf-8")
+    (root / "backend-fastapi" / "app" / "old.py").write_text("old\n", encoding="utf-8")
+    (root / "web-express" / "node_modules" / "dep").mkdir(parents=True)
+    (root / "web-express" / "node_modules" / "dep" / "index.js").write_text("x", encoding="utf-8")
+    return root
+
+
+def test_story_writes_stay_in_workspace_until_merge(tmp_path, project):
+    manager = WorkspaceManager(project, tmp_path / "workspaces")
+    ws = manager.create("S1")
+
+    main_py = "backend-fastapi/app/main.py"
+    assert (ws.project / main_py).stat().st_ino == (project / main_py).stat().st_ino
+    assert (ws.project / "web-express" / "node_modules").is_symlink()
+
+    run_dev.safe_write(f"project/{main_py}", "app = 2\n", root=ws.root)
+    run_dev.safe_write("project/backend-fastapi/app/new.py", "new\n", root=ws.root)
+    (ws.project / "backend-fastapi" / "app" / "old.py").unlink()
+    assert (project / main_py).read_text(encoding="utf-8") == "app = 1\n"
+    assert manager.changes(ws) == {
+        main_py: "modified",
+        "backend-fastapi/app/new.py": "added",
+        "backend-fastapi/app/old.py": "deleted",
+    }
+
+    result = manager.merge(ws)
+    assert result.ok
+    assert (project / main_py).read_text(encoding="utf-8") == "app = 2\n"
+    assert (project / "backend-fastapi" / "app" / "new.py").exists()
+    assert not (project / "backend-fastapi" / "app" / "old.py").exists()
+
+    manager.discard(ws)
+    assert (project / main_py).exists() and not ws.root.exists()
+
+
+def test_conflicting_merge_applies_nothing(tmp_path, project):
+    manager = WorkspaceManager(project, tmp_path / "workspaces")
+    first, second, same = manager.create("S1"), manager.create("S2"), manager.create("S3")
+    run_dev.safe_write("backend-fastapi/app/main.py", "app = 'first'\n", root=first.root)
+    run_dev.safe_write("backend-fastapi/app/main.py", "app = 'second'\n", root=second.root)
+    run_dev.safe_write("backend-fastapi/app/other.py", "other\n", root=second.root)
+    run_dev.safe_write("backend-fastapi/app/main.py", "app = 'first'\n", root=same.root)
+
+    assert manager.merge(first).ok
+    result = manager.merge(second)
+    assert result.conflicts == ["backend-fastapi/app/main.py"]
+    assert not (project / "backend-fastapi" / "app" / "other.py").exists()
+    assert manager.merge(same).ok  # identical content on both sides is not a conflict
+    assert (project / "backend-fastapi" / "app" / "main.py").read_text(encoding="utf-8") == "app = 'first'\n"
+
+
+
+def test_file_replaced_while_cloning_is_not_taken_as_the_base(tmp_path, project):
+    manager = WorkspaceManager(project, tmp_path / "workspaces")
+    clone_file = manager._clone_file
+    main_py = project / "backend-fastapi" / "app" / "main.py"
+
+    def clone_during_a_replace(src, dst):
+        assert manager._merge_lock.locked()  # merges wait for the whole walk
+        if src == main_py:
+            replacement = main_py.with_suffix(".tmp")
+            replacement.write_text("app = 'elsewhere'\n", encoding="utf-8")
+            replacement.replace(main_py)  # a writer outside the manager, between stamp and link
+        clone_file(src, dst)
+
+    manager._clone_file = clone_during_a_replace
+    ws = manager.create("S1")
+    manager._clone_file = clone_file
+    run_dev.safe_write("backend-fastapi/app/main.py", "app = 'story'\n", root=ws.root)
+
+    assert manager.merge(ws).conflicts == ["backend-fastapi/app/main.py"]
+    assert main_py.read_text(encoding="utf-8") == "app = 'elsewhere'\n"
+
+@pytest.mark.asyncio
+async def test_process_story_merges_only_after_qa_pass(tmp_path, project, monkeypatch):
+    from scripts import orchestrate
+
+    manager = WorkspaceManager(project, tmp_path / "workspaces")
+    monkeypatch.setattr(orchestrate, "WORKSPACES", manager)
+    monkeypatch.setattr(orchestrate, "_story_workspaces_enabled", lambda skip_qa: True)
+    monkeypatch.setattr(orchestrate, "append_note", lambda text: None)
+    monkeypatch.setattr(orchestrate, "STORY_STORE", type("Store", (), {"get": staticmethod(lambda sid: None)})())
+    target = project / "backend-fastapi" / "app" / "main.py"
+
+    async def fake_execute_role(role, payload):
+        if role == "developer":
+            run_dev.safe_write("backend-fastapi/app/main.py", "app = 3\n", root=payload["workspace"])
+            return {"status": "ok"}
+        assert target.read_text(encoding="utf-8") == "app = 1\n"  # QA sees the clone, not project/
+        assert payload["project_root"].endswith("project")
+        return {"status": "pass", "code": 0, "report": {}}
+
+    monkeypatch.setattr(orchestrate, "execute_role", fake_execute_role)
+    story = {"id": "WS-1", "status": "in_progress"}
+
+    await orchestrate._process_story(story, allow_no_tests=False, status_no_tests="in_review")
+
+    assert story["status"] == "done"
+    assert target.read_text(encoding="utf-8") == "app = 3\n"
+    assert not (tmp_path / "workspaces" / "WS-1").exists()